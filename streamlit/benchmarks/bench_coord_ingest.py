@@ -0,0 +1,82 @@
+# -*- coding:utf-8 -*-
+# 평면 좌표 적재 벤치마크: 서울시 비상소화장치 좌표를 EPSG:5186 X/Y 원본 형태로 되돌리고 행 수를 부풀려서
+# 노트북 방식(행마다 변환하는 DataFrame.apply)과 컬럼 전체를 한 번에 변환하는 적재 명령의 시간을 비교하고,
+# 적재 결과가 원래 좌표/구와 일치하는지 확인
+# 사용법 (streamlit 폴더에서 실행): python -m benchmarks.bench_coord_ingest [원본 행 수] [행 단위 변환 표본 수]
+import os
+import sys
+import time
+import shutil
+import tempfile
+import numpy as np
+import pandas as pd
+from pyproj import Transformer
+from utils.data_loader import load_geodata
+from utils.nearest import haversine
+from utils.site_scoring import DEVICE_PATH
+from utils.coord_ingest import SOURCE_CRS, ingest_devices, to_wgs84
+
+
+# 대시보드 좌표 파일을 원본 형태(연번, 일련번호, X좌표, Y좌표)로 변환해서 n_rows 행으로 부풀림
+def synthesize(path, n_rows, seed=0):
+    devices = load_geodata(DEVICE_PATH)
+    rows = np.random.default_rng(seed).integers(0, len(devices), n_rows) if n_rows > len(devices) else np.arange(n_rows)
+    x, y = Transformer.from_crs('EPSG:4326', SOURCE_CRS, always_xy=True).transform(
+        devices.geometry.x.to_numpy()[rows], devices.geometry.y.to_numpy()[rows])
+    raw = pd.DataFrame({
+        '연번': np.arange(1, n_rows + 1),
+        '비상소화장치일련번호': devices['비상소화장치일련번호'].to_numpy()[rows],
+        'X좌표': x,
+        'Y좌표': y,
+    })
+    raw.to_csv(path, index=False, encoding='cp949')
+    return devices.iloc[rows].reset_index(drop=True)
+
+
+# 노트북 방식: 행마다 변환 함수 호출
+def convert_by_row(raw):
+    transformer = Transformer.from_crs(SOURCE_CRS, 'EPSG:4326', always_xy=True)
+
+    def convert_coords(x, y):
+        lon, lat = transformer.transform(x, y)
+        return lat, lon
+
+    return raw.apply(lambda row: convert_coords(row['X좌표'], row['Y좌표']), axis=1, result_type='expand')
+
+
+def run(n_rows=200_000, row_sample=20_000):
+    work_dir = tempfile.mkdtemp()
+    try:
+        raw_path = os.path.join(work_dir, 'devices_raw.csv')
+        expected = synthesize(raw_path, n_rows)
+
+        raw = pd.read_csv(raw_path, encoding='cp949').head(row_sample)
+        start = time.perf_counter()
+        convert_by_row(raw)
+        per_row = (time.perf_counter() - start) / len(raw)
+        print(f'row-by-row apply: {len(raw)} rows in {per_row * len(raw):.2f} s '
+              f'(~{per_row * n_rows:.1f} s for {n_rows} rows, transform only)')
+
+        raw = pd.read_csv(raw_path, encoding='cp949')
+        start = time.perf_counter()
+        to_wgs84(raw['X좌표'], raw['Y좌표'])
+        print(f'vectorized transform: {len(raw)} rows in {time.perf_counter() - start:.3f} s (cached Transformer)')
+
+        output_path = os.path.join(work_dir, 'devices.csv')
+        start = time.perf_counter()
+        report = ingest_devices(raw_path, output_path, SOURCE_CRS, encoding='cp949')
+        print(f"vectorized ingest: {report['rows']} rows -> {report['written']} rows in {time.perf_counter() - start:.2f} s "
+              f"(transform + 구 validation + 동 + write), outside Seoul {report['outside_seoul']}")
+
+        result = pd.read_csv(output_path)
+        error_m = haversine(result['위도'], result['경도'], expected.geometry.y, expected.geometry.x) * 1000
+        gu_match = (result['구'].to_numpy() == expected['구'].astype(str).to_numpy()).mean()
+        print(f'round trip error max {error_m.max():.4f} m, 구 matches original {gu_match:.1%}')
+    finally:
+        shutil.rmtree(work_dir)
+
+
+if __name__ == '__main__':
+    n_rows = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    row_sample = int(sys.argv[2]) if len(sys.argv) > 2 else 20_000
+    run(n_rows, row_sample)
@@ -0,0 +1,73 @@
+# -*- coding:utf-8 -*-
+# 화재출동 원본 적재 벤치마크: 골든타임 초과 데이터를 부풀려 만든 전국 형태의 원본(서울시 외 행 포함)을
+# 묶음 단위로 적재하면서 처리 속도와 최대 메모리를 재고, 집계 합계가 서울시 행 수와 같은지 확인
+# 사용법 (streamlit 폴더에서 실행): python -m benchmarks.bench_incident_store [원본 행 수] [묶음 행 수]
+import os
+import sys
+import time
+import shutil
+import resource
+import tempfile
+import numpy as np
+import pandas as pd
+from utils.data_loader import load_data
+from utils.incident_store import INCIDENT_PATH, ingest, load_incident_aggregates, query_incidents, CHUNK_ROWS
+
+# 전체 원본 중 서울시 행 비율
+SEOUL_SHARE = 0.2
+OTHER_SIDO = ['경기도', '부산광역시', '인천광역시', '경상남도', '충청남도']
+
+
+# 기존 데이터를 다시 뽑고 시각/좌표를 흔들어서 전국 형태 원본을 묶음 단위로 파일에 씀
+def synthesize(path, n_rows, chunk_rows=1_000_000, seed=0):
+    base = load_data(INCIDENT_PATH).drop(columns=['계절', '시간대']).astype({'시군구명': str, '읍면동명': str})
+    rng = np.random.default_rng(seed)
+    start = pd.Timestamp('2015-01-01').value // 10**9
+    span = pd.Timestamp('2024-12-31').value // 10**9 - start
+    for offset in range(0, n_rows, chunk_rows):
+        size = min(chunk_rows, n_rows - offset)
+        chunk = base.iloc[rng.integers(0, len(base), size)].reset_index(drop=True)
+        chunk.insert(0, '시도명', np.where(rng.random(size) < SEOUL_SHARE, '서울특별시', rng.choice(OTHER_SIDO, size)))
+        chunk['출동소요시간'] = rng.gamma(4.0, 80.0, size).astype(int)
+        chunk['화재발생일시'] = pd.to_datetime(start + rng.integers(0, span, size), unit='s').strftime('%Y-%m-%d %H:%M:%S')
+        chunk['위도'] += rng.normal(0, 0.002, size)
+        chunk['경도'] += rng.normal(0, 0.002, size)
+        chunk.to_csv(path, mode='a', header=offset == 0, index=False)
+
+
+def run(n_rows=5_000_000, chunk_rows=CHUNK_ROWS):
+    work_dir = tempfile.mkdtemp()
+    try:
+        raw_path = os.path.join(work_dir, 'national.csv')
+        start = time.perf_counter()
+        synthesize(raw_path, n_rows)
+        print(f'synthesized {n_rows} rows ({os.path.getsize(raw_path) / 2**20:.0f} MB) in {time.perf_counter() - start:.1f} s')
+
+        store_dir = os.path.join(work_dir, 'store')
+        rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+        start = time.perf_counter()
+        entry = ingest([raw_path], store_dir, chunk_rows)[raw_path]
+        elapsed = time.perf_counter() - start
+        rss_after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+        print(f"ingested {entry['raw_rows']} rows -> {entry['seoul_rows']} Seoul rows in {elapsed:.1f} s "
+              f"({entry['raw_rows'] / elapsed:,.0f} rows/s, peak RSS {rss_before:.0f} -> {rss_after:.0f} MB)")
+
+        aggregates = load_incident_aggregates(store_dir=store_dir)
+        print(f"{len(aggregates)} aggregate groups, total {aggregates['건수'].sum()} (expected {entry['seoul_rows']})")
+        assert aggregates['건수'].sum() == entry['seoul_rows']
+
+        start = time.perf_counter()
+        rows = query_incidents(gu='송파구', year=2021, golden_only=True, store_dir=store_dir)
+        print(f'query 송파구 2021 golden-time rows: {len(rows)} in {(time.perf_counter() - start) * 1000:.0f} ms')
+
+        start = time.perf_counter()
+        again = ingest([raw_path], store_dir, chunk_rows)[raw_path]
+        print(f're-ingest unchanged file skipped in {(time.perf_counter() - start) * 1000:.0f} ms ({again["seoul_rows"]} rows)')
+    finally:
+        shutil.rmtree(work_dir)
+
+
+if __name__ == '__main__':
+    n_rows = int(sys.argv[1]) if len(sys.argv) > 1 else 5_000_000
+    chunk_rows = int(sys.argv[2]) if len(sys.argv) > 2 else CHUNK_ROWS
+    run(n_rows, chunk_rows)
@@ -0,0 +1,66 @@
+# -*- coding:utf-8 -*-
+# 지도 렌더링 벤치마크: 서버 렌더 시간과 브라우저로 전송되는 HTML 크기 비교
+# 사용법 (streamlit 폴더에서 실행): python -m benchmarks.bench_maps
+import glob
+import runpy
+import time
+import logging
+from utils import ui_helpers
+from utils.data_loader import load_geodata
+from utils.geo_lod import BOUNDARY_PATH, load_boundary_lod
+from utils.map_cache import render_map_html
+
+logging.getLogger('streamlit').setLevel(logging.ERROR)
+
+
+# 페이지 스크립트를 main() 실행 없이 불러와서 시각화 함수와 데이터를 가져옴
+# (사이드바 페이지 링크는 streamlit 서버 없이 만들 수 없으므로 건너뜀)
+def load_page(pattern):
+    ui_helpers.setup_sidebar_links = lambda: None
+    return runpy.run_path(glob.glob(pattern)[0], run_name='benchmark')
+
+
+# 캐시를 거치지 않고 함수를 반복 실행해서 평균 시간(ms)과 결과 크기(bytes) 측정
+def measure(func, *args, repeat=5, **kwargs):
+    func = getattr(func, '__wrapped__', func)
+    start = time.perf_counter()
+    for _ in range(repeat):
+        html = func(*args, **kwargs)
+    elapsed = (time.perf_counter() - start) / repeat * 1000
+    return elapsed, len(html.encode('utf-8'))
+
+
+def report(name, cases):
+    print(f'\n[{name}]')
+    print(f'{"case":<24}{"render (ms)":>14}{"html (KB)":>14}')
+    for label, (elapsed, size) in cases.items():
+        print(f'{label:<24}{elapsed:>14.1f}{size / 1024:>14.1f}')
+
+
+# 1. 화재사고 취약지역 지도: 원본 경계 vs 줌 레벨별 단순화 경계
+def bench_choropleth():
+    page = load_page('pages/1-*.py')
+    df, zoom = page['df'], page['MAP_ZOOM']
+    cases = {}
+    boundaries = {'original': load_geodata(BOUNDARY_PATH)}
+    boundaries[f'lod zoom {zoom}'] = load_boundary_lod(zoom)
+    for label, gdf in boundaries.items():
+        merged = gdf.merge(df, left_on='구', right_on='자치구')
+        cases[label] = measure(lambda: render_map_html(page['create_and_show_map'](_data=merged, columns=['자치구', '전체 점수'],
+                                                                                key_on='feature.properties.자치구')))
+    report('vulnerability choropleth', cases)
+
+
+# 2. 비상소화장치 클러스터 지도: 마커 객체 방식 vs 좌표 배열 + 브라우저 클러스터 방식
+def bench_cluster_map():
+    page = load_page('pages/2-*.py')
+    gdf = page['_gdf']
+    cases = {}
+    for label, bulk in [('marker objects', False), ('bulk point array', True)]:
+        cases[label] = measure(lambda: page['build_cluster_map'](gdf, bulk=bulk).get_root().render())
+    report(f'hydrant device cluster map ({len(gdf)} points)', cases)
+
+
+if __name__ == '__main__':
+    bench_choropleth()
+    bench_cluster_map()
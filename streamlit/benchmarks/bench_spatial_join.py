@@ -0,0 +1,56 @@
+# -*- coding:utf-8 -*-
+# 구/동 배정 벤치마크: 서울시 범위의 임의 좌표에 대해 자치구 경계를 하나씩 검사하는 방식(점마다 경계 전체 검사)과
+# 격자 조각 STRtree 에 한 번에 조회하는 방식의 처리 속도(초당 지점 수)를 비교하고 두 결과가 일치하는지 확인
+# 사용법 (streamlit 폴더에서 실행): python -m benchmarks.bench_spatial_join [지점 수] [경계별 검사 표본 수]
+import sys
+import time
+import numpy as np
+import shapely
+from utils.data_loader import load_geodata
+from utils.geo_lod import BOUNDARY_PATH
+from utils.spatial_join import RegionIndex, assign_regions
+
+
+# 자치구 경계 전체를 하나씩 검사 (준비하지 않은 도형, 먼저 찾은 구)
+def locate_by_polygon(polygons, lat, lon):
+    found = np.full(len(lat), -1, dtype=np.int64)
+    for number, polygon in enumerate(polygons):
+        inside = (found < 0) & shapely.contains_xy(polygon, lon, lat)
+        found[inside] = number
+    return found
+
+
+def run(n_points=1_000_000, polygon_sample=50_000):
+    boundary = load_geodata(BOUNDARY_PATH)
+    min_x, min_y, max_x, max_y = boundary.total_bounds
+    rng = np.random.default_rng(0)
+    lat, lon = rng.uniform(min_y, max_y, n_points), rng.uniform(min_x, max_x, n_points)
+
+    start = time.perf_counter()
+    index = RegionIndex(boundary[['구']].astype(str), boundary.geometry.values)
+    print(f'index build: {len(index.pieces)} pieces from {len(index)} 구 in {time.perf_counter() - start:.2f} s')
+
+    polygons = shapely.from_wkb(shapely.to_wkb(boundary.geometry.values))
+    start = time.perf_counter()
+    expected = locate_by_polygon(polygons, lat[:polygon_sample], lon[:polygon_sample])
+    elapsed = time.perf_counter() - start
+    print(f'per-polygon contains: {polygon_sample} points in {elapsed:.2f} s ({polygon_sample / elapsed:,.0f} points/s)')
+
+    start = time.perf_counter()
+    found = index.locate(lat, lon)
+    elapsed = time.perf_counter() - start
+    print(f'STRtree bulk query: {n_points} points in {elapsed:.2f} s ({n_points / elapsed:,.0f} points/s), '
+          f'inside Seoul {(found >= 0).mean():.1%}')
+    print(f'agreement with per-polygon contains: {(found[:polygon_sample] == expected).mean():.2%}')
+
+    start = time.perf_counter()
+    regions = assign_regions(lat[:polygon_sample], lon[:polygon_sample])
+    elapsed = time.perf_counter() - start
+    print(f'구 + 동 assignment (incl. index loads): {polygon_sample} points in {elapsed:.2f} s ({polygon_sample / elapsed:,.0f} points/s), '
+          f'동 assigned {regions["동"].notna().mean():.1%}')
+
+
+if __name__ == '__main__':
+    n_points = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    polygon_sample = int(sys.argv[2]) if len(sys.argv) > 2 else 50_000
+    run(n_points, polygon_sample)
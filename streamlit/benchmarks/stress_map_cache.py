@@ -0,0 +1,69 @@
+# -*- coding:utf-8 -*-
+# 지도 캐시 동시 접속 스트레스 테스트: 여러 세션이 동시에 송파구 비상소화장치 지도를 요청할 때
+# 모든 세션이 완전한 같은 HTML 을 받는지, 렌더링은 한 번만 일어나는지, 응답 시간이 유지되는지 확인
+# 사용법 (streamlit 폴더에서 실행): python -m benchmarks.stress_map_cache [세션 수] [세션당 요청 수]
+import sys
+import time
+import tempfile
+import threading
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+from benchmarks.bench_maps import load_page
+from utils.map_cache import MapCache, render_map_html, dataset_version
+
+# 캐시 적중 시 요청당 허용 지연 시간 (ms, p95 기준)
+MAX_P95_MS = 50
+
+
+def run(sessions=64, requests_per_session=20):
+    page = load_page('pages/3-*.py')
+    data, version = page['data'], dataset_version(page['EQUIP_PATH'])
+    cache = MapCache(cache_dir=tempfile.mkdtemp())
+    renders = []
+
+    def build():
+        renders.append(threading.get_ident())
+        return render_map_html(page['fire_equip_map'](data))
+
+    # 모든 세션이 동시에 시작하도록 대기
+    barrier = threading.Barrier(sessions)
+
+    def session(_):
+        barrier.wait()
+        results = []
+        for _ in range(requests_per_session):
+            start = time.perf_counter()
+            html = cache.get_or_render('songpa_equipment', version, {}, build)
+            results.append(((time.perf_counter() - start) * 1000, html))
+        return results
+
+    with ThreadPoolExecutor(max_workers=sessions) as pool:
+        results = [r for rs in pool.map(session, range(sessions)) for r in rs]
+
+    latencies = np.array([elapsed for elapsed, _ in results])
+    outputs = {html for _, html in results}
+    html = next(iter(outputs))
+    cold = latencies.max()
+    warm = np.sort(latencies)[:-sessions]
+
+    checks = {
+        'all sessions got identical HTML': len(outputs) == 1,
+        'rendered exactly once': len(renders) == 1,
+        'complete HTML document': html.rstrip().endswith('</html>'),
+        'legend present': '설치지역별 마커 색상' in html,
+        f'one marker per device ({len(data)})': html.count('L.marker(') == len(data),
+        f'warm p95 under {MAX_P95_MS} ms': np.percentile(warm, 95) < MAX_P95_MS,
+    }
+
+    print(f'{sessions} sessions x {requests_per_session} requests = {len(results)} requests')
+    print(f'cold render (max): {cold:.1f} ms')
+    print(f'warm p50 / p95 / max: {np.percentile(warm, 50):.3f} / {np.percentile(warm, 95):.3f} / {warm.max():.3f} ms')
+    print(f'cache stats: {cache.stats()}')
+    for name, passed in checks.items():
+        print(f"[{'PASS' if passed else 'FAIL'}] {name}")
+    return all(checks.values())
+
+
+if __name__ == '__main__':
+    args = [int(arg) for arg in sys.argv[1:]]
+    sys.exit(0 if run(*args) else 1)
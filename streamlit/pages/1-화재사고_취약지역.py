@@ -2,20 +2,39 @@
 import streamlit as st
 import pandas as pd
 import plotly.express as px
-import geopandas as gpd
 import folium
+import branca.colormap as cm
 from folium.features import DivIcon
-from utils.data_loader import load_data
+from utils.geo_lod import load_boundary_lod, BOUNDARY_PATH
 from utils.ui_helpers import setup_sidebar_links
-import os
+from utils.vulnerability import compute_ranking, rank_stability, INDICATORS, STABILITY_SAMPLES, TOP_N
+from utils.dong_vulnerability import (compute_dong_ranking, rollup_districts, load_dong_boundary, dong_points, dong_group_index,
+                                      DONG_INDICATORS)
+from utils.map_cache import show_cached_map, show_map_cache_stats, dataset_version
+from utils.artifacts import pin_artifact_versions
 
 st.set_page_config(layout="wide", initial_sidebar_state="expanded", page_icon='⚠️')
+pin_artifact_versions()
 
-df = load_data("data/total_rank.csv", encoding='cp949')
-gdf = gpd.read_file("data/boundary/boundary.geojson", driver="GeoJSON")
+# 취약지역 지도 초기 줌 레벨 (경계 단순화 단계 선택에 사용)
+MAP_ZOOM = 11
+
+gdf = load_boundary_lod(MAP_ZOOM)
 
 setup_sidebar_links()
 
+# 지표별 가중치 (0 이면 제외), 바꿀 때마다 순위와 전체 점수를 다시 계산
+with st.sidebar.expander('⚖️ 취약점수 가중치'):
+    weights = tuple((name, st.slider(name, 0.0, 3.0, 1.0, 0.5, key=f'weight_{name}')) for name in INDICATORS)
+    if not any(weight for _, weight in weights):
+        st.warning('적어도 하나 이상의 카테고리 가중치가 0보다 커야 합니다.', icon="🚨")
+
+df = compute_ranking(weights)
+# 가중치를 바꾸지 않은 지표(0 제외)에 대해 무작위 가중치로 순위가 얼마나 흔들리는지 계산
+active = tuple(name for name, weight in weights if weight > 0)
+# 행정동 지표 중 자치구 지표와 이름이 같은 지표는 사이드바 가중치를 그대로 사용
+dong_weights = tuple((name, dict(weights).get(name, 1.0)) for name in DONG_INDICATORS)
+
 columns_to_exclude = ["비상소화장치 설치개수 점수", "서울시 주거 시설 중 주택 비율 점수", "인구밀도(명/km^2) 점수", 
                       "노후 주택 수 점수", "소방관 1명당 담당인구 점수", "화재발생건수 점수", "안전센터 1개소당 담당인구 점수", 
                       "출동소요시간 점수", "순위", "전체 점수", "고령자 수 점수"]
@@ -58,9 +77,8 @@ def visualize_top_districts_with_seoul_average(df, column_name='비상소화장
     fig.update_xaxes(tickmode='array', tickvals=visual_df['자치구'])
     st.plotly_chart(fig, use_container_width=True)
 
-@st.cache_data
-def create_and_show_map(_data, columns, key_on, fill_color='YlOrRd'):
-    seoul_map = folium.Map(location=[37.5642135, 127.0016985], zoom_start=11)
+def create_and_show_map(_data, columns, key_on, fill_color='YlOrRd', zoom_start=MAP_ZOOM):
+    seoul_map = folium.Map(location=[37.5642135, 127.0016985], zoom_start=zoom_start)
     choropleth = folium.Choropleth(
         geo_data=_data,
         name='choropleth',
@@ -110,7 +128,44 @@ def create_and_show_map(_data, columns, key_on, fill_color='YlOrRd'):
             )
         ).add_to(seoul_map)
 
-    return seoul_map._repr_html_()
+    return seoul_map
+
+# 행정동별 취약점수 지도: 동 경계가 있으면 단계구분도, 없으면 기준 이름별 대표 위치에 원으로 표시
+def create_dong_map(ranking, gu=None):
+    if gu is not None:
+        ranking = ranking.iloc[dong_group_index().rows(gu)]
+    colormap = cm.linear.YlOrRd_09.scale(ranking['전체 점수'].min(), ranking['전체 점수'].max())
+    colormap.caption = '행정동 전체 점수 (높을수록 취약)'
+    dong_map = folium.Map(location=[37.5642135, 127.0016985], zoom_start=MAP_ZOOM if gu is None else 13)
+    fields = ['자치구', '동', '순위', '구 내 순위', '전체 점수'] + list(DONG_INDICATORS)
+
+    boundary = load_dong_boundary()
+    if boundary is not None:
+        merged = boundary.merge(ranking.astype({'자치구': str, '동': str}), left_on=['구', '동'], right_on=['자치구', '동'])
+        merged[list(DONG_INDICATORS)] = merged[list(DONG_INDICATORS)].round(1)
+        folium.GeoJson(
+            merged[fields + ['geometry']],
+            style_function=lambda feature: {'fillColor': colormap(feature['properties']['전체 점수']),
+                                            'color': '#555555', 'weight': 0.5, 'fillOpacity': 0.7},
+            tooltip=folium.GeoJsonTooltip(fields=fields),
+        ).add_to(dong_map)
+    else:
+        # 같은 기준 이름(예: 잠실1~7동)의 행정동은 한 원에 모아서 평균 점수로 표시
+        points = dong_points()
+        groups = ranking.assign(기준=ranking['기준'].astype(str)).groupby('기준')
+        for key, group in groups:
+            if key not in points.index:
+                continue
+            lat, lon = points.loc[key, ['위도', '경도']]
+            score = group['전체 점수'].mean()
+            lines = [f"{row['동']}: {row['전체 점수']:.0f}점 ({row['순위']}위)" for _, row in group.sort_values('순위').iterrows()]
+            folium.CircleMarker(
+                location=[lat, lon], radius=5 + 2 * len(group),
+                color=colormap(score), fill=True, fill_color=colormap(score), fill_opacity=0.8, weight=1,
+                tooltip=folium.Tooltip(f"<b>{group['자치구'].iloc[0]}</b><br>" + '<br>'.join(lines)),
+            ).add_to(dong_map)
+    colormap.add_to(dong_map)
+    return dong_map
 
 def main():
     st.header('화재사고 취약지역 분석', help ='이 페이지에서는 서울시 내 주택화재 취약지를 다양한 분석 지표를 통해 탐색해보고, 지역별로 취약점수를 비교해 볼 수 있습니다.', divider="gray")
@@ -138,17 +193,55 @@ def main():
                 st.markdown("""
                     각 카테고리별로 지역의 취약성을 분석하여 순위를 매긴 뒤,
                     모든 카테고리의 순위를 합산하여 최종 점수를 산출했습니다.
+                    사이드바의 **취약점수 가중치**에서 카테고리별 가중치를 바꾸거나 0으로 설정해 제외할 수 있습니다.
                     :orange[**점수가 높을수록 소방 취약지역입니다.**]
                         
                     **카테고리**: 비상소화장치 설치개수, 주택 중 아파트를 제외한 건물 비율,	인구밀도(명/km^2),	노후 주택 수, 소방관 1명당 담당인구, 화재발생건수, 안전센터 1개소당 담당인구, 출동소요시간, 고령자 수
                 """)
-            html_string = create_and_show_map(_data=merged_data, columns=['자치구', '전체 점수'], key_on='feature.properties.자치구')
-            st.components.v1.html(html_string, height=570)
+            show_cached_map('vulnerability', dataset_version('vulnerability.ranking', BOUNDARY_PATH), {'weights': weights, 'zoom': MAP_ZOOM},
+                            lambda: create_and_show_map(_data=merged_data, columns=['자치구', '전체 점수'], key_on='feature.properties.자치구'),
+                            width=None, height=560)
 
     with col2:
         with st.container(border=True, height=700): 
-            st.markdown("**취약점수 순위**")
-            st.dataframe(df_3, height=600, use_container_width=True, hide_index=True)
+            rank_tab, stability_tab = st.tabs(['취약점수 순위', '순위 안정성'])
+            with rank_tab:
+                st.dataframe(df_3, height=560, use_container_width=True, hide_index=True)
+            with stability_tab:
+                if active:
+                    st.caption(f'가중치를 무작위로 {STABILITY_SAMPLES:,}번 바꿔 계산한 순위 분포 (순위 범위: 5%~95%)')
+                    stability = rank_stability(active)
+                    stability['순위 범위'] = stability['순위 5%'].astype(str) + '~' + stability['순위 95%'].astype(str)
+                    st.dataframe(stability[['자치구', '동일가중 순위', '평균 순위', '순위 범위', f'상위 {TOP_N}위 확률']], height=520,
+                                 use_container_width=True, hide_index=True,
+                                 column_config={
+                                     '평균 순위': st.column_config.NumberColumn(format='%.1f'),
+                                     f'상위 {TOP_N}위 확률': st.column_config.ProgressColumn(format='%.2f', min_value=0, max_value=1),
+                                 })
+
+    with st.container(border=True, height=760):
+        st.markdown('<h4>서울시 행정동별 취약점수</h4>', unsafe_allow_html=True)
+        dong_ranking = compute_dong_ranking(dong_weights)
+        col3, col4 = st.columns([7, 3])
+        with col3:
+            districts = ['서울시 전체'] + dong_group_index().gu_options()
+            selected_gu = st.selectbox('자치구 선택', districts, key='_dong_gu')
+            gu = None if selected_gu == '서울시 전체' else selected_gu
+            if load_dong_boundary() is None:
+                st.caption('행정동 경계 데이터가 없어 같은 이름의 행정동(예: 잠실1~7동)을 시설/화재 기록 위치에 원으로 묶어 표시합니다.')
+            show_cached_map('dong_vulnerability', dataset_version('dong.ranking', 'dong.boundary', 'dong.points'), {'weights': dong_weights, 'gu': gu},
+                            lambda: create_dong_map(dong_ranking, gu), width=None, height=560)
+        with col4:
+            dong_tab, district_tab = st.tabs(['행정동 순위', '자치구 집계'])
+            with dong_tab:
+                table = dong_ranking if gu is None else dong_ranking.iloc[dong_group_index().rows(gu)]
+                st.dataframe(table.sort_values('순위')[['자치구', '동', '순위', '구 내 순위', '전체 점수']],
+                             height=580, use_container_width=True, hide_index=True)
+            with district_tab:
+                st.caption('행정동 값을 자치구별로 집계 (건수는 합계, 출동소요시간과 점수는 동 평균)')
+                st.dataframe(rollup_districts(dong_weights).round(1), height=560, use_container_width=True, hide_index=True)
+
+    show_map_cache_stats()
 
 if __name__ == "__main__":
     main()
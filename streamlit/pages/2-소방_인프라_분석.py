@@ -3,55 +3,107 @@ import streamlit as st
 import geopandas as gpd
 import pandas as pd
 import folium
-from shapely import wkt
-from streamlit_folium import folium_static
-from folium.plugins import MarkerCluster
+import branca.colormap as cm
+import plotly.express as px
+from streamlit_folium import st_folium
+from folium.plugins import MarkerCluster, FastMarkerCluster
 from folium.features import DivIcon
-from utils.data_loader import load_data
+from utils.data_loader import load_geodata
 from utils.ui_helpers import setup_sidebar_links, display_season_colors, create_html_button
+from utils.tile_server import start_tile_server, water_color, TILE_ZOOMS
+from utils.point_cluster import load_cluster_index, add_cluster_layer
+from utils.viewport import ViewportIndex, parse_bounds
+from utils.group_index import load_group_index
+from utils.incident_store import (load_incident_aggregates, incident_summary, incident_store_version, query_incidents,
+                                  GOLDEN_TIME_SEC)
+from utils.fire_density import (density_overlay, incidents_near, DENSITY_WEIGHTS, DENSITY_COLORMAP, CELL_M, BANDWIDTH_M,
+                                DETAIL_ZOOM, DETAIL_RADIUS_M)
+from utils.hex_grid import join_hex, hex_polygons, hex_source_version, HEX_MEASURES, HEX_SIZES_M, HEX_BASE_ZOOM
+from utils.map_cache import show_cached_map, show_map_cache_stats, dataset_version
+from utils.artifacts import pin_artifact_versions
+from utils.coverage import (load_grid_coverage, coverage_color, COVERAGE_CLASSES, COVERAGE_PARAMS,
+                            GOLDEN_TIME_MIN, TURNOUT_MIN, DETOUR_FACTOR, TRAVEL_SPEED_KMH)
 
 
 # 페이지 설정
 st.set_page_config(layout="wide", initial_sidebar_state="expanded", page_icon='🚒')
+pin_artifact_versions()
 setup_sidebar_links()
 
 
 # 데이터 로드
-data = load_data("data/서울시_비상소화장치_좌표_구동.csv")
-grid = load_data("data/seoul_500_grid_water.csv", encoding='euc-kr')
-df = load_data("data/서울시_소방시설_좌표_구동.csv")
-time = load_data("data/화재출동_골든타임.csv")
+DEVICE_PATH = "data/서울시_비상소화장치_좌표_구동.csv"
+GRID_PATH = "data/seoul_500_grid_water.csv"
+STATION_PATH = "data/서울시_소방시설_좌표_구동.csv"
+# 골든타임 초과 화재를 지점으로 그릴 최대 건수 (넘으면 밀도 지도로 표시)
+INCIDENT_POINT_LIMIT = 2000
+# 계절별 지점 색상 (display_season_colors 범례와 같은 색)
+SEASON_COLORS = {'봄': '#2ecc71', '여름': '#e74c3c', '가을': '#f39c12', '겨울': '#3498db'}
 
-data['geometry'] = data['geometry'].apply(wkt.loads)  
-_gdf = gpd.GeoDataFrame(data, geometry='geometry')
+grid = load_geodata(GRID_PATH, encoding='euc-kr')
+# 구/동 필터용 그룹 인덱스 (선택지 목록과 행 위치를 한 번만 계산)
+station_index = load_group_index(STATION_PATH)
+device_index = load_group_index(DEVICE_PATH, geo=True)
 
 
-# 시각화 함수
-@st.cache_data
+# 시각화 함수 (지도는 show_cached_map 으로 필터별 HTML 을 캐시해서 표시)
+STATION_COLORS = {
+    '소방서': 'red',
+    '안전센터': 'blue',
+    '구조대': 'orange',
+    '소방항공대': 'black',
+    '특수대응단': 'yellow'
+}
+
+def add_station_marker(m, row):
+    popup_content = f"<b>서ㆍ센터명:</b> {row['서ㆍ센터명']}<br><b>유형구분명:</b> {row['유형구분명']}"
+    folium.CircleMarker(
+        location=[row['위도'], row['경도']],
+        radius=8,
+        color=STATION_COLORS[row['유형구분명']],
+        fill=True,
+        fill_color=STATION_COLORS[row['유형구분명']],
+        fill_opacity=0.5,
+        popup=folium.Popup(popup_content, max_width=300)
+    ).add_to(m)
+
 def create_folium_map(df):
     m = folium.Map(location=[37.5642135, 127.0016985], zoom_start=11)
-    colors = {
-        '소방서': 'red',
-        '안전센터': 'blue',
-        '구조대': 'orange',
-        '소방항공대': 'black',
-        '특수대응단': 'yellow'
-    }
     for index, row in df.iterrows():
-        popup_content = f"<b>서ㆍ센터명:</b> {row['서ㆍ센터명']}<br><b>유형구분명:</b> {row['유형구분명']}"
-        folium.CircleMarker(
-            location=[row['위도'], row['경도']],
-            radius=8,
-            color=colors[row['유형구분명']],
-            fill=True,
-            fill_color=colors[row['유형구분명']],
-            fill_opacity=0.5,
-            popup=folium.Popup(popup_content, max_width=300)
-        ).add_to(m)
-    folium_static(m)
-
-def folium_map_with_clusters(gdf):
-    m = folium.Map(location=[37.5665, 126.9780], tiles='OpenStreetMap', zoom_start=11)
+        add_station_marker(m, row)
+    return m
+
+# 클러스터 지도: 데이터셋 공유 클러스터 인덱스에서 현재 화면 범위와 줌의 클러스터만 골라 점 레이어로 교체
+# draw_point(layer, i) 는 클러스터 인덱스를 만든 데이터셋의 i 번째 점을 그림
+def folium_cluster_map(clusters, draw_point, key, center=(37.5642135, 127.0016985), zoom_start=11):
+    state = st.session_state.get(key) or {}
+    bounds = parse_bounds(state.get('bounds')) or clusters.bounds
+    zoom = state.get('zoom') or zoom_start
+
+    m = folium.Map(location=center, zoom_start=zoom_start)
+    layer = folium.FeatureGroup(name='클러스터')
+    add_cluster_layer(layer, clusters.get_clusters(bounds, zoom), draw_point)
+    st_folium(m, key=key, center=center, zoom=zoom_start, feature_group_to_add=layer,
+              returned_objects=['bounds', 'zoom'], height=550, use_container_width=True)
+
+# 좌표와 라벨을 하나의 배열로 보내고 브라우저에서 캔버스 마커와 클러스터를 만드는 콜백
+FAST_MARKER_CALLBACK = """
+function (row) {
+    var marker = L.circleMarker(new L.LatLng(row[0], row[1]), {
+        radius: 6, color: '#D33D2A', weight: 1, fillColor: '#D33D2A', fillOpacity: 0.8
+    });
+    marker.bindTooltip(row[2]);
+    return marker;
+};
+"""
+
+def build_cluster_map(gdf, bulk=True):
+    m = folium.Map(location=[37.5665, 126.9780], tiles='OpenStreetMap', zoom_start=11, prefer_canvas=bulk)
+    if bulk:
+        points = list(zip(gdf.geometry.y.round(6), gdf.geometry.x.round(6), gdf['구'].astype(str) + ', ' + gdf['동'].astype(str)))
+        FastMarkerCluster(points, callback=FAST_MARKER_CALLBACK).add_to(m)
+        return m
+
     marker_cluster = MarkerCluster().add_to(m)
     for idx, row in gdf.iterrows():
         tooltip = f"{row['구']}, {row['동']}"
@@ -60,119 +112,228 @@ def folium_map_with_clusters(gdf):
             tooltip=tooltip,
             icon=folium.Icon(color='red', icon='info-sign')
         ).add_to(marker_cluster)
-    folium_static(m)
+    return m
+
+
+# 서울시 전체는 데이터셋 공유 클러스터 인덱스를 사용하고, 구/동을 고르면 선택한 점으로 클러스터를 만듦
+# version: 비상소화장치 파일의 데이터 버전 (파일이 바뀌면 새 인덱스를 만듦)
+@st.cache_resource(max_entries=64)
+def viewport_index(_gdf, version, selected_gu, selected_dong):
+    clusters = load_cluster_index('devices') if selected_gu == '서울시' else None
+    return ViewportIndex(_gdf, clusters)
+
+# 화면 범위 모드: 지도는 한 번만 그리고, 이동/확대 시 화면 안의 점 레이어만 교체
+def folium_map_viewport(index, key, zoom_start=11):
+    state = st.session_state.get(key) or {}
+    bounds = parse_bounds(state.get('bounds')) or index.bounds
+    zoom = state.get('zoom') or zoom_start
+    points, clusters = index.query(bounds, zoom)
 
-@st.cache_data
-def visualize_fire_water(grid, column_name='소방용수_수'):
-    grid['geometry'] = gpd.GeoSeries.from_wkt(grid['geometry'])
-    gdf = gpd.GeoDataFrame(grid, geometry='geometry')
-    gdf.crs = "EPSG:4326"
+    m = folium.Map(location=index.center, tiles='OpenStreetMap', zoom_start=zoom_start, prefer_canvas=True)
+    layer = folium.FeatureGroup(name='비상소화장치')
 
+    def add_point(layer, lat, lon, gu, dong):
+        folium.CircleMarker(
+            location=[lat, lon],
+            radius=6,
+            color='#D33D2A',
+            weight=1,
+            fill=True,
+            fill_color='#D33D2A',
+            fill_opacity=0.8,
+            tooltip=f"{gu}, {dong}"
+        ).add_to(layer)
+
+    if clusters is None:
+        for lat, lon, gu, dong in zip(points.geometry.y, points.geometry.x, points['구'], points['동']):
+            add_point(layer, lat, lon, gu, dong)
+    else:
+        def draw_point(layer, i):
+            row = index.gdf.iloc[i]
+            add_point(layer, row.geometry.y, row.geometry.x, row['구'], row['동'])
+        add_cluster_layer(layer, clusters, draw_point)
+
+    st_folium(m, key=key, center=index.center, zoom=zoom_start, feature_group_to_add=layer,
+              returned_objects=['bounds', 'zoom'], height=550, use_container_width=True)
+
+def visualize_fire_water(_gdf, column_name='소방용수_수'):
     map_fw = folium.Map(location=[37.564, 126.997], zoom_start=11, tiles='OpenStreetMap')
 
-    def color_scale(amount):
-        if amount == 30:
-            return '#01579B' 
-        elif amount == 20:
-            return '#0277BD' 
-        elif amount == 10:
-            return '#0288D1' 
-        elif amount in[8, 9]:
-            return '#039BE5'
-        elif amount in[6, 7]:
-            return '#03A9F4'  
-        elif amount == 5:
-            return '#29B6F6'  
-        elif amount == 4:
-            return '#4FC3F7'  
-        elif amount == 3:
-            return '#81D4FA'  
-        elif amount == 2:
-            return '#B3E5FC'  
-        elif amount == 1:
-            return '#E1F5FE' 
-        else:
-            return '#808080' 
+    # 타일 서버가 실행 중이면 화면에 필요한 격자 타일만 불러오고, 아니면 전체 격자를 GeoJson 으로 포함
+    tile_url = start_tile_server()
+    if tile_url is not None and column_name == '소방용수_수':
+        folium.TileLayer(
+            tiles=tile_url.replace('{layer}', 'fire_water'),
+            attr='소방용수 500m 격자',
+            name='소방용수',
+            overlay=True,
+            min_zoom=TILE_ZOOMS[0],
+            max_zoom=TILE_ZOOMS[-1],
+            max_native_zoom=TILE_ZOOMS[-1],
+        ).add_to(map_fw)
+    else:
+        folium.GeoJson(
+            _gdf,
+            style_function=lambda feature: {
+                'fillColor': water_color(feature['properties'][column_name]),
+                'color': 'black',
+                'weight': 0.1,
+                'fillOpacity': 0.7,
+            }
+        ).add_to(map_fw)
+    return map_fw
 
-    folium.GeoJson(
-        gdf,
-        style_function=lambda feature: {
-            'fillColor': color_scale(feature['properties'][column_name]),
-            'color': 'black',
-            'weight': 0.1,
-            'fillOpacity': 0.7,
-        }
-    ).add_to(map_fw)
-    folium_static(map_fw)
-
-@st.cache_data
-def fire_incidents_map(df):
-    df_filtered = df.dropna(subset=['위도', '경도'])
-    map_seoul = folium.Map(location=[37.5665, 126.9780], zoom_start=11)
-
-    def create_popup_html(row):
-        return f'''
-        <html>
-            <head><style>
-                .popup {{
-                    font-family: Arial, sans-serif;
-                    font-size: 12px;
-                    color: #333333;
-                }}
-                .title {{
-                    font-weight: bold;
-                    color: #0078A8;
-                    margin-bottom: 5px;
-                }}
-                .info {{
-                    margin-bottom: 2px;
-                }}
-            </style></head>
-            <body>
-                <div class="popup">
-                    <div class="title">화재 정보</div>
-                    <div class="info">사망수: {row['사망수']}, 부상자수: {row['부상자수']}</div>
-                    <div class="info">재산피해금액: {row['재산피해금액']}만원</div>
-                    <div class="info">출동소요시간: {row['출동소요시간']}초</div>
-                    <div class="info">화재진압시간: {row['화재진압시간']}초</div>
-                    <div class="info">위치: {row['시군구명']}, {row['읍면동명']}</div>
-                    <div class="info">계절: {row['계절']}, 시간대: {row['시간대']}</div>
-                    <div class="info">화재발생일시: {row['화재발생일시']}</div>
-                </div>
-            </body>
-        </html>
-        '''
+# tile_url: start_tile_server() 결과, None 이면 (원격 배포에서 타일 서버에 접근할 수 없으면) 격자를 GeoJson 으로 포함
+def visualize_coverage(coverage, tile_url):
+    map_cov = folium.Map(location=[37.564, 126.997], zoom_start=11, tiles='OpenStreetMap')
+
+    if tile_url is not None:
+        folium.TileLayer(
+            tiles=tile_url.replace('{layer}', 'golden_time'),
+            attr='골든타임 커버리지 500m 격자',
+            name='골든타임 커버리지',
+            overlay=True,
+            min_zoom=TILE_ZOOMS[0],
+            max_zoom=TILE_ZOOMS[-1],
+            max_native_zoom=TILE_ZOOMS[-1],
+        ).add_to(map_cov)
+    else:
+        folium.GeoJson(
+            coverage[['geometry', '골든타임_구분', '예상_도착시간']].astype({'골든타임_구분': str}).round({'예상_도착시간': 1}),
+            style_function=lambda feature: {
+                'fillColor': coverage_color(feature['properties']['골든타임_구분']),
+                'color': 'black',
+                'weight': 0.1,
+                'fillOpacity': 0.6,
+            },
+            tooltip=folium.GeoJsonTooltip(fields=['골든타임_구분', '예상_도착시간'], aliases=['구분', '예상 도착시간(분)']),
+        ).add_to(map_cov)
+
+    legend_items = ''.join(
+        f'<i style="background:{color}; width: 12px; height: 12px; display: inline-block;"></i> {label}<br>'
+        for _, label, color in COVERAGE_CLASSES
+    )
+    legend_html = f'''
+    <div style="position: fixed; top: 10px; right: 10px; width: 130px;
+         background-color: white; border:2px solid rgba(0,0,0,0.2);
+         z-index:9999; font-size:11px; border-radius: 8px; padding: 8px;">
+         <b>예상 도착시간</b><br>{legend_items}
+    </div>
+    '''
+    map_cov.get_root().html.add_child(folium.Element(legend_html))
+    return map_cov
 
-    def get_color(season):
-        if season == '봄':
-            return 'green'
-        elif season == '여름':
-            return 'red'
-        elif season == '가을':
-            return 'orange'
-        elif season == '겨울':
-            return 'blue'
-        else:
-            return 'gray'  
-
-    for idx, row in df_filtered.iterrows():
-        color = get_color(row['계절'])
-        tooltip_text = f'출동소요시간: {row["출동소요시간"]}초'
-        popup_html = create_popup_html(row)
-        popup = folium.Popup(popup_html, max_width=300)
+# 골든타임 초과 화재 밀도 지도: 계절/시간대/가중치별로 캐시된 밀도 이미지를 겹쳐 표시 (화재별 마커를 그리지 않음)
+def fire_density_map(season, period, weight, key='incident_density'):
+    image, bounds, vmax, count = density_overlay(season, period, weight)
+    map_density = folium.Map(location=[37.5665, 126.9780], zoom_start=11)
+    folium.raster_layers.ImageOverlay(image, bounds=bounds, name='화재 밀도', interactive=False).add_to(map_density)
+    legend = DENSITY_COLORMAP.scale(0, vmax)
+    legend.caption = f'{weight} 밀도 (격자 {CELL_M}m, 커널 폭 {BANDWIDTH_M}m)'
+    legend.add_to(map_density)
+    state = st_folium(map_density, key=key, returned_objects=['last_clicked', 'zoom'], height=440, use_container_width=True)
+    return state, count
 
+
+# 골든타임 초과 화재 지점 지도: 필터한 건수가 적을 때만 계절별 색상 마커로 표시
+def fire_incidents_map(season, period):
+    rows = query_incidents(golden_only=True, season=season, period=period).dropna(subset=['위도', '경도'])
+    map_points = folium.Map(location=[37.5665, 126.9780], zoom_start=11)
+    for row in rows.itertuples(index=False):
+        color = SEASON_COLORS.get(row.계절, 'gray')
+        popup_html = f'''
+        <div style="font-family: Arial, sans-serif; font-size: 12px; color: #333333;">
+            <div style="font-weight: bold; color: #0078A8; margin-bottom: 5px;">화재 정보</div>
+            <div>사망수: {row.사망수}, 부상자수: {row.부상자수}</div>
+            <div>재산피해금액: {row.재산피해금액}만원</div>
+            <div>출동소요시간: {row.출동소요시간}초</div>
+            <div>화재진압시간: {row.화재진압시간}초</div>
+            <div>위치: {row.시군구명}, {row.읍면동명}</div>
+            <div>계절: {row.계절}, 시간대: {row.시간대}</div>
+            <div>화재발생일시: {row.화재발생일시}</div>
+        </div>
+        '''
         folium.CircleMarker(
-            [row['위도'], row['경도']],
+            [row.위도, row.경도],
             radius=5,
             color=color,
             fill=True,
             fill_color=color,
             fill_opacity=0.7,
-            tooltip=tooltip_text,
-            popup=popup
-        ).add_to(map_seoul)
+            tooltip=f'출동소요시간: {row.출동소요시간}초',
+            popup=folium.Popup(popup_html, max_width=300),
+        ).add_to(map_points)
+    return map_points
+
+
+# 충분히 확대한 지도에서 누른 지점 주변의 화재 기록만 불러와서 표시
+def show_incident_details(state, season, period):
+    state = state or {}
+    clicked = state.get('last_clicked')
+    if (state.get('zoom') or 0) < DETAIL_ZOOM or not clicked:
+        st.caption(f'지도를 {DETAIL_ZOOM}단계 이상 확대한 뒤 지점을 누르면 반경 {DETAIL_RADIUS_M}m 안의 화재 기록을 불러옵니다.')
+        return
+    rows = incidents_near(clicked['lat'], clicked['lng'], season, period)
+    if rows.empty:
+        st.caption(f'누른 지점 반경 {DETAIL_RADIUS_M}m 안에 골든타임 초과 화재 기록이 없습니다.')
+        return
+    st.dataframe(rows[['화재발생일시', '시군구명', '읍면동명', '출동소요시간', '화재진압시간', '사망수', '부상자수', '재산피해금액', '거리']],
+                 hide_index=True, use_container_width=True,
+                 column_config={'출동소요시간': st.column_config.NumberColumn(format='%d초'),
+                                '화재진압시간': st.column_config.NumberColumn(format='%d초'),
+                                '재산피해금액': st.column_config.NumberColumn(format='%d만원'),
+                                '거리': st.column_config.NumberColumn(format='%.0fm')})
+
+
+# 출동 기록 집계로 만든 계절/시간대별 건수와 시각별 평균 출동소요시간
+def visualize_incident_stats(aggregates):
+    gu_options = ['서울시'] + sorted(aggregates['시군구명'].astype(str).unique())
+    selected_gu = st.selectbox('자치구 선택', gu_options, index=0, key='incident_stats_gu')
+    gu = None if selected_gu == '서울시' else selected_gu
+    years = f"{aggregates['연도'].min()}~{aggregates['연도'].max()}년"
 
-    folium_static(map_seoul, width=800)
+    col_season, col_hour = st.columns(2)
+    with col_season:
+        summary = incident_summary(aggregates, ['계절', '시간대'], gu)
+        fig = px.bar(summary, x='계절', y='건수', color='시간대', barmode='group', hover_data=['골든타임초과_비율'],
+                     category_orders={'계절': ['봄', '여름', '가을', '겨울']}, title=f'{selected_gu} 계절·시간대별 출동 건수 ({years})')
+        st.plotly_chart(fig, use_container_width=True)
+    with col_hour:
+        summary = incident_summary(aggregates, ['시'], gu)
+        fig = px.line(summary, x='시', y='평균_출동소요시간', markers=True, title=f'{selected_gu} 시각별 평균 출동소요시간 (초)')
+        fig.add_hline(y=GOLDEN_TIME_SEC, line_dash='dash', line_color='red', annotation_text='골든타임')
+        st.plotly_chart(fig, use_container_width=True)
+
+# 육각 격자 지도: 지표(분모를 고르면 두 지표의 비율)를 셀 키로 결합해서 색상으로 표시, 값이 없는 셀은 그리지 않음
+def visualize_hex_layer(resolution, measure, per=None):
+    measures = {measure: HEX_MEASURES[measure]}
+    if per is not None:
+        measures[per] = HEX_MEASURES[per]
+    joined = join_hex(resolution, measures)
+    if per is None:
+        values = joined[measure]
+    else:
+        values = joined.loc[joined[per] > 0, measure] / joined.loc[joined[per] > 0, per]
+    values = values[values > 0]
+
+    map_hex = folium.Map(location=[37.5665, 126.9780], zoom_start=HEX_BASE_ZOOM + resolution)
+    if values.empty:
+        return map_hex
+    colormap = cm.linear.YlOrRd_09.scale(0, float(values.quantile(0.99)))
+    colormap.caption = measure if per is None else f'{per} 1개당 {measure}'
+    cells = gpd.GeoDataFrame({'값': values.round(2).to_numpy()}, geometry=hex_polygons(values.index.to_numpy()), crs='EPSG:4326')
+    folium.GeoJson(
+        cells,
+        style_function=lambda feature: {
+            'fillColor': colormap(min(feature['properties']['값'], colormap.vmax)),
+            'color': '#555555',
+            'weight': 0.3,
+            'fillOpacity': 0.7,
+        },
+        tooltip=folium.GeoJsonTooltip(fields=['값'], aliases=[colormap.caption]),
+    ).add_to(map_hex)
+    colormap.add_to(map_hex)
+    return map_hex
 
 
 # 메인
@@ -183,45 +344,59 @@ def main():
     with col1:
         with st.container(border=True, height=750):
             st.markdown('<h4>서울시 소방 인프라 위치 시각화</h4>', unsafe_allow_html=True) 
-            tab1, tab2, tab3 = st.tabs(["소방서 및 안전센터", "비상 소화장치", "소방용수"])
+            tab1, tab2, tab3, tab4 = st.tabs(["소방서 및 안전센터", "비상 소화장치", "소방용수", "골든타임 커버리지"])
 
             with tab1:
-                gu_options = ['서울시'] + sorted(df['구'].unique().tolist())
+                gu_options = ['서울시'] + station_index.gu_options()
                 col_gu, col_dong = st.columns(2)
                 with col_gu:
                     selected_gu = st.selectbox('자치구 선택', gu_options, index=0)
 
                 if selected_gu == '서울시':
-                    filtered_df = df
+                    filtered_df = station_index.select()
                 else:
                     with col_dong:
-                        dong_options = [f'{selected_gu} 전체'] + sorted(df[df['구'] == selected_gu]['동'].unique().tolist())
+                        dong_options = [f'{selected_gu} 전체'] + station_index.dong_options(selected_gu)
                         selected_dong = st.selectbox('동 선택', dong_options, index=0)
                         if selected_dong == f'{selected_gu} 전체':
-                            filtered_df = df[df['구'] == selected_gu]
+                            filtered_df = station_index.select(selected_gu)
                         else:
-                            filtered_df = df[(df['구'] == selected_gu) & (df['동'] == selected_dong)]
+                            filtered_df = station_index.select(selected_gu, selected_dong)
 
-                create_folium_map(filtered_df)
+                if selected_gu == '서울시':
+                    # 서울시 전체는 현재 줌과 화면 범위의 클러스터만 그림
+                    folium_cluster_map(load_cluster_index('stations'), lambda m, i: add_station_marker(m, filtered_df.iloc[i]),
+                                       key='station_clusters')
+                else:
+                    show_cached_map('stations', dataset_version(STATION_PATH), {'구': selected_gu, '동': selected_dong},
+                                    lambda: create_folium_map(filtered_df))
 
             with tab2:
-                sig_options = ['서울시'] + sorted(_gdf['구'].unique().tolist())
+                sig_options = ['서울시'] + device_index.gu_options()
                 col1_sig, col2_emd = st.columns([1,1])
                 with col1_sig:
                     selected_sig = st.selectbox('자치구 선택:', sig_options, index=0)
 
                 if selected_sig == '서울시':
-                    filtered_gdf = _gdf
+                    filtered_gdf = device_index.select()
                 else:
                     with col2_emd:
-                        emd_options = [f'{selected_sig} 전체'] + sorted(_gdf[_gdf['구'] == selected_sig]['동'].unique().tolist())
+                        emd_options = [f'{selected_sig} 전체'] + device_index.dong_options(selected_sig)
                         selected_emd = st.selectbox('동 선택:', emd_options, index=0)
                     if selected_emd == f'{selected_sig} 전체':
-                        filtered_gdf = _gdf[_gdf['구'] == selected_sig]
+                        filtered_gdf = device_index.select(selected_sig)
                     else:
-                        filtered_gdf = _gdf[(_gdf['구'] == selected_sig) & (_gdf['동'] == selected_emd)]
+                        filtered_gdf = device_index.select(selected_sig, selected_emd)
 
-                folium_map_with_clusters(filtered_gdf)
+                viewport_mode = st.toggle('현재 화면 범위만 불러오기', help='지도를 이동하거나 확대할 때 화면 안의 비상소화장치만 다시 불러옵니다.')
+                if viewport_mode:
+                    selected_emd = selected_emd if selected_sig != '서울시' else '전체'
+                    zoom_start = 11 if selected_sig == '서울시' else (13 if selected_emd.endswith('전체') else 15)
+                    index = viewport_index(filtered_gdf, dataset_version(DEVICE_PATH), selected_sig, selected_emd)
+                    folium_map_viewport(index, key=f'device_viewport_{selected_sig}_{selected_emd}', zoom_start=zoom_start)
+                else:
+                    show_cached_map('devices', dataset_version(DEVICE_PATH), {'구': selected_sig, '동': selected_emd if selected_sig != '서울시' else None},
+                                    lambda: build_cluster_map(filtered_gdf))
 
             with tab3:
                 with st.popover("💡 **시각화 기준 설명**"):
@@ -230,7 +405,21 @@ def main():
                     - **소화용수 접근성**: 서울시 내 대부분의 지역에서는 500미터 이내에 최소 한 개 이상의 소화용수 점이 위치하고 있어, 접근성이 높습니다.
                     - **높은 소방용수 밀집 지역**: 일부 지역에서는 소방용수 점의 수가 100개를 넘는 경우도 있으며, 이는 해당 지역의 소방 안전 인프라가 잘 갖추어져 있음을 나타냅니다.
                     """)
-                visualize_fire_water(grid, column_name='소방용수_수')
+                show_cached_map('fire_water', dataset_version(GRID_PATH), {'layer': '소방용수_수', 'tile_url': start_tile_server()},
+                                lambda: visualize_fire_water(grid, column_name='소방용수_수'))
+
+            with tab4:
+                coverage = load_grid_coverage()
+                with st.popover("💡 **시각화 기준 설명**"):
+                    st.markdown(f"""
+                    - **예상 도착시간**: 각 500m 격자의 중심에서 가장 가까운 119안전센터 또는 소방서까지의 직선거리에 도로 우회 계수({DETOUR_FACTOR})를 곱하고, 평균 주행 속도({TRAVEL_SPEED_KMH:.0f}km/h)와 출동 준비 시간({TURNOUT_MIN:.0f}분)을 반영한 값입니다.
+                    - **골든타임 {GOLDEN_TIME_MIN}분**: 빨간색 격자는 예상 도착시간이 골든타임을 넘는 지역입니다.
+                    - 서울시 격자의 **{coverage['골든타임_이내'].mean():.1%}** 가 골든타임 안에 도착 가능한 지역입니다.
+                    """)
+                # 캐시 키와 지도가 같은 타일 사용 여부를 쓰도록 한 번만 확인
+                tile_url = start_tile_server()
+                show_cached_map('golden_time', dataset_version(GRID_PATH, STATION_PATH), {'params': COVERAGE_PARAMS, 'tile_url': tile_url},
+                                lambda: visualize_coverage(coverage, tile_url))
     
     with col2:
         with st.container(border=True, height=750):
@@ -253,9 +442,60 @@ def main():
         with col1:
             with st.popover("⏰ **골든타임**", use_container_width=True):
                 st.markdown('소방차 골든타임은 **7분**입니다. 골든타임 내에 소방대원이 도착하여 화재를 진압할 수 있다면, 인명 및 재산 피해를 최소화할 수 있습니다.')
-            display_season_colors()
+            mode = st.radio('표시 방식', ['밀도', '지점'], horizontal=True, key='incident_mode')
+            season = st.radio('계절', ['전체', '봄', '여름', '가을', '겨울'], horizontal=True, key='density_season')
+            period = st.radio('시간대', ['전체', '낮', '밤'], horizontal=True, key='density_period')
+            weight = st.selectbox('밀도 가중치', list(DENSITY_WEIGHTS), key='density_weight', disabled=mode == '지점')
+            season = None if season == '전체' else season
+            period = None if period == '전체' else period
+            if mode == '지점':
+                display_season_colors()
         with col2:
-            fire_incidents_map(time)
+            map_tab, stats_tab = st.tabs(['골든타임 초과 화재 지도', '계절·시간대별 통계'])
+            # 출동 기록 집계 (화재출동 원본 저장소가 있으면 저장소 집계, 없으면 골든타임 초과 데이터 집계)
+            aggregates = load_incident_aggregates()
+            years = f'{aggregates["연도"].min()}~{aggregates["연도"].max()}년'
+            # 필터한 골든타임 초과 건수는 집계로 확인 (원본 행은 지점 지도를 새로 그릴 때만 읽음)
+            selected = aggregates
+            if season is not None:
+                selected = selected[selected['계절'] == season]
+            if period is not None:
+                selected = selected[selected['시간대'] == period]
+            point_count = int(selected['골든타임초과'].sum())
+            with map_tab:
+                if mode == '지점' and point_count <= INCIDENT_POINT_LIMIT:
+                    show_cached_map('incidents', incident_store_version(), {'season': season, 'period': period},
+                                    lambda: fire_incidents_map(season, period), width=None, height=440)
+                    st.caption(f'골든타임 초과 화재 {point_count:,}건 ({years})')
+                else:
+                    if mode == '지점':
+                        st.caption(f'골든타임 초과 화재가 {point_count:,}건으로 {INCIDENT_POINT_LIMIT:,}건을 넘어 밀도로 표시합니다. '
+                                   '계절이나 시간대를 골라 범위를 좁히면 지점으로 볼 수 있습니다.')
+                    # 전체 기간의 골든타임 초과 화재를 밀도로 표시하고, 개별 기록은 확대 후 누른 지점 주변만 읽음
+                    state, count = fire_density_map(season, period, weight)
+                    st.caption(f'골든타임 초과 화재 {count:,}건 ({years})')
+                    show_incident_details(state, season, period)
+            with stats_tab:
+                visualize_incident_stats(aggregates)
+
+    with st.container(border=True):
+        st.markdown('<h4>육각 격자 비교: 소방시설, 비상소화장치, 화재출동, 소방용수</h4>', unsafe_allow_html=True)
+        col1, col2 = st.columns([2, 8])
+        with col1:
+            measure = st.selectbox('지표', list(HEX_MEASURES), index=2, key='hex_measure')
+            per = st.selectbox('분모 (선택)', ['없음'] + [name for name in HEX_MEASURES if name != measure], key='hex_per')
+            per = None if per == '없음' else per
+            sizes = [f'{size / 1000:g}km' for size in HEX_SIZES_M]
+            size = st.select_slider('육각형 크기', options=sizes, value=sizes[2], key='hex_size')
+            st.caption('모든 데이터셋이 같은 육각 셀 키를 사용하므로, 분모를 고르면 셀마다 두 지표의 비율을 계산합니다.')
+        with col2:
+            resolution = sizes.index(size)
+            datasets = sorted({HEX_MEASURES[name][0] for name in (measure, per) if name is not None})
+            version = '|'.join(hex_source_version(dataset) for dataset in datasets)
+            show_cached_map('hex', version, {'measure': measure, 'per': per, 'resolution': resolution},
+                            lambda: visualize_hex_layer(resolution, measure, per), width=None, height=500)
+
+    show_map_cache_stats()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
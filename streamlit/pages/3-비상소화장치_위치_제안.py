@@ -6,28 +6,33 @@ import plotly.express as px
 from plotly.subplots import make_subplots
 import folium
 from streamlit_folium import folium_static
-import streamlit.components.v1 as components
 from utils.ui_helpers import setup_sidebar_links, create_html_button, show_location_info
-from utils.data_loader import load_data, get_locations_data
+from utils.data_loader import load_data, load_geodata, get_locations_data
+from utils.nearest import nearest_distances
+from utils.map_cache import show_cached_map, show_map_cache_stats, dataset_version
+from utils.artifacts import pin_artifact_versions
+from utils.site_scoring import score_district, missing_dong_features, DEVICE_PATH, HOUSING_PATH
+from utils.group_index import load_group_index
+from utils.placement import plan_district, SERVICE_RADIUS_KM, DEMAND_WEIGHTS
+from utils.geo_lod import BOUNDARY_PATH
 
 
 # 페이지 설정
 st.set_page_config(layout="wide", initial_sidebar_state="expanded", page_icon='🧯')
+pin_artifact_versions()
 setup_sidebar_links()
 
 
 # 데이터 로드드
-data = load_data("data/(송파소방서)비상소화장치.xlsx")
+EQUIP_PATH = "data/(송파소방서)비상소화장치.xlsx"
+# 자동 산출 모드에서 지도에 표시할 상위 후보지 수
+CANDIDATE_TOP_N = 30
+
+data = load_data(EQUIP_PATH)
 df = load_data("data/2020-2022_송파구_동별_화재건수.csv", encoding='CP949')
 df_P = load_data("data/2022-2023_송파구_인구.csv", encoding='CP949')
 df_O = load_data("data/2021-2023_송파구_고령자현황.csv", encoding='CP949')
-df_H = load_data("data/2020_송파구_주택.csv", encoding='CP949')
-
-df = df.replace('-', 0)
-df['화재건수'] = df['화재건수'].astype(int)
-
-df_H = df_H.replace('X', 0)
-df_H = df_H.astype({'단독주택': int, '연립주택': int, '다세대주택': int, '비거주용건물내주택': int})
+df_H = load_data(HOUSING_PATH, encoding='CP949')
 
 
 # 시각화 함수
@@ -102,8 +107,7 @@ def elderly_population_ratio(df, selected_year):
     fig.update_layout(height=600)
     st.plotly_chart(fig, use_container_width=True)
 
-def housing_type_distribution(df, selected_dong):
-    df_dong = df[df['동'] == selected_dong]
+def housing_type_distribution(df_dong, selected_dong):
     df_dong = df_dong.drop(columns=['소계'])
     df_melted = df_dong.melt(id_vars=['시점', '동'], var_name='주택 유형', value_name='수량')
     fig = make_subplots(rows=1, cols=2, specs=[[{"type": "bar"}, {"type": "pie"}]], subplot_titles=("막대 그래프", "파이 차트"))
@@ -117,7 +121,7 @@ def housing_type_distribution(df, selected_dong):
     st.plotly_chart(fig, use_container_width=True)
 
 @st.cache_data
-def fire_extinguisher_map(center, locations, zoom_start=13):
+def fire_extinguisher_map(center, locations, distances, zoom_start=13):
     m = folium.Map(location=center, zoom_start=zoom_start)
     color_mapping = {1: "red", 2: "orange", 3: "green", 4: "blue"}
     for idx, (lat, lon, label, image_path, priority) in enumerate(locations):
@@ -125,14 +129,53 @@ def fire_extinguisher_map(center, locations, zoom_start=13):
         icon = folium.DivIcon(html=icon_html)
         marker_color = color_mapping.get(priority, "gray")
         folium.Marker([lat, lon], icon=icon).add_to(m)
+        nearest = distances.iloc[idx]
+        distance_html = (f"소방시설 {nearest['가장_가까운_소방시설_거리']:.2f}km · "
+                         f"비상소화장치 {nearest['가장_가까운_비상소화장치_거리']:.2f}km · "
+                         f"화재 {nearest['가장_가까운_화재_거리']:.2f}km")
         folium.Marker(
             location=[lat, lon],
-            popup=f'<b>{idx+1}. {label}</b></b><br>{lat},{lon}</b><br><img src="{image_path}" width="150" height="100">',
+            popup=folium.Popup(f'<b>{idx+1}. {label}</b></b><br>{lat},{lon}</b><br>{distance_html}<br><img src="{image_path}" width="150" height="100">', max_width=250),
             icon=folium.Icon(color=marker_color, icon="info-sign"),
         ).add_to(m)
     folium_static(m)
 
-@st.cache_data
+# 격자 후보지 점수 지도: 우선순위 색상은 제안 위치 지도와 같음
+def candidate_sites_map(scored, top_n=None):
+    sites = scored if top_n is None else scored.head(top_n)
+    m = folium.Map(location=[sites['위도'].mean(), sites['경도'].mean()], zoom_start=13)
+    color_mapping = {1: "red", 2: "orange", 3: "green", 4: "blue"}
+    for rank, row in enumerate(sites.itertuples(index=False), start=1):
+        color = color_mapping.get(row.우선순위, "gray")
+        popup_html = (f"<b>{rank}위 후보지 ({row.동})</b><br>점수 {row.점수:.2f} · {row.우선순위}순위<br>"
+                      f"소방시설 {row.가장_가까운_소방시설_거리:.2f}km · 비상소화장치 {row.가장_가까운_비상소화장치_거리:.2f}km")
+        folium.CircleMarker(
+            location=[row.위도, row.경도],
+            radius=7,
+            color=color,
+            fill=True,
+            fill_color=color,
+            fill_opacity=0.7,
+            popup=folium.Popup(popup_html, max_width=250),
+            tooltip=f"{rank}위 · {row.우선순위}순위",
+        ).add_to(m)
+    return m
+
+# 최대 커버리지 배치 지도: 새 위치(선택 순서 번호, 서비스 반경)와 기존 비상소화장치
+def placement_map(plan, gu):
+    devices = load_group_index(DEVICE_PATH, geo=True).select(gu)
+    m = folium.Map(location=[plan['위도'].mean(), plan['경도'].mean()], zoom_start=13)
+    for lat, lon in zip(devices.geometry.y, devices.geometry.x):
+        folium.CircleMarker(location=[lat, lon], radius=3, color='gray', fill=True, fill_opacity=0.6, tooltip='기존 비상소화장치').add_to(m)
+    for row in plan.itertuples(index=False):
+        folium.Circle(location=[row.위도, row.경도], radius=SERVICE_RADIUS_KM * 1000, color='red', weight=1, fill=True, fill_opacity=0.15).add_to(m)
+        folium.Marker(
+            location=[row.위도, row.경도],
+            icon=folium.DivIcon(html=f'<div style="font-family: Arial; font-size: 12px; color: red;"><b>{row.순번}</b></div>'),
+            tooltip=f"{row.순번}. {row.동} · 누적 커버리지 {row.누적_커버리지:.1%} (+{row.추가_커버리지:.1%})",
+        ).add_to(m)
+    return m
+
 def fire_equip_map(fire_equip):
     map_songpa = folium.Map(location=[37.514543, 127.106597], zoom_start=13)
     colors = {
@@ -176,10 +219,7 @@ def fire_equip_map(fire_equip):
     </div>
     '''
     map_songpa.get_root().html.add_child(folium.Element(legend_html))
-    map_songpa.save('map_with_legend.html')
-    with open('map_with_legend.html', 'r', encoding='utf-8') as f:
-        map_html = f.read()
-    components.html(map_html, height=600)
+    return map_songpa
 
 
 # 메인    
@@ -224,9 +264,38 @@ def main():
                         """, unsafe_allow_html=True)
 
 
-            center = [37.514543, 127.106597]
-            locations = get_locations_data()
-            fire_extinguisher_map(center, locations)
+            col5, col6, col7 = st.columns([5, 2, 1])
+            with col5:
+                mode = st.radio("제안 방식", ("현장 검토 제안 위치", "격자 후보지 자동 산출", "최대 커버리지 배치"), horizontal=True, label_visibility="collapsed")
+
+            if mode == "현장 검토 제안 위치":
+                center = [37.514543, 127.106597]
+                locations = get_locations_data()
+                # 각 제안 위치에서 가장 가까운 소방시설, 비상소화장치, 화재 지점까지의 거리
+                distances = nearest_distances([loc[0] for loc in locations], [loc[1] for loc in locations])
+                fire_extinguisher_map(center, locations, distances)
+            else:
+                with col6:
+                    gu_options = sorted(load_geodata(BOUNDARY_PATH)['구'].tolist())
+                    selected_gu = st.selectbox("자치구 선택", gu_options, index=gu_options.index('송파구'), label_visibility="collapsed")
+                # 동별 인구/주택 통계가 없는 구는 해당 특성을 빼고 계산하므로 기준이 달라짐을 알림
+                missing = missing_dong_features(selected_gu)
+                if mode == "격자 후보지 자동 산출":
+                    if missing:
+                        st.warning(f"{selected_gu}: 동별 {', '.join(missing)} 통계가 없어 이 특성을 빼고 우선순위를 계산했습니다. "
+                                   "통계가 있는 송파구와 우선순위 기준이 다릅니다.")
+                    # 구 안의 모든 500m 격자 셀을 후보지로 점수화하고 상위 후보지를 우선순위 색상으로 표시
+                    show_cached_map('candidate_sites', dataset_version('site.scores'), {'구': selected_gu, 'top_n': CANDIDATE_TOP_N},
+                                    lambda: candidate_sites_map(score_district(selected_gu), top_n=CANDIDATE_TOP_N))
+                else:
+                    with col7:
+                        k = st.number_input("개수", min_value=1, max_value=50, value=10, label_visibility="collapsed")
+                    missing = [name for name in missing if name in DEMAND_WEIGHTS]
+                    if missing:
+                        st.warning(f"{selected_gu}: 동별 {', '.join(missing)} 통계가 없어 이 수요를 빼고 배치했습니다.")
+                    # 기존 비상소화장치가 덮지 못한 화재, 고령 인구, 주택을 가장 많이 덮는 K 곳
+                    show_cached_map('placement', dataset_version('placement.plan'), {'구': selected_gu, 'k': k, 'radius': SERVICE_RADIUS_KM},
+                                    lambda: placement_map(plan_district(selected_gu, k), selected_gu))
 
     with col2: 
         with st.container(border=True, height=650):  
@@ -404,7 +473,8 @@ def main():
          
         with tab1:     
             st.markdown('**현재 송파구 비상소화장치 위치**')
-            fire_equip_map(data)  
+            # 파일로 저장하지 않고 메모리에서 렌더링한 HTML 을 세션 간 공유 캐시로 제공
+            show_cached_map('songpa_equipment', dataset_version(EQUIP_PATH), {}, lambda: fire_equip_map(data), width=None, height=590)
             
         with tab2: 
             st.markdown('**송파구 화재 건수 분석**')            
@@ -461,8 +531,9 @@ def main():
             
             if select_1 == "동별 주택유형 분포":
 
-                selected_dong = st.selectbox('동 선택', options=sorted(df_H['동'].unique()))
-                housing_type_distribution(df_H, selected_dong)
+                housing_index = load_group_index(HOUSING_PATH, gu_col=None, encoding='CP949')
+                selected_dong = st.selectbox('동 선택', options=housing_index.dong_options())
+                housing_type_distribution(housing_index.select(dong=selected_dong), selected_dong)
 
             else: 
                 df_total = df_H[['동', '소계']]
@@ -476,5 +547,7 @@ def main():
                 fig_total_sorted.update_layout(height=600)
                 st.plotly_chart(fig_total_sorted, use_container_width=True)
 
+    show_map_cache_stats()
+
 if __name__ =="__main__":
     main()
@@ -0,0 +1,264 @@
+# -*- coding:utf-8 -*-
+# 파생 데이터 의존 그래프: 원본 파일 -> 파생 표 -> 렌더링 결과(지도 HTML, 타일)
+# - 원본 파일 버전은 파일 내용 해시 (수정시각만 바뀐 파일은 같은 버전)
+# - 파생 노드 버전은 의존하는 노드/파일 버전의 해시이므로, 원본이 바뀌면 그 아래 노드의 버전만 바뀜
+# - 파생 함수의 캐시 키에 노드 버전을 넣으므로, 버전이 바뀐 노드만 다시 계산됨
+# - 파일 감시 스레드가 변경을 감지하면 버전이 바뀐 노드를 백그라운드에서 미리 계산한 뒤
+#   공개 버전 표를 한 번에 교체하고, 세션은 스크립트 실행마다 공개 버전 표 하나를 고정해서 사용
+import os
+import time
+import inspect
+import hashlib
+import logging
+import functools
+import threading
+from collections import OrderedDict
+import streamlit as st
+
+# 파일 감시 주기 (초)
+WATCH_INTERVAL_SEC = 2.0
+# 노드별로 기억해서 백그라운드에서 다시 계산할 최근 호출 인자 수
+WARM_CALLS = 8
+
+_LOGGER = logging.getLogger(__name__)
+
+
+def file_signature(file_path):
+    try:
+        stat = os.stat(file_path)
+    except FileNotFoundError:
+        return None
+    return (stat.st_size, stat.st_mtime_ns)
+
+
+class ArtifactGraph:
+    def __init__(self):
+        self._deps = {}                 # 노드 -> 의존 노드/파일
+        self._warm = {}                 # 노드 -> 최근 호출 인자 -> 캐시 함수
+        self._cached = {}               # 노드 -> 캐시 함수 (새 버전 공개 시 이전 버전 항목 삭제용)
+        self._hashes = {}               # 파일 -> (시그니처, 내용 해시)
+        self._published = {}            # 세션이 사용하는 버전 표 (통째로 교체)
+        self._building = None           # 백그라운드 재계산 중인 새 버전 표
+        self._local = threading.local()  # 스레드별 고정 버전 표
+        self._lock = threading.RLock()
+        self._watcher = None
+
+    def register(self, name, deps=()):
+        with self._lock:
+            self._deps[name] = tuple(deps)
+
+    def is_source(self, name):
+        return name not in self._deps
+
+    def sources(self):
+        with self._lock:
+            return sorted({dep for deps in self._deps.values() for dep in deps if self.is_source(dep)})
+
+    # 파일 내용 해시 (크기와 수정시각이 그대로면 다시 읽지 않음), 파일이 없으면 'missing'
+    def file_version(self, file_path):
+        signature = file_signature(file_path)
+        if signature is None:
+            return 'missing'
+        with self._lock:
+            cached = self._hashes.get(file_path)
+        if cached is not None and cached[0] == signature:
+            return cached[1]
+        hasher = hashlib.sha1()
+        with open(file_path, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                hasher.update(block)
+        version = hasher.hexdigest()[:16]
+        with self._lock:
+            self._hashes[file_path] = (signature, version)
+        return version
+
+    # 현재 파일 상태로 모든 노드의 버전 계산
+    def live_versions(self):
+        with self._lock:
+            deps = dict(self._deps)
+        versions = {path: self.file_version(path) for path in self.sources()}
+
+        def resolve(name):
+            if name not in versions:
+                parts = [name] + [f'{dep}={resolve(dep)}' for dep in deps[name]]
+                versions[name] = hashlib.sha1('|'.join(parts).encode('utf-8')).hexdigest()[:16]
+            return versions[name]
+
+        for name in deps:
+            resolve(name)
+        return versions
+
+    # 이 스레드가 사용할 버전 표: 백그라운드 재계산 중이면 새 버전, 고정한 표가 있으면 그 표, 아니면 공개된 표
+    def versions(self):
+        pinned = getattr(self._local, 'versions', None)
+        if pinned is not None:
+            return pinned
+        return self.published()
+
+    def published(self):
+        published = self._published
+        with self._lock:
+            registered = set(self._deps) | set(self.sources())
+        if not registered <= set(published):
+            # 처음 쓰이는 노드는 현재 파일 상태로 공개 (이미 공개된 노드의 버전은 그대로 유지)
+            with self._lock:
+                live = self.live_versions()
+                published = {**live, **{name: version for name, version in self._published.items() if name in live}}
+                self._published = published
+        return published
+
+    # 버전 표에 없는 이름의 버전: 파일이면 내용 해시, 아니면 (아직 등록되지 않은 파생 노드) 알려진 모든 원본 파일 버전의 조합
+    # 파생 노드의 의존 관계를 모르므로 어느 원본이 바뀌어도 버전이 바뀌게 함
+    def unknown_version(self, name, versions):
+        if os.path.isfile(name):
+            return self.file_version(name)
+        parts = [name] + [f'{path}={versions[path]}' for path in self.sources() if path in versions]
+        return hashlib.sha1('|'.join(parts).encode('utf-8')).hexdigest()[:16]
+
+    def version(self, *names):
+        versions = self.versions()
+        for name in names:
+            if name not in versions:
+                versions = {**versions, name: self.unknown_version(name, versions)}
+        return hashlib.sha1('|'.join(f'{name}={versions[name]}' for name in names).encode('utf-8')).hexdigest()[:12]
+
+    # 스크립트 실행 시작 시 호출: 실행이 끝날 때까지 같은 버전 표를 사용
+    def pin(self):
+        self._local.versions = None
+        self._local.versions = self.published()
+        return self._local.versions
+
+    # 노드 버전이 최신(재계산 중이면 새 버전, 아니면 공개 버전)인지: 이전 버전 결과는 캐시에 넣지 않음
+    def is_current(self, name, version):
+        latest = self._building if self._building is not None else self._published
+        return latest.get(name, version) == version
+
+    def remember(self, name, cached, args, kwargs):
+        with self._lock:
+            self._cached[name] = cached
+        key = (args, tuple(sorted(kwargs.items())))
+        try:
+            hash(key)
+        except TypeError:
+            return
+        with self._lock:
+            calls = self._warm.setdefault(name, OrderedDict())
+            calls[key] = cached
+            calls.move_to_end(key)
+            while len(calls) > WARM_CALLS:
+                calls.popitem(last=False)
+
+    def depth(self, name):
+        deps = self._deps.get(name, ())
+        return 1 + max((self.depth(dep) for dep in deps), default=0) if deps else 0
+
+    # 버전이 바뀐 노드만 새 버전으로 미리 계산하고 공개 버전 표를 교체, 바뀐 노드 목록 반환
+    # 바뀐 노드의 캐시 항목은 모두 이전 버전이므로 미리 계산하기 전에 비움
+    # 계산 중 오류가 나면 공개 버전 표를 그대로 두어 세션은 이전 버전을 계속 사용
+    def refresh(self):
+        with self._lock:
+            live = self.live_versions()
+            stale = sorted((name for name in self._deps if live[name] != self._published.get(name)), key=self.depth)
+            if not stale and all(self._published.get(path) == live[path] for path in self.sources()):
+                return []
+            warm = {name: list(self._warm.get(name, {}).items()) for name in stale}
+            caches = {id(self._cached[name]): self._cached[name] for name in stale if name in self._cached}
+            self._building = live
+
+        for cached in caches.values():
+            cached.clear()
+        self._local.versions = live
+        try:
+            for name in stale:
+                for (args, kwargs), cached in warm[name]:
+                    cached(live[name], *args, **dict(kwargs))
+        except Exception:
+            _LOGGER.exception('Failed to rebuild stale artifacts; keeping the previous version')
+            return []
+        finally:
+            self._local.versions = None
+            with self._lock:
+                self._building = None
+
+        with self._lock:
+            self._published = live
+        return stale
+
+    # 원본 파일을 주기적으로 확인해서 바뀌면 백그라운드에서 다시 계산 (프로세스당 한 번만 시작)
+    def watch(self, interval=WATCH_INTERVAL_SEC):
+        with self._lock:
+            if self._watcher is not None:
+                return self._watcher
+
+            def loop():
+                signatures = {}
+                while True:
+                    current = {path: file_signature(path) for path in self.sources()}
+                    if signatures and current != signatures:
+                        stale = self.refresh()
+                        if stale:
+                            _LOGGER.info('Rebuilt %d stale artifacts: %s', len(stale), ', '.join(stale))
+                    signatures = current
+                    time.sleep(interval)
+
+            self._watcher = threading.Thread(target=loop, name='artifact-watcher', daemon=True)
+            self._watcher.start()
+            return self._watcher
+
+
+GRAPH = ArtifactGraph()
+
+
+# 파생 노드 데코레이터: st.cache_data(또는 resource=True 면 st.cache_resource) 캐시 키에 노드 버전을 추가
+# deps 는 의존 노드 이름 또는 원본 파일 경로, source_arg 를 지정하면 그 인자(파일 경로)별로 노드를 만듦
+def derived(name, deps=(), source_arg=None, resource=False, **cache_kwargs):
+    def decorate(func):
+        signature = inspect.signature(func)
+
+        def build(version, *args, **kwargs):
+            return func(*args, **kwargs)
+
+        functools.update_wrapper(build, func)
+        build.__signature__ = signature.replace(parameters=[
+            inspect.Parameter('version', inspect.Parameter.POSITIONAL_OR_KEYWORD)] + list(signature.parameters.values()))
+        cached = (st.cache_resource if resource else st.cache_data)(**cache_kwargs)(build)
+        if source_arg is None:
+            GRAPH.register(name, deps)
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            node = name
+            if source_arg is not None:
+                bound = signature.bind(*args, **kwargs)
+                bound.apply_defaults()
+                node = f'{name}:{bound.arguments[source_arg]}'
+                if node not in GRAPH._deps:
+                    GRAPH.register(node, (bound.arguments[source_arg],) + tuple(deps))
+            GRAPH.remember(node, cached, args, kwargs)
+            versions = GRAPH.versions()
+            version = versions[node] if node in versions else GRAPH.published()[node]
+            if not GRAPH.is_current(node, version):
+                # 이전 버전을 고정한 세션은 캐시를 거치지 않고 계산 (지운 이전 버전 항목이 다시 쌓이지 않게)
+                return func(*args, **kwargs)
+            return cached(version, *args, **kwargs)
+
+        wrapper.clear = cached.clear
+        wrapper.node = name
+        return wrapper
+    return decorate
+
+
+# 렌더링 결과(지도 HTML 캐시 키 등)용 버전: 노드 이름이나 원본 파일 경로를 받아 현재 고정된 버전 표로 계산
+def artifact_version(*names):
+    return GRAPH.version(*names)
+
+
+# 페이지 시작 시 호출: 파일 감시 스레드를 시작하고 이번 실행에서 사용할 버전 표를 고정
+def pin_artifact_versions():
+    start_artifact_watcher()
+    return GRAPH.pin()
+
+
+@st.cache_resource
+def start_artifact_watcher():
+    return GRAPH.watch()
@@ -0,0 +1,132 @@
+# -*- coding:utf-8 -*-
+# 평면 좌표(X/Y) 장치 파일 적재: 원본의 평면 좌표 컬럼 전체를 한 번에 WGS84 위도/경도로 변환하고,
+# 자치구 경계와의 공간 조인으로 검증(서울시 밖 좌표, 주소의 구와 다른 좌표, 원본 경위도와의 차이)한 뒤 대시보드가 읽는 좌표 파일로 저장
+# - 변환기(Transformer)는 좌표계 쌍마다 한 번만 만들어 재사용 (행마다 pyproj.transform 을 부르지 않음)
+# - 원본 좌표계를 지정하지 않으면 후보 좌표계 중 서울시 경계 안에 가장 많은 점이 들어가는 좌표계를 사용
+#   (송파소방서 비상소화장치 파일의 좌표X/Y 는 EPSG:5186 이 아니라 EPSG:5181 로 변환해야 경위도좌표와 일치)
+# 사용법 (streamlit 폴더에서 실행): python -m utils.coord_ingest [원본 파일] [출력 파일] [원본 좌표계]
+#   인자가 없으면 송파소방서 비상소화장치 파일을 검증만 하고, 출력 파일을 생략하면 서울시 비상소화장치 좌표 파일에 저장
+import os
+import sys
+import time
+import numpy as np
+import shapely
+import streamlit as st
+from pyproj import Transformer
+from utils.data_loader import GEOMETRY_CRS, read_raw, clean_frame
+from utils.nearest import haversine
+from utils.site_scoring import DEVICE_PATH
+from utils.incident_store import sniff_encoding
+from utils.spatial_join import load_gu_region_index, assign_regions
+
+EQUIP_PATH = "data/(송파소방서)비상소화장치.xlsx"
+# 서울시 비상소화장치 원본의 좌표계 (한국 중부원점, Korea 2000) 와 자동 판별 후보
+SOURCE_CRS = 'EPSG:5186'
+CANDIDATE_CRS = ('EPSG:5186', 'EPSG:5181', 'EPSG:5179', 'EPSG:5174')
+# 평면 좌표 / 원본 경위도 / 주소 컬럼 이름 후보 (앞에 있는 이름 우선)
+X_COLUMNS = ('X좌표', '좌표X')
+Y_COLUMNS = ('Y좌표', '좌표Y')
+REFERENCE_COLUMNS = ('경위도좌표X', '경위도좌표Y')
+ADDRESS_COLUMNS = ('도로명주소', '주소')
+# 원본 경위도와 이 거리(미터) 이상 차이 나면 불일치로 보고
+REFERENCE_TOLERANCE_M = 10
+
+
+# 좌표계 쌍별 변환기 (모든 호출이 공유, always_xy: 입력/출력 모두 (x=경도, y=위도) 순서)
+@st.cache_resource
+def get_transformer(source_crs, target_crs=GEOMETRY_CRS):
+    return Transformer.from_crs(source_crs, target_crs, always_xy=True)
+
+
+# 평면 좌표 배열 전체를 위도, 경도 배열로 변환
+def to_wgs84(x, y, source_crs=SOURCE_CRS):
+    lon, lat = get_transformer(source_crs).transform(np.asarray(x, dtype=float), np.asarray(y, dtype=float))
+    return lat, lon
+
+
+# 후보 좌표계별로 변환해서 서울시 경계 안에 들어가는 점의 비율이 가장 높은 좌표계 선택
+def detect_crs(x, y, candidates=CANDIDATE_CRS, sample=2000):
+    x, y = np.asarray(x, dtype=float), np.asarray(y, dtype=float)
+    if len(x) > sample:
+        rows = np.random.default_rng(0).choice(len(x), sample, replace=False)
+        x, y = x[rows], y[rows]
+    gu_index = load_gu_region_index()
+    shares = {}
+    for crs in candidates:
+        lat, lon = to_wgs84(x, y, crs)
+        shares[crs] = (gu_index.locate(lat, lon) >= 0).mean()
+    return max(shares, key=shares.get), shares
+
+
+def first_column(df, names):
+    return next((name for name in names if name in df.columns), None)
+
+
+# 평면 좌표 컬럼을 위도/경도, 구로 변환하고 검증 결과를 함께 반환
+def normalize_coordinates(df, source_crs=None):
+    x_col, y_col = first_column(df, X_COLUMNS), first_column(df, Y_COLUMNS)
+    if x_col is None or y_col is None:
+        raise ValueError(f"No planar coordinate columns ({'/'.join(X_COLUMNS)}, {'/'.join(Y_COLUMNS)})")
+    df = df.dropna(subset=[x_col, y_col]).reset_index(drop=True)
+    report = {'rows': len(df)}
+    if source_crs is None:
+        source_crs, report['crs_shares'] = detect_crs(df[x_col], df[y_col])
+    report['crs'] = source_crs
+
+    lat, lon = to_wgs84(df[x_col], df[y_col], source_crs)
+    result = df.assign(위도=lat, 경도=lon, 구=load_gu_region_index().assign(lat, lon)['구'].to_numpy())
+    report['outside_seoul'] = int(result['구'].isna().sum())
+
+    address_col = first_column(df, ADDRESS_COLUMNS)
+    if address_col is not None:
+        address_gu = df[address_col].astype(str).str.extract(r'(\S+구)\s', expand=False)
+        report['address_mismatch'] = int((address_gu.notna() & result['구'].notna() & (address_gu != result['구'])).sum())
+
+    lon_col, lat_col = REFERENCE_COLUMNS
+    if lon_col in df.columns and lat_col in df.columns:
+        distance = haversine(lat, lon, df[lat_col].to_numpy(dtype=float), df[lon_col].to_numpy(dtype=float)) * 1000
+        report['reference_max_m'] = float(np.nanmax(distance))
+        report['reference_mismatch'] = int((distance > REFERENCE_TOLERANCE_M).sum())
+    return result, report
+
+
+# 원본 장치 파일을 변환해서 대시보드 좌표 파일 형식(WKT geometry, 구, 동)으로 저장 (서울시 밖 좌표는 제외)
+def ingest_devices(file_path, output_path=DEVICE_PATH, source_crs=None, encoding=None):
+    df = clean_frame(read_raw(file_path, encoding=encoding), file_path)
+    result, report = normalize_coordinates(df, source_crs)
+    result = result[result['구'].notna()].reset_index(drop=True)
+    result['동'] = assign_regions(result['위도'], result['경도'])['동'].to_numpy()
+    result['geometry'] = shapely.to_wkt(shapely.points(result['경도'], result['위도']), rounding_precision=-1)
+
+    tmp_path = f'{output_path}.tmp'
+    result.to_csv(tmp_path, index=False, encoding='utf-8')
+    os.replace(tmp_path, output_path)
+    report['written'] = len(result)
+    return report
+
+
+def print_report(file_path, report):
+    print(f"{file_path}: {report['rows']} rows, source CRS {report['crs']}")
+    if 'crs_shares' in report:
+        print('  share inside Seoul by CRS: ' + ', '.join(f'{crs} {share:.0%}' for crs, share in report['crs_shares'].items()))
+    print(f"  outside Seoul: {report['outside_seoul']}")
+    if 'address_mismatch' in report:
+        print(f"  구 differs from address: {report['address_mismatch']}")
+    if 'reference_max_m' in report:
+        print(f"  vs. source lat/lon: max {report['reference_max_m']:.1f} m, "
+              f"{report['reference_mismatch']} rows over {REFERENCE_TOLERANCE_M} m")
+    if 'written' in report:
+        print(f"  wrote {report['written']} rows")
+
+
+if __name__ == '__main__':
+    start = time.perf_counter()
+    if len(sys.argv) > 1:
+        file_path = sys.argv[1]
+        output_path = sys.argv[2] if len(sys.argv) > 2 else DEVICE_PATH
+        source_crs = sys.argv[3] if len(sys.argv) > 3 else None
+        encoding = sniff_encoding(file_path) if file_path.lower().endswith('.csv') else None
+        print_report(file_path, ingest_devices(file_path, output_path, source_crs, encoding))
+    else:
+        print_report(EQUIP_PATH, normalize_coordinates(clean_frame(read_raw(EQUIP_PATH), EQUIP_PATH))[1])
+    print(f'done in {time.perf_counter() - start:.2f} s')
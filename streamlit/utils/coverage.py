@@ -0,0 +1,74 @@
+# -*- coding:utf-8 -*-
+# 골든타임 커버리지: 500m 격자의 모든 셀에서 가장 가까운 119안전센터, 소방서까지의 직선거리와
+# 예상 도착시간을 한 번에 계산하고 7분 골든타임 기준으로 구분
+import numpy as np
+import pandas as pd
+from utils.data_loader import load_data, load_geodata
+from utils.nearest import NearestIndex
+from utils.artifacts import derived
+
+GRID_PATH = "data/seoul_500_grid_water.csv"
+STATION_PATH = "data/서울시_소방시설_좌표_구동.csv"
+
+# 출동 기준 시설 유형
+STATION_KINDS = ('안전센터', '소방서')
+
+# 소방차 골든타임 (분)
+GOLDEN_TIME_MIN = 7
+# 예상 도착시간 = 출동 준비 시간 + 직선거리 x 도로 우회 계수 / 평균 주행 속도
+TURNOUT_MIN = 1.0
+DETOUR_FACTOR = 1.4
+TRAVEL_SPEED_KMH = 30.0
+# 기준값이 바뀌면 캐시된 지도/타일을 다시 만들도록 버전 키에 포함
+COVERAGE_PARAMS = (GOLDEN_TIME_MIN, TURNOUT_MIN, DETOUR_FACTOR, TRAVEL_SPEED_KMH)
+
+# 예상 도착시간 구간별 (상한, 라벨, 색상)
+COVERAGE_CLASSES = [
+    (5, '5분 이내', '#1A9850'),
+    (GOLDEN_TIME_MIN, f'5~{GOLDEN_TIME_MIN}분', '#FEE08B'),
+    (np.inf, f'{GOLDEN_TIME_MIN}분 초과', '#D73027'),
+]
+
+
+def travel_minutes(distance_km):
+    return TURNOUT_MIN + np.asarray(distance_km) * DETOUR_FACTOR / TRAVEL_SPEED_KMH * 60
+
+
+def coverage_class(minutes):
+    bins = [-np.inf] + [upper for upper, _, _ in COVERAGE_CLASSES]
+    labels = [label for _, label, _ in COVERAGE_CLASSES]
+    return pd.cut(minutes, bins=bins, labels=labels, right=True)
+
+
+def coverage_color(label):
+    return {name: color for _, name, color in COVERAGE_CLASSES}.get(label, '#808080')
+
+
+# 격자 셀 중심(또는 임의의 지점)별 최근접 안전센터/소방서 거리(km)와 예상 도착시간(분), 골든타임 구분
+# stations 에 시설을 추가하거나 빼서 다시 호출하면 바로 재계산됨
+def compute_coverage(lat, lon, stations):
+    result = {}
+    for kind in STATION_KINDS:
+        subset = stations[stations['유형구분명'] == kind]
+        result[f'{kind}_거리'] = NearestIndex(subset['위도'], subset['경도']).nearest_distance(lat, lon)
+    coverage = pd.DataFrame(result)
+    coverage['최근접_거리'] = coverage[[f'{kind}_거리' for kind in STATION_KINDS]].min(axis=1)
+    coverage['예상_도착시간'] = travel_minutes(coverage['최근접_거리'])
+    coverage['골든타임_구분'] = coverage_class(coverage['예상_도착시간'])
+    coverage['골든타임_이내'] = coverage['예상_도착시간'] <= GOLDEN_TIME_MIN
+    return coverage
+
+
+# 격자 셀 중심 좌표 (도 단위 격자이므로 경위도 그대로 중심점 계산)
+def cell_centers(grid):
+    centers = grid.geometry.representative_point()
+    return centers.y.values, centers.x.values
+
+
+# 기본 소방시설 기준 격자 커버리지 (모든 세션이 공유하므로 수정하지 않아야 함)
+@derived('coverage.grid', deps=(GRID_PATH, STATION_PATH), resource=True)
+def load_grid_coverage():
+    grid = load_geodata(GRID_PATH, encoding='euc-kr')
+    lat, lon = cell_centers(grid)
+    coverage = compute_coverage(lat, lon, load_data(STATION_PATH))
+    return grid[['id', 'geometry']].join(coverage.set_index(grid.index))
@@ -0,0 +1,91 @@
+# -*- coding:utf-8 -*-
+# 데이터 번들 생성: data/ 아래의 원본 CSV/XLSX 파일을 정제된 컬럼형(Feather) 파일로,
+# 도형이 있는 데이터는 GeoParquet 파일로 변환
+# 사용법 (streamlit 폴더에서 실행): python -m utils.data_bundle
+import os
+import json
+import pyarrow.feather as feather
+import geopandas as gpd
+from utils.data_loader import (BUNDLE_DIR, MANIFEST_PATH, read_raw, clean_frame,
+                               source_signature, to_geodataframe)
+from utils.geo_lod import BOUNDARY_PATH, write_boundary_lod
+
+DATA_DIR = 'data'
+SOURCE_TYPES = ('csv', 'xlsx', 'xls')
+CANDIDATE_ENCODINGS = ('utf-8', 'cp949')
+# WKT 컬럼 외에 GeoParquet 으로 변환할 공간 파일
+GEO_SOURCES = ('data/boundary/boundary.geojson',)
+
+
+# 빌드 시점에 한 번만 인코딩을 판별
+def detect_encoding(file_path):
+    for encoding in CANDIDATE_ENCODINGS:
+        try:
+            with open(file_path, 'r', encoding=encoding) as f:
+                f.read()
+            return encoding
+        except UnicodeDecodeError:
+            continue
+    raise ValueError(f"Unknown encoding: {file_path}")
+
+
+def list_sources(data_dir=DATA_DIR):
+    sources = []
+    for name in sorted(os.listdir(data_dir)):
+        path = f'{data_dir}/{name}'
+        if os.path.isfile(path) and name.split('.')[-1].lower() in SOURCE_TYPES:
+            sources.append(path)
+    return sources
+
+
+# 도형을 WKB 로 인코딩하고 좌표계를 함께 기록하는 GeoParquet 저장
+def write_geo_bundle(gdf, file_path, bundle_dir):
+    bundle_name = os.path.splitext(os.path.basename(file_path))[0] + '.geo.parquet'
+    gdf.to_parquet(os.path.join(bundle_dir, bundle_name))
+    print(f'{file_path} -> {bundle_name} ({len(gdf)} features, {gdf.crs})')
+    return bundle_name
+
+
+def build_bundle(data_dir=DATA_DIR, bundle_dir=BUNDLE_DIR):
+    os.makedirs(bundle_dir, exist_ok=True)
+    manifest = {}
+    for file_path in list_sources(data_dir):
+        encoding = detect_encoding(file_path) if file_path.endswith('.csv') else None
+        df = clean_frame(read_raw(file_path, encoding=encoding), file_path)
+
+        bundle_name = os.path.splitext(os.path.basename(file_path))[0] + '.feather'
+        # 메모리 매핑으로 바로 읽을 수 있도록 압축하지 않고 저장
+        feather.write_feather(df.reset_index(drop=True), os.path.join(bundle_dir, bundle_name),
+                              compression='uncompressed')
+        manifest[file_path] = {
+            'bundle': bundle_name,
+            'source': source_signature(file_path),
+            'encoding': encoding,
+            'rows': len(df),
+        }
+        print(f'{file_path} -> {bundle_name} ({len(df)} rows)')
+
+        # WKT 도형 컬럼이 있으면 빌드 시점에 한 번만 파싱해서 GeoParquet 으로 저장
+        if 'geometry' in df.columns:
+            manifest[file_path]['geo_bundle'] = write_geo_bundle(to_geodataframe(df), file_path, bundle_dir)
+
+    for file_path in GEO_SOURCES:
+        gdf = to_geodataframe(gpd.read_file(file_path))
+        manifest[file_path] = {
+            'geo_bundle': write_geo_bundle(gdf, file_path, bundle_dir),
+            'source': source_signature(file_path),
+        }
+        # 지도 줌 레벨별 단순화 경계
+        if file_path == BOUNDARY_PATH:
+            manifest[file_path]['lod'] = write_boundary_lod(gdf, bundle_dir)
+
+    manifest_path = os.path.join(bundle_dir, os.path.basename(MANIFEST_PATH))
+    tmp_path = manifest_path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, manifest_path)
+    return manifest
+
+
+if __name__ == '__main__':
+    build_bundle()
@@ -1,14 +1,39 @@
-import streamlit as st
-import pandas as pd
-import geopandas as gpd
-
+import os
+import json
 import pandas as pd
 import geopandas as gpd
 import streamlit as st
+import pyarrow.feather as feather
+from utils.artifacts import derived
+
+# 전처리된 컬럼형 번들 경로 (python -m utils.data_bundle 로 생성)
+BUNDLE_DIR = 'data/bundle'
+MANIFEST_PATH = os.path.join(BUNDLE_DIR, 'manifest.json')
+
+# 공간 데이터의 기본 좌표계 (WGS84)
+GEOMETRY_CRS = 'EPSG:4326'
+
+# 장소 유형 큐브의 서울시 합계 행 이름
+SEOUL_TOTAL = '서울시 전체'
+
+# 카테고리형으로 저장할 지역/구분 컬럼
+CATEGORY_COLUMNS = ['구', '동', '자치구', '시군구명', '읍면동명', '계절', '시간대']
+
+# 파일별 정제 규칙: 결측 표기('-', 'X')를 0으로 바꾸고 정수형으로 변환
+CLEANING_RULES = {
+    'data/2020-2022_송파구_동별_화재건수.csv': {
+        'replace': {'-': 0},
+        'astype': {'화재건수': int},
+    },
+    'data/2020_송파구_주택.csv': {
+        'replace': {'X': 0},
+        'astype': {'단독주택': int, '연립주택': int, '다세대주택': int, '비거주용건물내주택': int},
+    },
+}
 
-# 데이터 로드 함수
-@st.cache_data
-def load_data(file_path, encoding=None):
+
+# 원본 파일 읽기 (인코딩 처리 포함)
+def read_raw(file_path, encoding=None):
 
     # Determine the file type from the file extension
     file_type = file_path.split('.')[-1].lower()
@@ -25,6 +50,137 @@ def load_data(file_path, encoding=None):
     else:
         raise ValueError(f"Unsupported file type: {file_type}")
 
+
+# 정제 규칙 적용: 인덱스 잔여 컬럼 제거, 결측 표기 치환, 숫자/카테고리형 변환
+def clean_frame(df, file_path):
+    df = df.drop(columns=[col for col in df.columns if col.startswith('Unnamed:')])
+
+    rules = CLEANING_RULES.get(file_path, {})
+    if 'replace' in rules:
+        df = df.replace(rules['replace'])
+    if 'astype' in rules:
+        df = df.astype(rules['astype'])
+
+    for col in CATEGORY_COLUMNS:
+        if col in df.columns and df[col].dtype == object:
+            df[col] = df[col].astype('category')
+    return df
+
+
+# 원본 파일의 변경 여부를 판단하기 위한 시그니처 (크기, 수정시각)
+def source_signature(file_path):
+    stat = os.stat(file_path)
+    return {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+
+
+def read_manifest():
+    if not os.path.exists(MANIFEST_PATH):
+        return {}
+    with open(MANIFEST_PATH, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+# 번들 파일이 원본과 일치하면 번들 경로를, 아니면 None 반환
+def fresh_bundle_path(file_path, manifest=None, key='bundle'):
+    manifest = read_manifest() if manifest is None else manifest
+    entry = manifest.get(file_path)
+    if entry is None or key not in entry or not os.path.exists(file_path):
+        return None
+    if entry['source'] != source_signature(file_path):
+        return None
+    bundle_path = os.path.join(BUNDLE_DIR, entry[key])
+    if not os.path.exists(bundle_path):
+        return None
+    return bundle_path
+
+
+# 데이터 로드 함수: 최신 번들이 있으면 메모리 매핑으로 읽고, 없거나 오래되었으면 원본 파일을 정제해서 읽음
+# 캐시는 원본 파일 내용 버전별로 따로 두므로, 파일이 바뀌면 새 버전만 다시 읽음 (utils.artifacts)
+@derived('load_data', source_arg='file_path')
+def load_data(file_path, encoding=None):
+    bundle_path = fresh_bundle_path(file_path)
+    if bundle_path is not None and bundle_path.endswith('.feather'):
+        return feather.read_table(bundle_path, memory_map=True).to_pandas()
+
+    df = read_raw(file_path, encoding=encoding)
+    if isinstance(df, gpd.GeoDataFrame):
+        return df
+    return clean_frame(df, file_path)
+
+
+# WKT 문자열 컬럼이나 공간 파일을 GeoDataFrame 으로 변환
+def to_geodataframe(df, geometry_col='geometry', crs=GEOMETRY_CRS):
+    if isinstance(df, gpd.GeoDataFrame):
+        return df if df.crs is not None else df.set_crs(crs)
+    geometry = gpd.GeoSeries.from_wkt(df[geometry_col], crs=crs)
+    return gpd.GeoDataFrame(df.assign(**{geometry_col: geometry}), geometry=geometry_col, crs=crs)
+
+
+# 공간 데이터 로드 함수: GeoParquet 번들(WKB + CRS)을 읽어 모든 세션이 공유하는 GeoDataFrame 반환
+# 반환값은 세션 간 공유되므로 호출하는 쪽에서 수정하지 않아야 함
+@derived('load_geodata', source_arg='file_path', resource=True)
+def load_geodata(file_path, encoding=None, crs=GEOMETRY_CRS):
+    bundle_path = fresh_bundle_path(file_path, key='geo_bundle')
+    if bundle_path is not None:
+        return gpd.read_parquet(bundle_path)
+
+    if file_path.split('.')[-1].lower() in ['geojson', 'shp']:
+        return to_geodataframe(gpd.read_file(file_path), crs=crs)
+    return to_geodataframe(load_data(file_path, encoding=encoding), crs=crs)
+
+# '{yy}_{지표}' 형태의 넓은 연도별 표를 (자치구, 연도, metric, value) 긴 표로 한 번만 변환
+# 자치구를 인덱스로 두어 선택한 자치구만 바로 잘라낼 수 있고, metric 순서는 원본 컬럼 순서를 따름
+@derived('load_trend_data', source_arg='file_path')
+def load_trend_data(file_path, id_col='자치구'):
+    wide = load_data(file_path)
+    value_cols = [col for col in wide.columns if col != id_col]
+    long = wide.melt(id_vars=id_col, value_vars=value_cols, var_name='column', value_name='value')
+
+    parts = long.pop('column').str.split('_', n=1, expand=True)
+    metrics = list(dict.fromkeys(col.split('_', 1)[1] for col in value_cols))
+    long['연도'] = (2000 + parts[0].astype(int)).astype(str)
+    long['metric'] = pd.Categorical(parts[1], categories=metrics)
+    long[id_col] = long[id_col].astype('category')
+
+    long = long[[id_col, '연도', 'metric', 'value']]
+    return long.set_index(id_col).sort_index(kind='stable')
+
+
+# 자치구 x 동 x 장소 유형 집계 큐브: 동별 행에 자치구 합계('OO구 전체'), 서울시 합계('서울시 전체', '전체') 행을 더해
+# (자치구, 동) 인덱스로 한 번만 만들어 두고, 트리맵/막대 그래프는 행 하나만 꺼내서 사용
+# 원본의 'OO구 전체' 행은 버리고 동별 행에서 다시 집계 (자치구 -> 동 -> 합계 순서, 서울시 합계는 마지막)
+# 반환값은 세션 간 공유되므로 호출하는 쪽에서 수정하지 않아야 함
+@derived('load_place_cube', source_arg='file_path', resource=True)
+def load_place_cube(file_path, gu_col='자치구', dong_col='동'):
+    df = load_data(file_path).astype({gu_col: str, dong_col: str})
+    df = df[~df[dong_col].str.endswith('전체')]
+    places = [col for col in df.columns if col not in (gu_col, dong_col)]
+
+    dongs = df.set_index([gu_col, dong_col])[places]
+    districts = list(dict.fromkeys(df[gu_col]))
+    gu_totals = dongs.groupby(level=gu_col, sort=False).sum()
+    gu_totals.index = pd.MultiIndex.from_arrays([gu_totals.index, gu_totals.index + ' 전체'], names=[gu_col, dong_col])
+    cube = pd.concat([dongs, gu_totals])
+    order = pd.Index(districts).get_indexer(cube.index.get_level_values(gu_col)).argsort(kind='stable')
+    seoul = pd.DataFrame([dongs.sum()], index=pd.MultiIndex.from_tuples([(SEOUL_TOTAL, '전체')], names=[gu_col, dong_col]))
+    return pd.concat([cube.iloc[order], seoul])
+
+
+# 큐브의 자치구별 동 선택지 (자치구 순서, 동 순서는 큐브 순서)
+@derived('place_options', source_arg='file_path', resource=True)
+def place_options(file_path):
+    index = load_place_cube(file_path).index
+    options = {}
+    for gu, dong in index:
+        options.setdefault(gu, []).append(dong)
+    return options
+
+
+# 자치구(또는 서울시) 합계 행의 키
+def place_total_key(gu):
+    return (SEOUL_TOTAL, '전체') if gu == SEOUL_TOTAL else (gu, f'{gu} 전체')
+
+
 @st.cache_data
 def get_locations_data():
 
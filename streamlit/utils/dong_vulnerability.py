@@ -0,0 +1,166 @@
+# -*- coding:utf-8 -*-
+# 행정동 단위 주택화재 취약점수: 서울시 전체 약 430개 행정동을 지표별로 순위를 매기고 가중치를 곱해 합산
+# 자치구/동은 카테고리형으로 두고 자치구 코드(그룹 인덱스)를 미리 만들어, 자치구 값은 따로 계산하지 않고 동별 값을 집계해서 만듦
+import os
+import numpy as np
+import pandas as pd
+from utils.data_loader import load_data, load_geodata
+from utils.group_index import GroupIndex
+from utils.site_scoring import DEVICE_PATH, INCIDENT_PATH, labelled_points
+from utils.artifacts import derived
+
+DONG_FIRE_PATH = "data/동별_화재발생_장소_2021_2022.csv"
+# 행정동 경계 (선택): 구/동 컬럼 또는 '서울특별시 종로구 사직동' 형태의 adm_nm 컬럼, 없으면 동 위치를 점으로 표시
+DONG_BOUNDARY_PATH = "data/boundary/dong_boundary.geojson"
+RESIDENTIAL_PLACES = ['단독주택', '공동주택', '기타주택']
+
+# 지표별 순위 방향: True 면 값이 클수록, False 면 값이 작을수록 취약
+DONG_INDICATORS = {
+    '화재발생건수': True,
+    '주택화재건수': True,
+    '비상소화장치 설치개수': False,
+    '출동소요시간': True,
+}
+DONG_DEFAULT_WEIGHTS = tuple((name, 1.0) for name in DONG_INDICATORS)
+# 자치구 집계 방법 (건수는 합계, 시간은 평균)
+ROLLUP = {'화재발생건수': 'sum', '주택화재건수': 'sum', '비상소화장치 설치개수': 'sum', '출동소요시간': 'mean'}
+# 동별 점수 계산에 쓰이는 원본 파일 (파생 데이터 버전용)
+DONG_SOURCES = (DONG_FIRE_PATH, DEVICE_PATH, INCIDENT_PATH)
+
+
+# 행정동/법정동 이름을 공통 기준 이름으로 변환
+# 행정동 개포1동, 성수1가2동, 종로1·2·3·4가동, 가락본동 -> 개포, 성수, 종로, 가락 / 법정동 성수동1가, 종로1가 -> 성수, 종로
+def base_dong(names):
+    names = pd.Series(np.asarray(names, dtype=str)).str.replace('·', '.', regex=False)
+    return names.str.replace(r'(본|[\d.]+가?[\d.]*)?동$|동?\d+가$', '', regex=True)
+
+
+def dong_keys(gu, dong):
+    return pd.Series(np.asarray(gu, dtype=str)) + ' ' + base_dong(dong)
+
+
+# 법정동 기준 기록값을 행정동에 배분
+# 합계(sum)는 같은 기준 이름의 행정동끼리 나누고, 평균(mean)은 그대로 사용
+# 기준 이름이 맞지 않는 행정동(이름이 바뀐 동 등)은 같은 구의 남은 기록(합계) 또는 구 평균(평균)으로 채움
+# 그런 행정동이 없는 구의 남은 기록은 기록값 비율로 나눠서 더하므로 동별 합계가 구 합계와 같음
+def spread_to_dongs(table, gu, dong, values, how):
+    gu = pd.Series(np.asarray(gu, dtype=str))
+    keys = dong_keys(gu, dong)
+    values = pd.Series(np.asarray(values, dtype=float))
+    table_keys = table['기준'].astype(str)
+    table_gu = table['자치구'].astype(str)
+
+    result = table_keys.map(values.groupby(keys).agg(how))
+    missing = result.isna()
+    if how == 'sum':
+        result = result / table.groupby('기준', observed=True)['기준'].transform('size')
+        unmatched = ~keys.isin(set(table_keys))
+        leftover = table_gu.map(values[unmatched].groupby(gu[unmatched]).sum()).fillna(0)
+        n_missing = missing.groupby(table_gu).transform('sum')
+        matched_total = result.groupby(table_gu).transform('sum')
+        n_rows = table_gu.map(table_gu.value_counts())
+        share = np.where(n_missing > 0, missing / n_missing.clip(lower=1),
+                         np.where(matched_total > 0, result.fillna(0) / matched_total.where(matched_total > 0, 1), 1 / n_rows))
+        result = result.fillna(0) + leftover * share
+    else:
+        result = result.where(~missing, table_gu.map(values.groupby(gu).mean()))
+        result = result.fillna(values.mean())
+    return result.to_numpy()
+
+
+# 행정동별 지표 원본값 (자치구, 동, 기준 이름은 카테고리형)
+@derived('dong.indicators', deps=DONG_SOURCES)
+def load_dong_indicators():
+    fire = load_data(DONG_FIRE_PATH)
+    # 'OO구 전체' 합계 행은 제외 (자치구 값은 동별 값을 집계해서 만듦)
+    fire = fire[~fire['동'].astype(str).str.endswith('전체')].reset_index(drop=True)
+    places = [col for col in fire.columns if col not in ('자치구', '동')]
+    table = pd.DataFrame({
+        '자치구': pd.Categorical(fire['자치구'].astype(str)),
+        '동': pd.Categorical(fire['동'].astype(str)),
+        '기준': pd.Categorical(dong_keys(fire['자치구'], fire['동'])),
+        '화재발생건수': fire[places].sum(axis=1).to_numpy(),
+        '주택화재건수': fire[RESIDENTIAL_PLACES].sum(axis=1).to_numpy(),
+    })
+
+    devices = load_geodata(DEVICE_PATH)
+    table['비상소화장치 설치개수'] = spread_to_dongs(table, devices['구'], devices['동'], np.ones(len(devices)), 'sum')
+    incidents = load_data(INCIDENT_PATH).dropna(subset=['출동소요시간'])
+    table['출동소요시간'] = spread_to_dongs(table, incidents['시군구명'], incidents['읍면동명'], incidents['출동소요시간'], 'mean')
+    return table
+
+
+# 자치구 그룹 인덱스: 행정동별 자치구 코드와 자치구 이름 (집계할 때 np.bincount 로 바로 사용)
+@derived('dong.groups', deps=('dong.indicators',))
+def dong_groups():
+    gu = load_dong_indicators()['자치구']
+    return gu.cat.codes.to_numpy(), np.asarray(gu.cat.categories)
+
+
+# 행정동 표의 자치구 필터용 그룹 인덱스 (행 순서가 같으므로 동별 순위 표에도 그대로 사용)
+@derived('dong.group_index', deps=('dong.indicators',), resource=True)
+def dong_group_index():
+    return GroupIndex(load_dong_indicators(), '자치구', '동')
+
+
+# 모든 행정동의 지표별 순위 (서울시 전체 기준, 값이 작을수록 취약한 지표는 부호를 바꿔서 같은 방향으로 맞춤)
+@derived('dong.ranks', deps=('dong.indicators',))
+def dong_indicator_ranks():
+    table = load_dong_indicators()
+    signs = np.array([1 if ascending else -1 for ascending in DONG_INDICATORS.values()])
+    values = table[list(DONG_INDICATORS)].to_numpy(dtype=float) * signs
+    return pd.DataFrame(values, columns=[f'{name} 점수' for name in DONG_INDICATORS]).rank(method='min').astype(int)
+
+
+# 가중치 조합((지표, 가중치) 튜플)으로 행정동별 전체 점수, 서울시 순위, 구 내 순위를 계산
+@derived('dong.ranking', deps=('dong.indicators', 'dong.ranks', 'dong.groups'))
+def compute_dong_ranking(weights=DONG_DEFAULT_WEIGHTS):
+    weights = dict(weights)
+    table = load_dong_indicators()
+    ranks = dong_indicator_ranks()
+    codes, _ = dong_groups()
+    w = np.array([weights.get(name, 0.0) for name in DONG_INDICATORS])
+
+    total = pd.Series(np.round(ranks.to_numpy() @ w, 2))
+    result = pd.concat([table[['자치구', '동', '기준']], ranks, table[list(DONG_INDICATORS)]], axis=1)
+    result.insert(2, '전체 점수', total)
+    result.insert(2, '구 내 순위', total.groupby(codes).rank(ascending=False, method='min').astype(int))
+    result.insert(2, '순위', total.rank(ascending=False, method='min').astype(int))
+    return result
+
+
+# 행정동 값을 자치구 그룹 인덱스로 집계 (지표는 ROLLUP 방법, 점수는 동 평균)
+@derived('dong.rollup', deps=('dong.ranking', 'dong.groups'))
+def rollup_districts(weights=DONG_DEFAULT_WEIGHTS):
+    ranking = compute_dong_ranking(weights)
+    codes, names = dong_groups()
+    counts = np.bincount(codes, minlength=len(names))
+
+    result = pd.DataFrame({'자치구': names, '행정동 수': counts})
+    result['평균 동 점수'] = np.round(np.bincount(codes, weights=ranking['전체 점수'], minlength=len(names)) / counts, 2)
+    for name, how in ROLLUP.items():
+        total = np.bincount(codes, weights=ranking[name], minlength=len(names))
+        result[name] = total if how == 'sum' else total / counts
+    result.insert(1, '순위', result['평균 동 점수'].rank(ascending=False, method='min').astype(int))
+    return result.sort_values('순위', ignore_index=True)
+
+
+# 행정동 경계 (파일이 없으면 None)
+@derived('dong.boundary', deps=(DONG_BOUNDARY_PATH,), resource=True)
+def load_dong_boundary():
+    if not os.path.exists(DONG_BOUNDARY_PATH):
+        return None
+    gdf = load_geodata(DONG_BOUNDARY_PATH)
+    if not {'구', '동'} <= set(gdf.columns):
+        names = gdf['adm_nm'].str.split()
+        gdf = gdf.assign(구=names.str[-2], 동=names.str[-1])
+    gdf = gdf.assign(동=gdf['동'].str.replace('·', '.', regex=False))
+    return gdf[['구', '동', 'geometry']]
+
+
+# 동 경계가 없을 때 쓰는 기준 이름별 대표 위치 (같은 기준 이름의 시설, 화재 기록 지점 평균 좌표)
+@derived('dong.points', deps=('site.labelled_points',))
+def dong_points():
+    points = labelled_points()
+    keys = dong_keys(points['구'], points['동'])
+    return points[['위도', '경도']].groupby(keys.to_numpy()).mean()
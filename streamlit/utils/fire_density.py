@@ -0,0 +1,107 @@
+# -*- coding:utf-8 -*-
+# 화재 밀도 래스터: 화재 지점을 서울시 전체를 덮는 고정 격자(약 100m)에 모으고, 가우시안 커널을 FFT 합성곱으로
+# 한 번에 적용해서 커널 밀도(KDE)를 계산한 뒤 반투명 PNG 이미지로 만들어 지도 위에 겹쳐 표시
+# 지점 수와 관계없이 격자 크기만큼만 계산하고, 결과 이미지는 계절/시간대/가중치 조합별로 캐시
+import io
+import base64
+import numpy as np
+import branca.colormap as cm
+from PIL import Image
+from scipy.signal import fftconvolve
+from utils.incident_store import query_incidents, INCIDENT_NODE
+from utils.artifacts import derived
+from utils.nearest import haversine
+
+# 밀도 격자 범위 (서울시 경계를 포함하는 위도, 경도 범위)
+DENSITY_BOUNDS = ((37.41, 126.76), (37.72, 127.19))
+# 격자 한 칸 크기와 커널 폭 (미터)
+CELL_M = 100
+BANDWIDTH_M = 300
+# 밀도 가중치: 없음(건수), 재산피해금액, 인명피해(사망수 + 부상자수)
+DENSITY_WEIGHTS = {
+    '화재 건수': (),
+    '재산피해금액': ('재산피해금액',),
+    '인명피해(사망·부상)': ('사망수', '부상자수'),
+}
+# 이 값 이상 확대한 지도에서 누른 지점 주변의 화재 기록만 불러옴
+DETAIL_ZOOM = 15
+DETAIL_RADIUS_M = 150
+DETAIL_LIMIT = 5
+# 색상 스케일 상한 (밀도 백분위수, 소수의 밀집 지점 때문에 나머지가 모두 흐려지지 않도록 함)
+DENSITY_CLIP_PERCENTILE = 99.5
+DENSITY_COLORMAP = cm.linear.YlOrRd_09
+DENSITY_MAX_OPACITY = 0.8
+
+
+# 격자 모양 (행 = 위도 남->북, 열 = 경도 서->동)
+def grid_shape(bounds=DENSITY_BOUNDS, cell_m=CELL_M):
+    (lat_min, lon_min), (lat_max, lon_max) = bounds
+    lat_step = cell_m / 111_320
+    lon_step = lat_step / np.cos(np.radians((lat_min + lat_max) / 2))
+    return int(np.ceil((lat_max - lat_min) / lat_step)), int(np.ceil((lon_max - lon_min) / lon_step))
+
+
+# 지점(가중치)을 격자 칸에 모음, 범위 밖 지점은 제외
+def bin_points(lat, lon, weights=None, bounds=DENSITY_BOUNDS, cell_m=CELL_M):
+    (lat_min, lon_min), (lat_max, lon_max) = bounds
+    counts, _, _ = np.histogram2d(np.asarray(lat, dtype=float), np.asarray(lon, dtype=float),
+                                  bins=grid_shape(bounds, cell_m), range=[[lat_min, lat_max], [lon_min, lon_max]],
+                                  weights=weights)
+    return counts
+
+
+# 격자 단위 가우시안 커널 (합이 1, 폭의 3배에서 자름)
+def gaussian_kernel(sigma_cells):
+    radius = int(np.ceil(3 * sigma_cells))
+    offsets = np.arange(-radius, radius + 1)
+    kernel = np.exp(-offsets ** 2 / (2 * sigma_cells ** 2))
+    kernel = np.outer(kernel, kernel)
+    return kernel / kernel.sum()
+
+
+# 격자 KDE: 모은 값에 커널을 FFT 합성곱으로 적용 (격자와 같은 모양, 음수 반올림 오차는 0으로)
+def fft_kde(counts, bandwidth_m=BANDWIDTH_M, cell_m=CELL_M):
+    density = fftconvolve(counts, gaussian_kernel(bandwidth_m / cell_m), mode='same')
+    return np.clip(density, 0, None)
+
+
+# 밀도 격자를 색상(YlOrRd) + 투명도(밀도에 비례) PNG 로 변환, 북쪽이 이미지 위쪽
+def density_image(density, vmax):
+    scaled = np.clip(density / vmax, 0, 1) if vmax > 0 else np.zeros_like(density)
+    stops = np.linspace(0, 1, len(DENSITY_COLORMAP.colors))
+    colors = np.array(DENSITY_COLORMAP.colors)[:, :3]
+    rgba = np.empty(density.shape + (4,), dtype=np.uint8)
+    for channel in range(3):
+        rgba[..., channel] = np.interp(scaled, stops, colors[:, channel]) * 255
+    rgba[..., 3] = np.where(scaled > 0.02, np.sqrt(scaled) * DENSITY_MAX_OPACITY * 255, 0)
+
+    buffer = io.BytesIO()
+    Image.fromarray(rgba[::-1]).save(buffer, format='PNG', optimize=True)
+    return 'data:image/png;base64,' + base64.b64encode(buffer.getvalue()).decode('ascii')
+
+
+# 골든타임 초과 화재의 밀도 이미지 (계절/시간대가 None 이면 전체), 화재 기록 노드 버전별로 캐시
+# 반환값: PNG data URL, 이미지 범위, 색상 스케일 상한(격자 칸당 값), 사용한 화재 수
+@derived('incident.density', deps=(INCIDENT_NODE,))
+def density_overlay(season=None, period=None, weight='화재 건수'):
+    columns = ['위도', '경도'] + list(DENSITY_WEIGHTS[weight])
+    rows = query_incidents(golden_only=True, season=season, period=period, columns=columns).dropna(subset=['위도', '경도'])
+    weights = rows[list(DENSITY_WEIGHTS[weight])].fillna(0).sum(axis=1).to_numpy(dtype=float) if DENSITY_WEIGHTS[weight] else None
+
+    density = fft_kde(bin_points(rows['위도'], rows['경도'], weights))
+    # FFT 반올림 오차로 생긴 아주 작은 값은 제외하고 백분위수 계산
+    positive = density[density > density.max() * 1e-6]
+    vmax = float(np.percentile(positive, DENSITY_CLIP_PERCENTILE)) if len(positive) else 0.0
+    return density_image(density, vmax), [list(DENSITY_BOUNDS[0]), list(DENSITY_BOUNDS[1])], vmax, len(rows)
+
+
+# 누른 지점 반경 안의 골든타임 초과 화재 기록 (가까운 순, 최대 limit 건), 이때만 원본 행을 읽음
+# 반경을 위도/경도 범위로 바꿔 Parquet 필터로 주변 행만 읽은 뒤 정확한 거리로 다시 거름
+def incidents_near(lat, lon, season=None, period=None, radius_m=DETAIL_RADIUS_M, limit=DETAIL_LIMIT):
+    lat_delta = radius_m / 111_320
+    lon_delta = lat_delta / np.cos(np.radians(lat))
+    bounds = ((lat - lat_delta, lon - lon_delta), (lat + lat_delta, lon + lon_delta))
+    rows = query_incidents(golden_only=True, season=season, period=period, bounds=bounds).dropna(subset=['위도', '경도'])
+    distance = haversine(lat, lon, rows['위도'].to_numpy(), rows['경도'].to_numpy()) * 1000
+    rows = rows.assign(거리=distance)[distance <= radius_m]
+    return rows.sort_values('거리').head(limit).reset_index(drop=True)
@@ -0,0 +1,93 @@
+# -*- coding:utf-8 -*-
+# 자치구 경계 다중 해상도(LOD) 생성 및 로드
+# 인접한 구가 공유하는 경계선(arc)을 한 번만 단순화하므로 구 사이에 틈이나 겹침이 생기지 않음
+import os
+import numpy as np
+import shapely
+import geopandas as gpd
+from shapely.ops import linemerge
+from utils.data_loader import BUNDLE_DIR, read_manifest, source_signature, load_geodata
+from utils.artifacts import derived
+
+BOUNDARY_PATH = 'data/boundary/boundary.geojson'
+BOUNDARY_KEY = '구'
+LOD_ZOOMS = (9, 10, 11, 12, 13)
+
+
+# 줌 레벨에서 화면 0.5픽셀에 해당하는 경위도 크기 (단순화 허용 오차)
+def zoom_tolerance(zoom):
+    return 360 / (256 * 2 ** zoom) / 2
+
+
+# 좌표 양자화 자릿수: 허용 오차의 1/4 보다 촘촘한 소수 자릿수
+def zoom_precision(zoom):
+    return int(np.ceil(-np.log10(zoom_tolerance(zoom) / 4)))
+
+
+# 선분들로 만들어지는 면(face)을 가장 많이 겹치는 원래 도형에 배정해서 도형 배열을 다시 구성
+def _assign_faces(lines, geoms):
+    faces = shapely.get_parts(shapely.polygonize(shapely.get_parts(lines)))
+    face_idx, geom_idx = shapely.STRtree(geoms).query(faces, predicate='intersects')
+    overlap = shapely.area(shapely.intersection(faces[face_idx], geoms[geom_idx]))
+
+    owner = np.full(len(faces), -1)
+    best = np.zeros(len(faces))
+    for f, g, o in zip(face_idx, geom_idx, overlap):
+        if o > best[f]:
+            best[f], owner[f] = o, g
+
+    # 원본 경계 사이의 빈 틈(어떤 구와도 절반 이상 겹치지 않는 면)은 제외
+    keep = best > 0.5 * shapely.area(faces)
+    return np.array([shapely.union_all(faces[keep & (owner == i)]) for i in range(len(geoms))])
+
+
+# 원본 경계의 미세한 겹침/틈을 정리해서 인접 구가 정확히 같은 경계선을 공유하도록 만듦
+def clean_coverage(geoms):
+    return _assign_faces(shapely.union_all(shapely.boundary(geoms)), geoms)
+
+
+# 공유 경계선 단위로 단순화 후 좌표를 양자화하고 다시 면으로 조립
+def simplify_coverage(geoms, zoom):
+    arcs = shapely.get_parts(linemerge(shapely.union_all(shapely.boundary(geoms))))
+    arcs = shapely.simplify(arcs, zoom_tolerance(zoom), preserve_topology=True)
+    arcs = shapely.set_precision(arcs, 10 ** -zoom_precision(zoom))
+    simplified = _assign_faces(shapely.union_all(arcs), geoms)
+    return shapely.transform(simplified, lambda coords: np.round(coords, zoom_precision(zoom)))
+
+
+def build_boundary_lod(gdf, zooms=LOD_ZOOMS):
+    geoms = clean_coverage(gdf.geometry.values)
+    levels = {}
+    for zoom in zooms:
+        levels[zoom] = gdf.set_geometry(simplify_coverage(geoms, zoom), crs=gdf.crs)
+    return levels
+
+
+def write_boundary_lod(gdf, bundle_dir=BUNDLE_DIR, zooms=LOD_ZOOMS):
+    files = {}
+    for zoom, level in build_boundary_lod(gdf, zooms).items():
+        bundle_name = f'boundary.lod{zoom}.geo.parquet'
+        level.to_parquet(os.path.join(bundle_dir, bundle_name))
+        files[str(zoom)] = bundle_name
+        print(f'{BOUNDARY_PATH} -> {bundle_name} ({shapely.get_num_coordinates(level.geometry.values).sum()} vertices)')
+    return files
+
+
+# 요청한 줌 레벨을 표현하기에 충분한 가장 거친 단계 선택
+def select_lod_zoom(zoom, zooms=LOD_ZOOMS):
+    for level in zooms:
+        if level >= zoom:
+            return level
+    return zooms[-1]
+
+
+# 줌 레벨에 맞는 단순화 경계 로드 (번들이 없거나 오래되었으면 한 번 계산해서 공유)
+@derived('boundary.lod', deps=(BOUNDARY_PATH,), resource=True)
+def load_boundary_lod(zoom):
+    level = select_lod_zoom(zoom)
+    entry = read_manifest().get(BOUNDARY_PATH, {})
+    if entry.get('source') == source_signature(BOUNDARY_PATH) and str(level) in entry.get('lod', {}):
+        bundle_path = os.path.join(BUNDLE_DIR, entry['lod'][str(level)])
+        if os.path.exists(bundle_path):
+            return gpd.read_parquet(bundle_path)
+    return build_boundary_lod(load_geodata(BOUNDARY_PATH), zooms=(level,))[level]
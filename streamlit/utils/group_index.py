@@ -0,0 +1,77 @@
+# -*- coding:utf-8 -*-
+# 구/동 그룹 인덱스: 데이터셋의 구/동 컬럼을 카테고리 코드로 바꾸고 구별, (구, 동)별 행 위치를 한 번만 계산해 둠
+# 필터링은 전체 행을 비교(df[df['구'] == gu])하는 대신 미리 만든 위치 배열로 iloc 조회하고, 선택지 목록도 함께 캐시
+import numpy as np
+import pandas as pd
+from utils.data_loader import load_data, load_geodata
+from utils.artifacts import derived
+
+
+# 코드별 행 위치 배열 (음수 코드 = 결측은 제외, 각 그룹 안에서는 원래 행 순서 유지)
+def group_positions(codes, n_groups):
+    rows = np.flatnonzero(codes >= 0)
+    order = rows[np.argsort(codes[rows], kind='stable')]
+    bounds = np.concatenate([[0], np.cumsum(np.bincount(codes[rows], minlength=n_groups))])
+    return [order[bounds[i]:bounds[i + 1]] for i in range(n_groups)]
+
+
+class GroupIndex:
+    # gu_col 이 None 이면 동 하나로만 그룹을 나눔 (송파구 동별 통계 등)
+    def __init__(self, df, gu_col='구', dong_col='동'):
+        self.data = df
+        dong = pd.Categorical(df[dong_col])
+        dong_codes = np.asarray(dong.codes, dtype=np.int64)
+        self._dong = {name: rows for name, rows in zip(dong.categories, group_positions(dong_codes, len(dong.categories)))
+                      if len(rows)}
+
+        self._gu, self._pairs, self._dong_options = {}, {}, {None: sorted(self._dong)}
+        if gu_col is None:
+            return
+        gu = pd.Categorical(df[gu_col])
+        gu_codes = np.asarray(gu.codes, dtype=np.int64)
+        self._gu = {name: rows for name, rows in zip(gu.categories, group_positions(gu_codes, len(gu.categories)))
+                    if len(rows)}
+
+        # (구, 동) 쌍은 두 코드를 하나의 정수로 합쳐서 그룹화
+        pair_codes = np.where((gu_codes >= 0) & (dong_codes >= 0), gu_codes * len(dong.categories) + dong_codes, -1)
+        pairs, inverse = np.unique(pair_codes, return_inverse=True)
+        inverse = np.where(pair_codes >= 0, inverse - int(len(pairs) > 0 and pairs[0] < 0), -1)
+        pairs = pairs[pairs >= 0]
+        for code, rows in zip(pairs, group_positions(inverse, len(pairs))):
+            gu_name, dong_name = gu.categories[code // len(dong.categories)], dong.categories[code % len(dong.categories)]
+            self._pairs[(gu_name, dong_name)] = rows
+            self._dong_options.setdefault(gu_name, []).append(dong_name)
+        for names in self._dong_options.values():
+            names.sort()
+
+    def __len__(self):
+        return len(self.data)
+
+    def gu_options(self):
+        return sorted(self._gu)
+
+    # 구 안의 동 선택지 (gu 가 None 이면 전체 동)
+    def dong_options(self, gu=None):
+        return self._dong_options.get(gu, [])
+
+    # 조건에 맞는 행 위치 (조건이 없으면 None = 전체)
+    def rows(self, gu=None, dong=None):
+        empty = np.array([], dtype=np.int64)
+        if gu is None and dong is None:
+            return None
+        if dong is None:
+            return self._gu.get(gu, empty)
+        if gu is None:
+            return self._dong.get(dong, empty)
+        return self._pairs.get((gu, dong), empty)
+
+    def select(self, gu=None, dong=None):
+        rows = self.rows(gu, dong)
+        return self.data if rows is None else self.data.iloc[rows]
+
+
+# 데이터셋별 그룹 인덱스 (모든 세션이 공유, select 결과는 원본의 일부이므로 수정하지 않아야 함)
+@derived('group_index', source_arg='file_path', resource=True)
+def load_group_index(file_path, gu_col='구', dong_col='동', geo=False, encoding=None):
+    df = load_geodata(file_path, encoding=encoding) if geo else load_data(file_path, encoding=encoding)
+    return GroupIndex(df, gu_col, dong_col)
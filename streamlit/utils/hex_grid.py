@@ -0,0 +1,233 @@
+# -*- coding:utf-8 -*-
+# 다중 해상도 육각 격자 집계: 소방시설, 비상소화장치, 화재출동, 소방용수 지점을 여러 크기의 육각 셀에 한 번에 배정하고
+# 해상도별 셀 건수/합계를 저장해 둠 (외부 육각 격자 라이브러리 없이 NumPy 로 계산)
+# - 서울시 중심 기준 평면 좌표(미터)에서 뾰족한 위쪽(pointy-top) 육각형의 축 좌표(q, r)로 반올림
+# - 셀 키는 (해상도, q, r)를 정수 하나로 합친 값이라 데이터셋끼리 같은 키로 바로 결합할 수 있음
+# 집계 생성 (streamlit 폴더에서 실행): python -m utils.hex_grid
+import os
+import sys
+import json
+import time
+import numpy as np
+import pandas as pd
+import shapely
+import streamlit as st
+from utils.data_loader import BUNDLE_DIR, load_data, load_geodata
+from utils.coverage import GRID_PATH, STATION_PATH, cell_centers
+from utils.site_scoring import DEVICE_PATH
+from utils.incident_store import query_incidents, incident_store_version
+from utils.artifacts import artifact_version
+
+HEX_DIR = os.path.join(BUNDLE_DIR, 'hex')
+# 평면 좌표 원점 (서울시청)과 위도 1도의 길이 (미터)
+HEX_ORIGIN = (37.5665, 126.9780)
+METERS_PER_DEGREE = 111_320
+# 해상도별 육각형 크기 (중심에서 꼭짓점까지, 미터), 해상도가 1 오를 때마다 절반
+HEX_SIZES_M = (4000, 2000, 1000, 500, 250)
+# 지도 줌 레벨 10 에서 해상도 0, 한 단계 확대할 때마다 해상도 1 증가
+HEX_BASE_ZOOM = 10
+
+# 데이터셋별 합계 컬럼 (건수는 항상 포함)
+HEX_DATASETS = {
+    'stations': (),
+    'devices': (),
+    'incidents': ('골든타임초과', '출동소요시간', '사망수', '부상자수', '재산피해금액'),
+    'water': ('소방용수_수',),
+}
+# 지도에 표시할 지표: (데이터셋, 컬럼)
+HEX_MEASURES = {
+    '소방시설 수': ('stations', '건수'),
+    '비상소화장치 수': ('devices', '건수'),
+    '화재출동 수': ('incidents', '건수'),
+    '골든타임 초과 화재 수': ('incidents', '골든타임초과'),
+    '부상자 수': ('incidents', '부상자수'),
+    '재산피해금액(만원)': ('incidents', '재산피해금액'),
+    '소방용수 수': ('water', '소방용수_수'),
+}
+
+# 셀 키: 해상도 8비트, q/r 각 24비트 (음수는 오프셋을 더해서 저장)
+_AXIS_BITS = 24
+_AXIS_OFFSET = 1 << (_AXIS_BITS - 1)
+_AXIS_MASK = (1 << _AXIS_BITS) - 1
+
+
+# 경위도 -> 원점 기준 평면 좌표 (미터, 동쪽 x / 북쪽 y)
+def to_plane(lat, lon, origin=HEX_ORIGIN):
+    lat, lon = np.asarray(lat, dtype=float), np.asarray(lon, dtype=float)
+    x = (lon - origin[1]) * METERS_PER_DEGREE * np.cos(np.radians(origin[0]))
+    y = (lat - origin[0]) * METERS_PER_DEGREE
+    return x, y
+
+
+def from_plane(x, y, origin=HEX_ORIGIN):
+    lon = origin[1] + np.asarray(x) / (METERS_PER_DEGREE * np.cos(np.radians(origin[0])))
+    lat = origin[0] + np.asarray(y) / METERS_PER_DEGREE
+    return lat, lon
+
+
+# 평면 좌표를 가장 가까운 육각형의 축 좌표(q, r)로 반올림 (큐브 좌표 반올림)
+def axial_round(x, y, size):
+    q = (np.sqrt(3) / 3 * x - y / 3) / size
+    r = (2 / 3 * y) / size
+    s = -q - r
+    rq, rr, rs = np.round(q), np.round(r), np.round(s)
+    dq, dr, ds = np.abs(rq - q), np.abs(rr - r), np.abs(rs - s)
+    # 반올림 오차가 가장 큰 축을 나머지 두 축으로 다시 계산해서 q + r + s = 0 유지
+    fix_q = (dq > dr) & (dq > ds)
+    fix_r = ~fix_q & (dr > ds)
+    rq = np.where(fix_q, -rr - rs, rq)
+    rr = np.where(fix_r, -rq - rs, rr)
+    return rq.astype(np.int64), rr.astype(np.int64)
+
+
+def encode_keys(resolution, q, r):
+    return (np.int64(resolution) << (2 * _AXIS_BITS)) | ((q + _AXIS_OFFSET) << _AXIS_BITS) | (r + _AXIS_OFFSET)
+
+
+def decode_keys(keys):
+    keys = np.asarray(keys, dtype=np.int64)
+    resolution = keys >> (2 * _AXIS_BITS)
+    q = ((keys >> _AXIS_BITS) & _AXIS_MASK) - _AXIS_OFFSET
+    r = (keys & _AXIS_MASK) - _AXIS_OFFSET
+    return resolution, q, r
+
+
+# 모든 지점의 해상도별 셀 키, 모양은 (지점 수, 해상도 수)
+# 평면 좌표 변환은 한 번만 하고 해상도마다 반올림만 다시 함
+def hex_keys(lat, lon, resolutions=range(len(HEX_SIZES_M))):
+    x, y = to_plane(lat, lon)
+    keys = np.empty((len(x), len(resolutions)), dtype=np.int64)
+    for column, resolution in enumerate(resolutions):
+        keys[:, column] = encode_keys(resolution, *axial_round(x, y, HEX_SIZES_M[resolution]))
+    return keys
+
+
+# 셀 중심 경위도
+def hex_centers(keys):
+    resolution, q, r = decode_keys(keys)
+    size = np.asarray(HEX_SIZES_M)[resolution]
+    return from_plane(size * np.sqrt(3) * (q + r / 2), size * 1.5 * r)
+
+
+# 셀 육각형 도형 (경위도, 꼭짓점 6개를 한 번에 계산)
+def hex_polygons(keys):
+    resolution, q, r = decode_keys(keys)
+    size = np.asarray(HEX_SIZES_M)[resolution][:, None]
+    angles = np.radians(60 * np.arange(7) - 30)
+    cx = size[:, 0] * np.sqrt(3) * (q + r / 2)
+    cy = size[:, 0] * 1.5 * r
+    lat, lon = from_plane(cx[:, None] + size * np.cos(angles), cy[:, None] + size * np.sin(angles))
+    return shapely.polygons(np.stack([lon, lat], axis=-1))
+
+
+# 지점을 모든 해상도의 셀에 배정하고 셀별 건수와 값 합계 계산
+# 반환 표 컬럼: 해상도, key, 건수, 합계 컬럼들 (해상도 순, 키 순)
+def aggregate_points(lat, lon, values=None):
+    keys = hex_keys(lat, lon)
+    values = pd.DataFrame(index=range(len(keys))) if values is None else values.reset_index(drop=True)
+    matrix = values.to_numpy(dtype=float)
+    matrix = np.where(np.isnan(matrix), 0, matrix)
+
+    parts = []
+    for resolution in range(keys.shape[1]):
+        cells, inverse = np.unique(keys[:, resolution], return_inverse=True)
+        part = {'해상도': np.full(len(cells), resolution, dtype=np.int8), 'key': cells,
+                '건수': np.bincount(inverse, minlength=len(cells))}
+        for column, name in enumerate(values.columns):
+            part[name] = np.bincount(inverse, weights=matrix[:, column], minlength=len(cells))
+        parts.append(pd.DataFrame(part))
+    return pd.concat(parts, ignore_index=True)
+
+
+# 데이터셋별 지점 좌표와 합계 대상 값
+def dataset_points(dataset):
+    columns = list(HEX_DATASETS[dataset])
+    if dataset == 'stations':
+        df = load_data(STATION_PATH)
+        return df['위도'], df['경도'], None
+    elif dataset == 'devices':
+        gdf = load_geodata(DEVICE_PATH)
+        return gdf.geometry.y, gdf.geometry.x, None
+    elif dataset == 'incidents':
+        df = query_incidents(columns=['위도', '경도'] + columns).dropna(subset=['위도', '경도'])
+        return df['위도'], df['경도'], df[columns]
+    elif dataset == 'water':
+        grid = load_geodata(GRID_PATH, encoding='euc-kr')
+        lat, lon = cell_centers(grid)
+        return lat, lon, grid[columns]
+    raise ValueError(f"Unknown hex dataset: {dataset}")
+
+
+# 원본 버전 (화재출동은 화재 기록 저장소 버전)
+def hex_source_version(dataset):
+    if dataset == 'incidents':
+        return incident_store_version()
+    path = {'stations': STATION_PATH, 'devices': DEVICE_PATH, 'water': GRID_PATH}[dataset]
+    return artifact_version(path)
+
+
+def read_hex_manifest(hex_dir=HEX_DIR):
+    path = os.path.join(hex_dir, 'manifest.json')
+    if not os.path.exists(path):
+        return {}
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+# 데이터셋 집계를 계산해서 Parquet 으로 저장하고 매니페스트에 원본 버전 기록
+def build_hex_aggregates(dataset, version, hex_dir=HEX_DIR):
+    lat, lon, values = dataset_points(dataset)
+    aggregates = aggregate_points(lat, lon, values)
+
+    os.makedirs(hex_dir, exist_ok=True)
+    file_name = f'{dataset}.parquet'
+    tmp_path = os.path.join(hex_dir, f'{file_name}.tmp')
+    aggregates.to_parquet(tmp_path, index=False)
+    os.replace(tmp_path, os.path.join(hex_dir, file_name))
+
+    manifest = read_hex_manifest(hex_dir)
+    manifest[dataset] = {'file': file_name, 'version': version, 'points': int(len(lat)), 'cells': int(len(aggregates))}
+    manifest_path = os.path.join(hex_dir, 'manifest.json')
+    with open(manifest_path + '.tmp', 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    os.replace(manifest_path + '.tmp', manifest_path)
+    return aggregates
+
+
+# 데이터셋의 해상도별 셀 집계 (저장된 집계가 원본 버전과 같으면 읽고, 아니면 다시 계산해서 저장)
+# 반환값은 세션 간 공유되므로 호출하는 쪽에서 수정하지 않아야 함
+@st.cache_resource
+def load_hex_aggregates(dataset, version, hex_dir=HEX_DIR):
+    entry = read_hex_manifest(hex_dir).get(dataset, {})
+    path = os.path.join(hex_dir, entry.get('file', ''))
+    if entry.get('version') == version and os.path.isfile(path):
+        return pd.read_parquet(path)
+    return build_hex_aggregates(dataset, version, hex_dir)
+
+
+# 줌 레벨에 맞는 해상도
+def hex_resolution(zoom):
+    return int(np.clip(zoom - HEX_BASE_ZOOM, 0, len(HEX_SIZES_M) - 1))
+
+
+# 한 해상도에서 여러 데이터셋의 셀 값을 셀 키로 결합 ({이름: (데이터셋, 컬럼)}), 없는 셀은 0
+def join_hex(resolution, measures):
+    joined = None
+    for name, (dataset, column) in measures.items():
+        aggregates = load_hex_aggregates(dataset, hex_source_version(dataset))
+        part = aggregates.loc[aggregates['해상도'] == resolution, ['key', column]].set_index('key')[column].rename(name)
+        joined = part.to_frame() if joined is None else joined.join(part, how='outer')
+    return joined.fillna(0)
+
+
+def build_all(datasets=tuple(HEX_DATASETS)):
+    for dataset in datasets:
+        start = time.perf_counter()
+        aggregates = build_hex_aggregates(dataset, hex_source_version(dataset))
+        cells = aggregates.groupby('해상도').size().tolist()
+        print(f'{dataset}: {aggregates.loc[aggregates["해상도"] == 0, "건수"].sum()} points -> cells per resolution {cells} '
+              f'in {time.perf_counter() - start:.2f} s')
+
+
+if __name__ == '__main__':
+    build_all(tuple(sys.argv[1:]) or tuple(HEX_DATASETS))
@@ -0,0 +1,258 @@
+# -*- coding:utf-8 -*-
+# 화재출동 원본 적재: 전국 화재출동 원본(수천만 행)을 고정 크기 묶음(chunk)으로 읽어 서울시 행만 남기고
+# - 원본 행은 연도/월로 나눈 Parquet 저장소(hive 파티션)에 묶음마다 바로 기록
+# - (구, 동, 연도, 월, 시) 단위 집계는 묶음마다 누적해서 원본 파일별로 저장하고, 전체 합계를 다시 만듦
+# 메모리는 묶음 크기와 집계 그룹 수에만 비례하며, 대시보드는 집계만 읽고 원본 행은 필요할 때 조건으로 골라 읽음
+# 저장소가 없으면 data/화재출동_골든타임.csv 를 같은 과정으로 집계해서 사용
+# 사용법 (streamlit 폴더에서 실행): python -m utils.incident_store 원본.csv [원본2.csv ...]
+import os
+import sys
+import glob
+import json
+import time
+import hashlib
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+from utils.data_loader import BUNDLE_DIR, load_data, source_signature
+from utils.coverage import GOLDEN_TIME_MIN
+from utils.artifacts import derived, artifact_version
+from utils.spatial_join import load_gu_region_index, assign_regions
+
+INCIDENT_PATH = "data/화재출동_골든타임.csv"
+STORE_DIR = os.path.join(BUNDLE_DIR, 'incidents')
+# 한 번에 읽는 원본 행 수 (메모리 상한)
+CHUNK_ROWS = 500_000
+
+# 원본에 시도 컬럼이 있으면 이름으로, 없으면 자치구 경계 안의 좌표로 서울시 행을 고름
+SIDO_COL = '시도명'
+SEOUL = '서울특별시'
+RAW_COLUMNS = ['사망수', '부상자수', '재산피해금액', '출동소요시간', '화재진압시간', '시군구명', '읍면동명', '경도', '위도', '화재발생일시']
+GROUP_COLUMNS = ['시군구명', '읍면동명', '연도', '월', '시']
+SUM_COLUMNS = ['건수', '골든타임초과', '출동소요시간', '사망수', '부상자수', '재산피해금액']
+# 골든타임 초과 기준 (기존 골든타임 초과 데이터와 같이 7분 이상)
+GOLDEN_TIME_SEC = GOLDEN_TIME_MIN * 60
+SEASONS = {12: '겨울', 1: '겨울', 2: '겨울', 3: '봄', 4: '봄', 5: '봄',
+           6: '여름', 7: '여름', 8: '여름', 9: '가을', 10: '가을', 11: '가을'}
+# 낮 시간대 (06~18시), 나머지는 밤
+DAY_HOURS = (6, 18)
+
+
+def rows_dir(store_dir=STORE_DIR):
+    return os.path.join(store_dir, 'rows')
+
+
+def aggregate_path(store_dir=STORE_DIR, tag=None):
+    name = 'aggregates.parquet' if tag is None else f'aggregates-{tag}.parquet'
+    return os.path.join(store_dir, name)
+
+
+def read_store_manifest(store_dir=STORE_DIR):
+    path = os.path.join(store_dir, 'manifest.json')
+    if not os.path.exists(path):
+        return {}
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def write_store_manifest(manifest, store_dir=STORE_DIR):
+    with open(os.path.join(store_dir, 'manifest.json'), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+
+
+# 원본 파일마다 저장소 안의 파일 이름에 붙이는 짧은 태그
+def source_tag(file_path):
+    return hashlib.sha1(os.path.abspath(file_path).encode('utf-8')).hexdigest()[:10]
+
+
+# 파일 앞부분만 읽어서 인코딩 판별 (전체를 읽지 않음)
+def sniff_encoding(file_path, n_bytes=1 << 16):
+    with open(file_path, 'rb') as f:
+        head = f.read(n_bytes)
+    try:
+        head.decode('utf-8')
+        return 'utf-8'
+    except UnicodeDecodeError as e:
+        # 잘린 마지막 글자 때문에 실패한 경우는 utf-8
+        return 'utf-8' if e.start >= len(head) - 3 else 'cp949'
+
+
+def season_of(month):
+    return pd.Series(month).map(SEASONS).to_numpy()
+
+
+def period_of(hour):
+    hour = np.asarray(hour)
+    return np.where((hour >= DAY_HOURS[0]) & (hour <= DAY_HOURS[1]), '낮', '밤')
+
+
+# 원본 묶음 하나를 서울시 행으로 줄이고 연도/월/시, 계절/시간대, 골든타임 초과 여부를 추가
+# 구/동 컬럼이 없는 원본은 좌표로 구/동을 배정 (역지오코딩 호출 없이 경계 도형과 공간 조인)
+def prepare_chunk(chunk):
+    if SIDO_COL in chunk.columns:
+        chunk = chunk[chunk[SIDO_COL] == SEOUL]
+    else:
+        chunk = chunk.dropna(subset=['위도', '경도'])
+        chunk = chunk[load_gu_region_index().locate(chunk['위도'], chunk['경도']) >= 0]
+    if '시군구명' not in chunk.columns or '읍면동명' not in chunk.columns:
+        chunk = chunk.dropna(subset=['위도', '경도'])
+        regions = assign_regions(chunk['위도'], chunk['경도'])
+        chunk = chunk.assign(시군구명=regions['구'].to_numpy(), 읍면동명=regions['동'].to_numpy())
+
+    rows = chunk[[col for col in RAW_COLUMNS if col in chunk.columns]].copy()
+    when = pd.to_datetime(rows['화재발생일시'], errors='coerce')
+    rows = rows[when.notna()]
+    when = when[when.notna()]
+    rows['연도'] = when.dt.year.astype('int16')
+    rows['월'] = when.dt.month.astype('int8')
+    rows['시'] = when.dt.hour.astype('int8')
+    rows['계절'] = season_of(rows['월'])
+    rows['시간대'] = period_of(rows['시'])
+    rows['골든타임초과'] = rows['출동소요시간'] >= GOLDEN_TIME_SEC
+    return rows.astype({'시군구명': str, '읍면동명': str, '화재발생일시': str})
+
+
+# (구, 동, 연도, 월, 시) 단위 합계 (평균 출동소요시간은 합계 / 건수로 계산)
+def aggregate_chunk(rows):
+    rows = rows.assign(건수=1, 골든타임초과=rows['골든타임초과'].astype(int))
+    return rows.groupby(GROUP_COLUMNS, sort=False)[SUM_COLUMNS].sum()
+
+
+def merge_aggregates(total, part):
+    return part if total is None else total.add(part, fill_value=0)
+
+
+# 원본 행을 연도/월 파티션에 기록 (파일 이름에 원본 태그와 묶음 번호를 붙여서 다시 적재할 때 지울 수 있게 함)
+def write_rows(rows, tag, part, store_dir=STORE_DIR):
+    ds.write_dataset(
+        pa.Table.from_pandas(rows, preserve_index=False), rows_dir(store_dir), format='parquet',
+        partitioning=ds.partitioning(pa.schema([('연도', pa.int16()), ('월', pa.int8())]), flavor='hive'),
+        basename_template=f'{tag}-{part:05d}-{{i}}.parquet', existing_data_behavior='overwrite_or_ignore')
+
+
+def remove_source(tag, store_dir=STORE_DIR):
+    for path in glob.glob(os.path.join(rows_dir(store_dir), '*', '*', f'{tag}-*.parquet')):
+        os.remove(path)
+    if os.path.exists(aggregate_path(store_dir, tag)):
+        os.remove(aggregate_path(store_dir, tag))
+
+
+# 원본 파일 하나를 묶음 단위로 적재 (이미 같은 내용으로 적재한 파일은 건너뛰고, 바뀐 파일은 지우고 다시 적재)
+def ingest_file(file_path, store_dir=STORE_DIR, chunk_rows=CHUNK_ROWS):
+    manifest = read_store_manifest(store_dir)
+    tag = source_tag(file_path)
+    signature = source_signature(file_path)
+    if manifest.get(file_path, {}).get('source') == signature:
+        return manifest[file_path]
+    remove_source(tag, store_dir)
+
+    total, n_raw, n_rows = None, 0, 0
+    reader = pd.read_csv(file_path, encoding=sniff_encoding(file_path), chunksize=chunk_rows,
+                         usecols=lambda col: col in RAW_COLUMNS or col == SIDO_COL)
+    for part, chunk in enumerate(reader):
+        n_raw += len(chunk)
+        rows = prepare_chunk(chunk)
+        if len(rows):
+            write_rows(rows, tag, part, store_dir)
+            total = merge_aggregates(total, aggregate_chunk(rows))
+            n_rows += len(rows)
+
+    if total is not None:
+        total.astype('int64').reset_index().to_parquet(aggregate_path(store_dir, tag), index=False)
+    manifest[file_path] = {'tag': tag, 'source': signature, 'raw_rows': n_raw, 'seoul_rows': n_rows}
+    write_store_manifest(manifest, store_dir)
+    return manifest[file_path]
+
+
+# 원본 파일별 집계를 합쳐서 대시보드용 전체 집계 생성
+def build_aggregates(store_dir=STORE_DIR):
+    total = None
+    for entry in read_store_manifest(store_dir).values():
+        path = aggregate_path(store_dir, entry['tag'])
+        if os.path.exists(path):
+            total = merge_aggregates(total, pd.read_parquet(path).set_index(GROUP_COLUMNS))
+    if total is not None:
+        total.astype('int64').reset_index().to_parquet(aggregate_path(store_dir), index=False)
+    return total
+
+
+def ingest(file_paths, store_dir=STORE_DIR, chunk_rows=CHUNK_ROWS):
+    os.makedirs(store_dir, exist_ok=True)
+    entries = {file_path: ingest_file(file_path, store_dir, chunk_rows) for file_path in file_paths}
+    build_aggregates(store_dir)
+    return entries
+
+
+def has_store(store_dir=STORE_DIR):
+    return os.path.exists(aggregate_path(store_dir))
+
+
+# 화재 기록 노드: 저장소 전체 집계 파일(적재가 끝날 때 마지막에 기록)과 기본 골든타임 초과 데이터의 내용 버전
+# 원본 행 조회 결과로 만드는 파생 데이터(밀도 이미지, 육각 격자 집계 등)는 이 노드에 의존
+INCIDENT_NODE = 'incident.aggregates'
+
+
+# 캐시/지도 버전용: 이번 실행에 고정된 화재 기록 노드 버전
+def incident_store_version():
+    return artifact_version(INCIDENT_NODE)
+
+
+# 대시보드용 집계 (저장소가 없으면 기본 데이터를 같은 과정으로 집계)
+@derived(INCIDENT_NODE, deps=(aggregate_path(), INCIDENT_PATH))
+def load_incident_aggregates(store_dir=STORE_DIR):
+    if has_store(store_dir):
+        aggregates = pd.read_parquet(aggregate_path(store_dir))
+    else:
+        aggregates = aggregate_chunk(prepare_chunk(load_data(INCIDENT_PATH))).reset_index()
+    aggregates['계절'] = season_of(aggregates['월'])
+    aggregates['시간대'] = period_of(aggregates['시'])
+    return aggregates.astype({'시군구명': 'category', '읍면동명': 'category', '계절': 'category', '시간대': 'category'})
+
+
+# 집계를 원하는 기준으로 다시 묶어서 건수, 골든타임 초과 비율, 평균 출동소요시간 계산
+def incident_summary(aggregates, by, gu=None):
+    if gu is not None:
+        aggregates = aggregates[aggregates['시군구명'] == gu]
+    summary = aggregates.groupby(by, observed=True)[SUM_COLUMNS].sum().reset_index()
+    summary['골든타임초과_비율'] = summary['골든타임초과'] / summary['건수']
+    summary['평균_출동소요시간'] = summary['출동소요시간'] / summary['건수']
+    return summary
+
+
+# 원본 행 조회: 연도/월은 파티션으로, 구/동/계절/시간대/골든타임 초과 여부는 Parquet 필터로 필요한 행만 읽음
+# bounds 를 주면 ((남, 서), (북, 동)) 위도/경도 범위 안의 행만 읽음
+def query_incidents(gu=None, dong=None, year=None, month=None, golden_only=False, columns=None, store_dir=STORE_DIR,
+                    season=None, period=None, bounds=None):
+    conditions = {'시군구명': gu, '읍면동명': dong, '연도': year, '월': month, '계절': season, '시간대': period}
+    if not has_store(store_dir):
+        rows = prepare_chunk(load_data(INCIDENT_PATH))
+        for col, value in conditions.items():
+            if value is not None:
+                rows = rows[rows[col] == value]
+        if golden_only:
+            rows = rows[rows['골든타임초과']]
+        if bounds is not None:
+            (south, west), (north, east) = bounds
+            rows = rows[rows['위도'].between(south, north) & rows['경도'].between(west, east)]
+        return rows.reset_index(drop=True)[columns] if columns else rows.reset_index(drop=True)
+
+    dataset = ds.dataset(rows_dir(store_dir), format='parquet', partitioning='hive')
+    expression = None
+    for col, value in list(conditions.items()) + [('골든타임초과', True if golden_only else None)]:
+        if value is not None:
+            term = ds.field(col) == value
+            expression = term if expression is None else expression & term
+    if bounds is not None:
+        (south, west), (north, east) = bounds
+        term = ((ds.field('위도') >= south) & (ds.field('위도') <= north)
+                & (ds.field('경도') >= west) & (ds.field('경도') <= east))
+        expression = term if expression is None else expression & term
+    return dataset.to_table(columns=columns, filter=expression).to_pandas()
+
+
+if __name__ == '__main__':
+    start = time.perf_counter()
+    for file_path, entry in ingest(sys.argv[1:]).items():
+        print(f"{file_path}: {entry['raw_rows']} rows -> {entry['seoul_rows']} Seoul rows")
+    print(f'ingested in {time.perf_counter() - start:.1f} s')
@@ -0,0 +1,144 @@
+# -*- coding:utf-8 -*-
+# 지도 렌더링 결과(HTML) 캐시
+# 데이터 버전 + 필터(구, 동, 레이어)를 키로 최종 HTML 바이트를 메모리에 LRU 로 보관하고,
+# 디스크에도 저장해서 서버를 다시 시작해도 재사용함
+import os
+import json
+import hashlib
+import threading
+from collections import OrderedDict
+import streamlit as st
+import streamlit.components.v1 as components
+from utils.data_loader import BUNDLE_DIR
+from utils.artifacts import artifact_version
+
+MAP_CACHE_DIR = os.path.join(BUNDLE_DIR, 'maps')
+# 지도 생성 코드가 바뀌어 기존 캐시를 버려야 할 때 올리는 번호
+MAP_CACHE_VERSION = 1
+
+
+# 원본 파일(또는 파생 노드)들의 데이터 버전 문자열 (이번 실행에 고정된 내용 해시 버전, utils.artifacts)
+def dataset_version(*file_paths):
+    return artifact_version(*file_paths)
+
+
+# 지도가 속한 Figure 전체(범례 등 추가 요소 포함)를 완성된 HTML 문서로 변환
+def render_map_html(m):
+    return m.get_root().render()
+
+
+def show_map_html(html, width=700, height=500):
+    components.html(html, height=height + 10, width=width)
+
+
+class MapCache:
+    def __init__(self, max_bytes=64 * 1024 * 1024, max_disk_files=2000, cache_dir=MAP_CACHE_DIR):
+        self.max_bytes = max_bytes
+        self.max_disk_files = max_disk_files
+        self.cache_dir = cache_dir
+        self.items = OrderedDict()
+        self.size = 0
+        self.lock = threading.Lock()
+        self.render_locks = {}
+        self.hits = {'memory': 0, 'disk': 0, 'miss': 0}
+
+    def make_key(self, name, version, filters):
+        raw = json.dumps([MAP_CACHE_VERSION, name, version, filters], ensure_ascii=False, sort_keys=True, default=str)
+        return f"{name}-{hashlib.sha1(raw.encode('utf-8')).hexdigest()}"
+
+    def _disk_path(self, key):
+        return os.path.join(self.cache_dir, f'{key}.html')
+
+    def _remember(self, key, data):
+        self.items[key] = data
+        self.items.move_to_end(key)
+        self.size += len(data)
+        # 메모리 한도를 넘으면 가장 오래 사용하지 않은 항목부터 제거 (디스크에는 남아 있음)
+        while self.size > self.max_bytes and len(self.items) > 1:
+            _, evicted = self.items.popitem(last=False)
+            self.size -= len(evicted)
+
+    def _write_disk(self, key, data):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        path = self._disk_path(key)
+        tmp_path = f'{path}.{threading.get_ident()}.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+        files = [os.path.join(self.cache_dir, f) for f in os.listdir(self.cache_dir) if f.endswith('.html')]
+        if len(files) > self.max_disk_files:
+            files.sort(key=os.path.getmtime)
+            for old in files[:len(files) - self.max_disk_files]:
+                os.remove(old)
+
+    def get(self, key):
+        with self.lock:
+            if key in self.items:
+                self.items.move_to_end(key)
+                self.hits['memory'] += 1
+                return self.items[key]
+        path = self._disk_path(key)
+        if os.path.exists(path):
+            with open(path, 'rb') as f:
+                data = f.read()
+            with self.lock:
+                self.hits['disk'] += 1
+                self._remember(key, data)
+            return data
+        return None
+
+    def put(self, key, data):
+        self._write_disk(key, data)
+        with self.lock:
+            if key not in self.items:
+                self._remember(key, data)
+
+    # 캐시에 있으면 그대로, 없으면 render() 로 HTML 을 만들어 저장 후 반환
+    # 같은 키를 여러 세션이 동시에 요청하면 한 세션만 렌더링하고 나머지는 그 결과를 기다림
+    def get_or_render(self, name, version, filters, render):
+        key = self.make_key(name, version, filters)
+        data = self.get(key)
+        if data is not None:
+            return data.decode('utf-8')
+
+        with self.lock:
+            render_lock = self.render_locks.setdefault(key, threading.Lock())
+        # 렌더링이 실패해도 키별 잠금을 남기지 않음
+        try:
+            with render_lock:
+                data = self.get(key)
+                if data is None:
+                    with self.lock:
+                        self.hits['miss'] += 1
+                    data = render().encode('utf-8')
+                    self.put(key, data)
+        finally:
+            with self.lock:
+                self.render_locks.pop(key, None)
+        return data.decode('utf-8')
+
+    def stats(self):
+        with self.lock:
+            total = sum(self.hits.values())
+            hit_rate = (self.hits['memory'] + self.hits['disk']) / total if total else 0.0
+            return {**self.hits, 'hit_rate': hit_rate, 'items': len(self.items), 'bytes': self.size}
+
+
+# 모든 세션이 공유하는 지도 캐시
+@st.cache_resource
+def get_map_cache():
+    return MapCache()
+
+
+# 캐시된 지도 HTML 을 표시하고, 없으면 build_map() 으로 folium 지도를 만들어 캐시에 저장
+def show_cached_map(name, version, filters, build_map, width=700, height=500):
+    html = get_map_cache().get_or_render(name, version, filters, lambda: render_map_html(build_map()))
+    show_map_html(html, width=width, height=height)
+
+
+def show_map_cache_stats():
+    stats = get_map_cache().stats()
+    with st.sidebar.expander('지도 캐시 현황'):
+        st.caption(f"적중률 {stats['hit_rate']:.0%} (메모리 {stats['memory']}, 디스크 {stats['disk']}, "
+                   f"새로 생성 {stats['miss']}) · {stats['items']}개, {stats['bytes'] / 1024:,.0f}KB")
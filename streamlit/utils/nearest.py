@@ -0,0 +1,88 @@
+# -*- coding:utf-8 -*-
+# 최근접 지점 검색: 소방시설, 비상소화장치, 화재출동 지점에 하버사인 BallTree 인덱스를 만들어
+# 여러 지점(후보지, 격자 중심 등)의 k-최근접 / 반경 내 검색을 한 번에 벡터 연산으로 처리
+import numpy as np
+import pandas as pd
+from sklearn.neighbors import BallTree
+from utils.data_loader import load_data, load_geodata
+from utils.artifacts import derived
+
+# 지구 반지름 (킬로미터 단위)
+EARTH_RADIUS_KM = 6371.0
+
+# 데이터셋별 최근접 거리 컬럼 이름
+DISTANCE_COLUMNS = {
+    'stations': '가장_가까운_소방시설_거리',
+    'devices': '가장_가까운_비상소화장치_거리',
+    'incidents': '가장_가까운_화재_거리',
+}
+
+
+# 하버사인 거리 (km), 배열끼리 원소별로 계산
+def haversine(lat1, lon1, lat2, lon2):
+    lat1, lon1, lat2, lon2 = map(np.radians, [lat1, lon1, lat2, lon2])
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(a))
+
+
+def to_radians(lat, lon):
+    return np.radians(np.column_stack([np.asarray(lat, dtype=float).ravel(), np.asarray(lon, dtype=float).ravel()]))
+
+
+class NearestIndex:
+    def __init__(self, lat, lon, data=None):
+        points = to_radians(lat, lon)
+        self.size = len(points)
+        self.tree = BallTree(points, metric='haversine')
+        # 검색 결과 번호로 원본 행을 찾을 수 있도록 보관
+        self.data = data.reset_index(drop=True) if data is not None else None
+
+    def __len__(self):
+        return self.size
+
+    # 각 지점에서 가까운 k 개 지점까지의 거리(km)와 번호, 모양은 (지점 수, k)
+    def query(self, lat, lon, k=1):
+        distances, indices = self.tree.query(to_radians(lat, lon), k=min(k, len(self)))
+        return distances * EARTH_RADIUS_KM, indices
+
+    # 각 지점에서 가장 가까운 지점까지의 거리(km)
+    def nearest_distance(self, lat, lon):
+        distances, _ = self.query(lat, lon, k=1)
+        return distances[:, 0]
+
+    # 각 지점의 반경(km) 안에 있는 지점 번호 목록 (return_distance=True 면 거리 목록도 함께 반환)
+    def query_radius(self, lat, lon, radius_km, return_distance=False):
+        points = to_radians(lat, lon)
+        if return_distance:
+            indices, distances = self.tree.query_radius(points, r=radius_km / EARTH_RADIUS_KM,
+                                                        return_distance=True, sort_results=True)
+            return indices, [d * EARTH_RADIUS_KM for d in distances]
+        return self.tree.query_radius(points, r=radius_km / EARTH_RADIUS_KM)
+
+    # 각 지점의 반경(km) 안에 있는 지점 수
+    def count_within(self, lat, lon, radius_km):
+        return self.tree.query_radius(to_radians(lat, lon), r=radius_km / EARTH_RADIUS_KM, count_only=True)
+
+
+# 점 데이터셋별 최근접 인덱스 (모든 세션이 공유)
+# kind 를 지정하면 소방시설 중 해당 유형(소방서, 119안전센터 등)만 사용
+@derived('nearest.index', deps=("data/서울시_소방시설_좌표_구동.csv", "data/서울시_비상소화장치_좌표_구동.csv",
+                                "data/화재출동_골든타임.csv"), resource=True)
+def load_nearest_index(name, kind=None):
+    if name == 'stations':
+        df = load_data("data/서울시_소방시설_좌표_구동.csv")
+        if kind is not None:
+            df = df[df['유형구분명'] == kind]
+        return NearestIndex(df['위도'], df['경도'], df)
+    elif name == 'devices':
+        gdf = load_geodata("data/서울시_비상소화장치_좌표_구동.csv")
+        return NearestIndex(gdf.geometry.y, gdf.geometry.x, gdf.drop(columns='geometry'))
+    elif name == 'incidents':
+        df = load_data("data/화재출동_골든타임.csv").dropna(subset=['위도', '경도'])
+        return NearestIndex(df['위도'], df['경도'], df)
+    raise ValueError(f"Unknown point dataset: {name}")
+
+
+# 여러 지점에서 데이터셋별 가장 가까운 지점까지의 거리(km) 표
+def nearest_distances(lat, lon, names=tuple(DISTANCE_COLUMNS)):
+    return pd.DataFrame({DISTANCE_COLUMNS[name]: load_nearest_index(name).nearest_distance(lat, lon) for name in names})
@@ -0,0 +1,164 @@
+# -*- coding:utf-8 -*-
+# 비상소화장치 신규 배치 최적화 (최대 커버리지 문제, lazy-greedy)
+# 후보지(약 100m 간격 격자점) 중 K 곳을 골라, 기존 비상소화장치가 덮지 못한 수요
+# (골든타임 초과 화재, 65세 이상 인구, 주택)를 서비스 반경 안에 가장 많이 덮도록 선택
+# 자치구별 문제는 서로 독립이므로 여러 CPU 코어에서 동시에 풂
+# 서울시 전체 계획 (streamlit 폴더에서 실행): python -m utils.placement [구별 개수]
+import sys
+import time
+import heapq
+import numpy as np
+import pandas as pd
+import shapely
+from concurrent.futures import ProcessPoolExecutor
+from scipy.sparse import csr_matrix
+from utils.data_loader import load_data, load_geodata
+from utils.group_index import load_group_index
+from utils.nearest import NearestIndex, EARTH_RADIUS_KM
+from utils.geo_lod import BOUNDARY_PATH
+from utils.site_scoring import DEVICE_PATH, INCIDENT_PATH, assign_dong, dong_features
+from utils.artifacts import derived
+
+# 비상소화장치 서비스 반경 (km)
+SERVICE_RADIUS_KM = 0.2
+# 후보지/주거 수요 격자 간격 (km)
+LATTICE_STEP_KM = 0.1
+# 수요 유형별 가중치 (유형마다 합계 1로 정규화한 뒤 곱함)
+DEMAND_WEIGHTS = {'화재': 1.0, '65세이상 인구': 1.0, '주택수': 1.0}
+
+
+# 폴리곤 안의 일정 간격(km) 격자점
+def lattice_points(polygon, step_km=LATTICE_STEP_KM):
+    min_lon, min_lat, max_lon, max_lat = polygon.bounds
+    lat_step = np.degrees(step_km / EARTH_RADIUS_KM)
+    lon_step = lat_step / np.cos(np.radians((min_lat + max_lat) / 2))
+    lon, lat = np.meshgrid(np.arange(min_lon, max_lon, lon_step), np.arange(min_lat, max_lat, lat_step))
+    lon, lat = lon.ravel(), lat.ravel()
+    # 점이 많으므로 폴리곤을 미리 준비(prepare)해서 포함 여부 검사를 빠르게 함
+    shapely.prepare(polygon)
+    inside = shapely.contains_xy(polygon, lon, lat)
+    return lat[inside], lon[inside]
+
+
+# 자치구 하나의 배치 문제: 후보지 좌표, 수요 좌표와 가중치, 기존 비상소화장치 좌표
+def district_problem(gu, step_km=LATTICE_STEP_KM):
+    boundary = load_geodata(BOUNDARY_PATH)
+    polygon = boundary.loc[boundary['구'] == gu, 'geometry'].unary_union
+    lat, lon = lattice_points(polygon, step_km)
+
+    # 주거 수요: 동별 65세 이상 인구, 주택수를 그 동의 격자점에 고르게 나눔 (동별 통계가 없는 구는 제외)
+    dong = assign_dong(lat, lon, gu)['동'].to_numpy()
+    stats = dong_features().reindex(dong)
+    cells_per_dong = pd.Series(dong).map(pd.Series(dong).value_counts()).to_numpy()
+    components = {
+        '65세이상 인구': stats['65세이상 인구'].to_numpy() / cells_per_dong,
+        '주택수': stats['주택수'].to_numpy() / cells_per_dong,
+    }
+
+    incidents = load_data(INCIDENT_PATH).dropna(subset=['위도', '경도'])
+    fire = shapely.contains_xy(polygon, incidents['경도'].to_numpy(), incidents['위도'].to_numpy())
+    fire_lat, fire_lon = incidents['위도'].to_numpy()[fire], incidents['경도'].to_numpy()[fire]
+
+    n_cells, n_fire = len(lat), len(fire_lat)
+    weights = np.zeros(n_cells + n_fire)
+    if n_fire:
+        weights[n_cells:] += DEMAND_WEIGHTS['화재'] / n_fire
+    for name, values in components.items():
+        values = np.nan_to_num(values)
+        if values.sum() > 0:
+            weights[:n_cells] += DEMAND_WEIGHTS[name] * values / values.sum()
+
+    devices = load_group_index(DEVICE_PATH, geo=True).select(gu)
+    return {
+        'gu': gu,
+        'candidates': (lat, lon),
+        'demand': (np.concatenate([lat, fire_lat]), np.concatenate([lon, fire_lon])),
+        'weights': weights,
+        'existing': (devices.geometry.y.to_numpy(), devices.geometry.x.to_numpy()),
+    }
+
+
+# 후보지 x 수요 포함 관계 희소 행렬 (반경 안의 수요만 공간 인덱스로 검색)
+def coverage_matrix(candidates, demand, radius_km=SERVICE_RADIUS_KM):
+    hits = NearestIndex(*demand).query_radius(*candidates, radius_km)
+    lengths = np.fromiter((len(h) for h in hits), dtype=np.int64, count=len(hits))
+    indptr = np.concatenate([[0], np.cumsum(lengths)])
+    indices = np.concatenate(hits) if len(hits) else np.array([], dtype=np.int64)
+    return csr_matrix((np.ones(len(indices)), indices, indptr), shape=(len(hits), len(demand[0])))
+
+
+# lazy-greedy 최대 커버리지: 이득의 상한(이전 계산값)이 큰 후보부터 꺼내서 다시 계산하고,
+# 다시 계산한 이득이 다음 후보의 상한보다 크거나 같으면 선택 (나머지 후보는 다시 계산하지 않음)
+def lazy_greedy(cover, weights, k):
+    remaining = weights.copy()
+    gains = cover @ remaining
+    heap = [(-gain, c) for c, gain in enumerate(gains) if gain > 0]
+    heapq.heapify(heap)
+
+    chosen, chosen_gains = [], []
+    while heap and len(chosen) < k:
+        _, c = heapq.heappop(heap)
+        covered = cover.indices[cover.indptr[c]:cover.indptr[c + 1]]
+        gain = remaining[covered].sum()
+        if gain <= 0:
+            continue
+        if heap and gain < -heap[0][0]:
+            heapq.heappush(heap, (-gain, c))
+            continue
+        chosen.append(c)
+        chosen_gains.append(gain)
+        remaining[covered] = 0
+    return np.array(chosen, dtype=np.int64), np.array(chosen_gains)
+
+
+# 배치 문제 풀기: 기존 장치가 덮은 수요를 제외하고 K 곳 선택
+def solve(problem, k, radius_km=SERVICE_RADIUS_KM):
+    weights = problem['weights'].copy()
+    total = weights.sum()
+    if len(problem['existing'][0]):
+        existing = NearestIndex(*problem['existing']).count_within(*problem['demand'], radius_km)
+        weights[existing > 0] = 0
+    base = total - weights.sum()
+
+    cover = coverage_matrix(problem['candidates'], problem['demand'], radius_km)
+    chosen, gains = lazy_greedy(cover, weights, k)
+    lat, lon = problem['candidates']
+    return pd.DataFrame({
+        '구': problem['gu'],
+        '위도': lat[chosen],
+        '경도': lon[chosen],
+        '추가_커버리지': gains / total if total else gains,
+        '누적_커버리지': (base + np.cumsum(gains)) / total if total else gains,
+    })
+
+
+def _solve_district(args):
+    gu, k, radius_km = args
+    return solve(district_problem(gu), k, radius_km)
+
+
+# 자치구 하나의 배치 계획 (선택 순서대로, 동 이름 포함)
+@derived('placement.plan', deps=('site.dong_features', 'site.dong_index', BOUNDARY_PATH, DEVICE_PATH, INCIDENT_PATH))
+def plan_district(gu, k, radius_km=SERVICE_RADIUS_KM):
+    plan = solve(district_problem(gu), k, radius_km)
+    plan.insert(1, '동', assign_dong(plan['위도'], plan['경도'], gu)['동'].to_numpy())
+    plan.insert(0, '순번', np.arange(1, len(plan) + 1))
+    return plan
+
+
+# 모든 자치구의 배치 계획을 여러 프로세스에서 동시에 계산 (구마다 k 곳, 문제 생성도 각 프로세스에서 수행)
+def plan_seoul(k, radius_km=SERVICE_RADIUS_KM, workers=None):
+    districts = sorted(load_geodata(BOUNDARY_PATH)['구'].tolist())
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        plans = list(pool.map(_solve_district, [(gu, k, radius_km) for gu in districts]))
+    return pd.concat(plans, ignore_index=True)
+
+
+if __name__ == '__main__':
+    k = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    start = time.perf_counter()
+    plan = plan_seoul(k)
+    elapsed = time.perf_counter() - start
+    summary = plan.groupby('구').agg(추가_개수=('위도', 'size'), 누적_커버리지=('누적_커버리지', 'max'))
+    print(summary.round(3).to_string())
+    print(f'{len(plan)} sites in {elapsed:.1f} s')
@@ -0,0 +1,121 @@
+# -*- coding:utf-8 -*-
+# 줌 레벨별 계층형 점 클러스터 인덱스 (supercluster 방식의 격자 병합)
+# 가장 상세한 레벨부터 한 단계씩 올라가며 화면 반경 크기의 격자 안에 있는 클러스터를 합치므로
+# 지도는 현재 줌과 화면 범위에 해당하는 클러스터만 받아서 그리면 됨
+import numpy as np
+import pandas as pd
+import folium
+from utils.data_loader import load_data, load_geodata
+from utils.artifacts import derived
+
+TILE_SIZE = 256
+
+
+# 경위도를 0~1 범위의 웹 메르카토르 좌표로 변환
+def project(lat, lon):
+    lat = np.radians(np.clip(lat, -85.0511, 85.0511))
+    x = (np.asarray(lon) + 180) / 360
+    y = (1 - np.log(np.tan(lat) + 1 / np.cos(lat)) / np.pi) / 2
+    return x, y
+
+
+def unproject(x, y):
+    lon = np.asarray(x) * 360 - 180
+    lat = np.degrees(np.arctan(np.sinh(np.pi * (1 - 2 * np.asarray(y)))))
+    return lat, lon
+
+
+class PointClusterIndex:
+    def __init__(self, lat, lon, radius=60, min_zoom=0, max_zoom=16):
+        self.radius = radius
+        self.min_zoom = min_zoom
+        self.max_zoom = max_zoom
+        self.levels = {}
+
+        lat, lon = np.asarray(lat, dtype=float), np.asarray(lon, dtype=float)
+        # 전체 점을 포함하는 범위(남, 서, 북, 동)
+        self.bounds = (lat.min(), lon.min(), lat.max(), lon.max())
+        x, y = project(lat, lon)
+        # max_zoom + 1 레벨은 원본 점 하나가 클러스터 하나
+        level = {
+            'x': x, 'y': y,
+            'count': np.ones(len(x), dtype=np.int64),
+            'point': np.arange(len(x)),
+        }
+        self.levels[max_zoom + 1] = level
+        for zoom in range(max_zoom, min_zoom - 1, -1):
+            level = self._merge(level, zoom)
+            self.levels[zoom] = level
+
+    # 아래 레벨의 클러스터를 현재 줌의 반경 격자로 묶어 개수 합계와 가중 중심을 계산
+    def _merge(self, child, zoom):
+        cells_per_unit = 2 ** zoom * TILE_SIZE / self.radius
+        cell_x = np.floor(child['x'] * cells_per_unit).astype(np.int64)
+        cell_y = np.floor(child['y'] * cells_per_unit).astype(np.int64)
+        keys, parent = np.unique(cell_x * (int(cells_per_unit) + 1) + cell_y, return_inverse=True)
+
+        count = np.bincount(parent, weights=child['count']).astype(np.int64)
+        x = np.bincount(parent, weights=child['x'] * child['count']) / count
+        y = np.bincount(parent, weights=child['y'] * child['count']) / count
+        # 점이 하나뿐인 클러스터는 원본 점 번호를 그대로 유지
+        point = np.full(len(keys), -1)
+        single_child = np.flatnonzero(count[parent] == 1)
+        point[parent[single_child]] = child['point'][single_child]
+
+        return {'x': x, 'y': y, 'count': count, 'point': point}
+
+    # 줌 레벨과 화면 범위(남, 서, 북, 동)에 해당하는 클러스터 목록
+    def get_clusters(self, bounds, zoom):
+        zoom = int(np.clip(np.floor(zoom), self.min_zoom, self.max_zoom + 1))
+        level = self.levels[zoom]
+        south, west, north, east = bounds
+        min_x, min_y = project(north, west)
+        max_x, max_y = project(south, east)
+        mask = (level['x'] >= min_x) & (level['x'] <= max_x) & (level['y'] >= min_y) & (level['y'] <= max_y)
+
+        lat, lon = unproject(level['x'][mask], level['y'][mask])
+        return pd.DataFrame({
+            'cluster_id': np.flatnonzero(mask),
+            'lat': lat,
+            'lon': lon,
+            'count': level['count'][mask],
+            'point': level['point'][mask],
+        })
+
+
+# 클러스터는 개수가 적힌 원으로, 점 하나짜리 클러스터는 draw_point 로 원래 마커를 그림
+def add_cluster_layer(m, clusters, draw_point, color='#D33D2A'):
+    for row in clusters.itertuples():
+        if row.point >= 0:
+            draw_point(m, row.point)
+            continue
+        radius = 12 + 4 * np.log10(row.count)
+        folium.CircleMarker(
+            location=[row.lat, row.lon],
+            radius=radius,
+            color=color,
+            fill=True,
+            fill_color=color,
+            fill_opacity=0.6,
+            tooltip=f'{row.count:,}건',
+        ).add_to(m)
+        folium.Marker(
+            [row.lat, row.lon],
+            icon=folium.DivIcon(
+                icon_size=(40, 16),
+                icon_anchor=(20, 8),
+                html=f'<div style="font-size: 9pt; font-weight: bold; color: white; text-align: center;">{row.count:,}</div>',
+            )
+        ).add_to(m)
+
+
+# 점 데이터셋별 클러스터 인덱스 (모든 세션이 공유, 점 번호는 원본 파일의 행 순서)
+@derived('cluster.index', deps=("data/서울시_소방시설_좌표_구동.csv", "data/서울시_비상소화장치_좌표_구동.csv"), resource=True)
+def load_cluster_index(name):
+    if name == 'stations':
+        df = load_data("data/서울시_소방시설_좌표_구동.csv")
+        return PointClusterIndex(df['위도'], df['경도'])
+    elif name == 'devices':
+        gdf = load_geodata("data/서울시_비상소화장치_좌표_구동.csv")
+        return PointClusterIndex(gdf.geometry.y, gdf.geometry.x)
+    raise ValueError(f"Unknown point dataset: {name}")
@@ -0,0 +1,158 @@
+# -*- coding:utf-8 -*-
+# 비상소화장치 후보지 점수 엔진 (notebooks/우선순위_정하기.ipynb 의 우선순위 파이프라인)
+# 후보 지점 수천 개 또는 격자 셀 전체의 특성을 한 번에 계산하고
+# MinMax 정규화 -> 가중합 점수 -> 가중 특성 K-평균 군집 -> 군집 평균 점수 순으로 우선순위(1~4)를 부여
+import numpy as np
+import pandas as pd
+import shapely
+from sklearn.cluster import KMeans
+from utils.data_loader import load_data, load_geodata
+from utils.nearest import NearestIndex, nearest_distances
+from utils.coverage import GRID_PATH, cell_centers
+from utils.geo_lod import BOUNDARY_PATH
+from utils.artifacts import derived
+
+ELDERLY_PATH = 'data/2021-2023_송파구_고령자현황.csv'
+HOUSING_PATH = 'data/2020_송파구_주택.csv'
+STATION_PATH = "data/서울시_소방시설_좌표_구동.csv"
+DEVICE_PATH = "data/서울시_비상소화장치_좌표_구동.csv"
+INCIDENT_PATH = "data/화재출동_골든타임.csv"
+
+# 특성별 가중치 (양수: 클수록 우선, 음수: 작을수록 우선), 노트북에서 실루엣 점수로 찾은 값
+# 노트북의 도로 특성(200m 내 좁은 도로 수, 도로폭 점수 평균)은 도로폭 원본(data/도로폭_점수.csv)이 저장소에 없어서 제외
+FEATURE_WEIGHTS = {
+    '전체인구': 2.7371932296825134,
+    '65세이상 인구': 0.9403614969298697,
+    '주택수': 2.5629538485756345,
+    '가장_가까운_비상소화장치_거리': 0.15099877071216614,
+    '가장_가까운_소방시설_거리': 0.6245617013927515,
+    '가장_가까운_화재_거리': -0.2860494270326206,
+}
+PRIORITY_CLASSES = 4
+# 점수 계산에 쓰이는 원본 파일 (지도 캐시 버전용)
+SCORING_SOURCES = (GRID_PATH, STATION_PATH, DEVICE_PATH, INCIDENT_PATH, ELDERLY_PATH, HOUSING_PATH)
+
+# 행정동 -> 법정동 (인구/주택 통계는 행정동, 시설/화재 좌표는 법정동 기준)
+ADMIN_TO_LEGAL_DONG = {
+    '풍납1동': '풍납동', '풍납2동': '풍납동',
+    '거여1동': '거여동', '거여2동': '거여동',
+    '마천1동': '마천동', '마천2동': '마천동',
+    '방이1동': '방이동', '방이2동': '방이동',
+    '오륜동': '오금동',
+    '송파1동': '송파동', '송파2동': '송파동',
+    '잠실본동': '잠실동', '잠실1동': '잠실동', '잠실2동': '잠실동', '잠실3동': '잠실동', '잠실4동': '잠실동', '잠실6동': '잠실동', '잠실7동': '잠실동',
+    '가락본동': '가락동', '가락1동': '가락동', '가락2동': '가락동',
+    '문정1동': '문정동', '문정2동': '문정동',
+}
+
+
+# 법정동별 인구, 65세 이상 인구(최근 시점), 주택수
+@derived('site.dong_features', deps=(ELDERLY_PATH, HOUSING_PATH))
+def dong_features():
+    elderly = load_data(ELDERLY_PATH)
+    elderly = elderly[elderly['시점'] == elderly['시점'].max()]
+    housing = load_data(HOUSING_PATH)
+
+    def by_legal_dong(df, columns):
+        dong = df['동'].astype(str)
+        return df[columns].groupby(dong.map(ADMIN_TO_LEGAL_DONG).fillna(dong)).sum()
+
+    features = by_legal_dong(elderly, ['전체인구', '65세이상 인구']).join(
+        by_legal_dong(housing, ['소계']).rename(columns={'소계': '주택수'}), how='inner')
+    features.index.name = '동'
+    return features
+
+
+# 구/동(법정동)이 기록된 시설, 화재 좌표
+@derived('site.labelled_points', deps=(STATION_PATH, DEVICE_PATH, INCIDENT_PATH))
+def labelled_points():
+    stations = load_data(STATION_PATH)
+    devices = load_geodata(DEVICE_PATH)
+    incidents = load_data(INCIDENT_PATH).dropna(subset=['위도', '경도'])
+    return pd.concat([
+        pd.DataFrame({'위도': stations['위도'], '경도': stations['경도'], '구': stations['구'], '동': stations['동']}),
+        pd.DataFrame({'위도': devices.geometry.y, '경도': devices.geometry.x, '구': devices['구'], '동': devices['동']}),
+        pd.DataFrame({'위도': incidents['위도'], '경도': incidents['경도'], '구': incidents['시군구명'], '동': incidents['읍면동명']}),
+    ], ignore_index=True).astype({'구': str, '동': str})
+
+
+# 기록 지점으로 만든 최근접 인덱스 (동 경계 데이터가 없어서 가장 가까운 기록 지점의 동을 사용)
+# gu 를 지정하면 해당 구의 기록 지점만 사용
+@derived('site.dong_index', deps=('site.labelled_points',), resource=True)
+def load_dong_index(gu=None):
+    labelled = labelled_points()
+    if gu is not None:
+        labelled = labelled[labelled['구'] == gu]
+    return NearestIndex(labelled['위도'], labelled['경도'], labelled[['구', '동']])
+
+
+def assign_dong(lat, lon, gu=None):
+    index = load_dong_index(gu)
+    _, nearest = index.query(lat, lon, k=1)
+    return index.data.iloc[nearest[:, 0]].reset_index(drop=True)
+
+
+# 자치구의 어느 동에도 통계가 없어서 계산에서 빠지는 동 통계 특성 (인구/고령자/주택 통계는 송파구 파일뿐)
+def missing_dong_features(gu):
+    stats = dong_features().reindex(load_dong_index(gu).data['동'].unique())
+    return [col for col in stats.columns if stats[col].isna().all()]
+
+
+# 후보 지점별 원본 특성 표 (동을 모르면 가장 가까운 기록 지점의 동으로 추정)
+def site_features(lat, lon, dong=None, gu=None):
+    lat, lon = np.asarray(lat, dtype=float), np.asarray(lon, dtype=float)
+    sites = assign_dong(lat, lon, gu) if dong is None else pd.DataFrame({'동': np.asarray(dong, dtype=str)})
+    sites.insert(0, '위도', lat)
+    sites.insert(1, '경도', lon)
+
+    features = sites.join(dong_features(), on='동')
+    return pd.concat([features, nearest_distances(lat, lon)], axis=1)
+
+
+def minmax_scale(values):
+    low, high = np.nanmin(values, axis=0), np.nanmax(values, axis=0)
+    span = np.where(high > low, high - low, 1.0)
+    return (values - low) / span
+
+
+# 특성 표에 점수와 우선순위를 추가
+# 계산할 수 없는 특성(통계가 없는 구의 인구 특성 등)은 제외하고, 일부 결측은 중앙값으로 채움
+def score_sites(features, weights=FEATURE_WEIGHTS, n_classes=PRIORITY_CLASSES, random_state=42):
+    columns = [col for col in weights if col in features.columns and features[col].notna().any()]
+    w = np.array([weights[col] for col in columns])
+
+    scaled = minmax_scale(features[columns].to_numpy(dtype=float))
+    scaled = np.where(np.isnan(scaled), np.nanmedian(scaled, axis=0), scaled)
+    scores = scaled @ w
+
+    result = features.copy()
+    result['점수'] = scores
+    if len(result) <= n_classes:
+        result['우선순위'] = pd.Series(scores).rank(ascending=False, method='first').astype(int).values
+        return result
+
+    # 가중 특성 공간에서 군집을 나누고, 군집 평균 점수가 높은 순서로 1순위부터 부여
+    labels = KMeans(n_clusters=n_classes, random_state=random_state, n_init=10).fit_predict(scaled * np.abs(w))
+    cluster_scores = np.bincount(labels, weights=scores, minlength=n_classes) / np.bincount(labels, minlength=n_classes)
+    priority = np.empty(n_classes, dtype=int)
+    priority[np.argsort(-cluster_scores)] = np.arange(1, n_classes + 1)
+    result['우선순위'] = priority[labels]
+    return result
+
+
+# 자치구 안에 중심이 있는 500m 격자 셀의 중심 좌표
+def grid_candidates(gu):
+    grid = load_geodata(GRID_PATH, encoding='euc-kr')
+    boundary = load_geodata(BOUNDARY_PATH)
+    polygon = boundary.loc[boundary['구'] == gu, 'geometry'].unary_union
+    lat, lon = cell_centers(grid)
+    inside = shapely.contains_xy(polygon, lon, lat)
+    return lat[inside], lon[inside]
+
+
+# 자치구의 모든 격자 셀을 후보지로 점수화 (구 목록은 경계 데이터 기준)
+@derived('site.scores', deps=('site.dong_features', 'site.dong_index', 'nearest.index',
+                                GRID_PATH, BOUNDARY_PATH))
+def score_district(gu):
+    lat, lon = grid_candidates(gu)
+    return score_sites(site_features(lat, lon, gu=gu)).sort_values('점수', ascending=False, ignore_index=True)
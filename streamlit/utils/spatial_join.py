@@ -0,0 +1,124 @@
+# -*- coding:utf-8 -*-
+# 오프라인 구/동 배정: 역지오코딩 API 를 행마다 호출하는 대신 경계 도형에 점을 한 번에 공간 조인
+# - 자치구(또는 행정동) 경계를 격자 조각으로 잘라 STRtree 를 만들어 두고, 모든 점을 한 번의 bulk query 로 찾음
+#   (경계 전체는 꼭짓점이 많아 점마다 검사하면 느리지만, 조각은 작아서 후보가 적고 검사도 빠름)
+# - 행정동 경계 파일이 있으면 동도 경계로 배정하고, 없으면 같은 구 안의 가장 가까운 기록 지점의 동으로 추정
+# 사용법 (streamlit 폴더에서 실행): python -m utils.spatial_join [원본 파일] [출력 파일] [구 컬럼] [동 컬럼]
+import os
+import sys
+import time
+import numpy as np
+import shapely
+from utils.data_loader import read_raw, clean_frame, load_geodata
+from utils.geo_lod import BOUNDARY_PATH
+from utils.site_scoring import assign_dong
+from utils.dong_vulnerability import load_dong_boundary
+from utils.artifacts import derived
+
+# 경계를 자르는 격자 크기 (도, 약 1km)
+TILE_DEG = 0.01
+
+
+# 경계 도형을 격자 칸과 겹치는 조각으로 자름, 조각별 원래 도형 번호도 함께 반환
+def subdivide(polygons, tile_deg=TILE_DEG):
+    polygons = np.asarray(polygons)
+    min_x, min_y, max_x, max_y = shapely.total_bounds(polygons)
+    x, y = np.meshgrid(np.arange(min_x, max_x, tile_deg), np.arange(min_y, max_y, tile_deg))
+    tiles = shapely.box(x.ravel(), y.ravel(), x.ravel() + tile_deg, y.ravel() + tile_deg)
+    owners, tile_ids = shapely.STRtree(tiles).query(polygons, predicate='intersects')
+    pieces = shapely.intersection(polygons[owners], tiles[tile_ids])
+    keep = ~shapely.is_empty(pieces)
+    return pieces[keep], owners[keep]
+
+
+class RegionIndex:
+    # labels: 경계별 이름 표 (구, 또는 구/동), polygons: 같은 순서의 경위도 경계 도형
+    def __init__(self, labels, polygons, tile_deg=TILE_DEG):
+        self.labels = labels.reset_index(drop=True)
+        self.pieces, self.owners = subdivide(polygons, tile_deg)
+        self.tree = shapely.STRtree(self.pieces)
+
+    def __len__(self):
+        return len(self.labels)
+
+    # 각 점이 속한 경계 번호 (어느 경계에도 속하지 않으면 -1, 경계선 위의 점은 먼저 찾은 경계)
+    def locate(self, lat, lon):
+        points = shapely.points(np.asarray(lon, dtype=float), np.asarray(lat, dtype=float))
+        point_ids, piece_ids = self.tree.query(points, predicate='intersects')
+        found = np.full(len(points), -1, dtype=np.int64)
+        found[point_ids[::-1]] = self.owners[piece_ids[::-1]]
+        return found
+
+    # 각 점의 경계 이름 표 (속하지 않는 점은 None)
+    def assign(self, lat, lon):
+        found = self.locate(lat, lon)
+        result = self.labels.iloc[np.where(found >= 0, found, 0)].reset_index(drop=True).astype(object)
+        result[found < 0] = None
+        return result
+
+
+# 자치구 경계 인덱스 (모든 세션이 공유)
+@derived('region_index.gu', deps=(BOUNDARY_PATH,), resource=True)
+def load_gu_region_index():
+    boundary = load_geodata(BOUNDARY_PATH)
+    return RegionIndex(boundary[['구']].astype(str), boundary.geometry.values)
+
+
+# 행정동 경계 인덱스 (경계 파일이 없으면 None)
+@derived('region_index.dong', deps=('dong.boundary',), resource=True)
+def load_dong_region_index():
+    boundary = load_dong_boundary()
+    if boundary is None:
+        return None
+    return RegionIndex(boundary[['구', '동']].astype(str), boundary.geometry.values)
+
+
+# 점마다 구, 동 배정 (서울시 밖은 None)
+# 구는 자치구 경계로, 동은 행정동 경계가 있으면 경계로, 없으면 같은 구 안의 가장 가까운 기록 지점의 동으로 배정
+def assign_regions(lat, lon):
+    lat, lon = np.asarray(lat, dtype=float), np.asarray(lon, dtype=float)
+    result = load_gu_region_index().assign(lat, lon)
+    dong_index = load_dong_region_index()
+    if dong_index is not None:
+        result['동'] = dong_index.assign(lat, lon)['동']
+        return result
+
+    result['동'] = None
+    for gu, rows in result.groupby('구').groups.items():
+        rows = rows.to_numpy()
+        result.loc[rows, '동'] = assign_dong(lat[rows], lon[rows], gu)['동'].to_numpy()
+    return result
+
+
+# 점 좌표 컬럼 (위도/경도, 없으면 WKT geometry)
+def point_columns(df):
+    if {'위도', '경도'} <= set(df.columns):
+        return df['위도'].to_numpy(dtype=float), df['경도'].to_numpy(dtype=float)
+    points = shapely.from_wkt(df['geometry'])
+    return shapely.get_y(points), shapely.get_x(points)
+
+
+# 점 데이터 파일에 구/동 컬럼을 채워서 저장 (기존 컬럼은 덮어씀)
+def tag_file(file_path, output_path, gu_col='구', dong_col='동', encoding=None):
+    df = clean_frame(read_raw(file_path, encoding=encoding), file_path)
+    df = df.drop(columns=[col for col in (gu_col, dong_col) if col in df.columns])
+    lat, lon = point_columns(df)
+    regions = assign_regions(lat, lon)
+    df[gu_col] = regions['구'].to_numpy()
+    df[dong_col] = regions['동'].to_numpy()
+
+    tmp_path = f'{output_path}.tmp'
+    df.to_csv(tmp_path, index=False, encoding='utf-8')
+    os.replace(tmp_path, output_path)
+    return len(df), int(regions['구'].isna().sum())
+
+
+if __name__ == '__main__':
+    from utils.incident_store import sniff_encoding
+    file_path, output_path = sys.argv[1], sys.argv[2]
+    gu_col = sys.argv[3] if len(sys.argv) > 3 else '구'
+    dong_col = sys.argv[4] if len(sys.argv) > 4 else '동'
+    encoding = sniff_encoding(file_path) if file_path.lower().endswith('.csv') else None
+    start = time.perf_counter()
+    rows, outside = tag_file(file_path, output_path, gu_col, dong_col, encoding)
+    print(f'{file_path} -> {output_path}: {rows} rows tagged ({outside} outside Seoul) in {time.perf_counter() - start:.2f} s')
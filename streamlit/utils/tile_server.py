@@ -0,0 +1,281 @@
+# -*- coding:utf-8 -*-
+# 폴리곤 레이어 타일 서버: 500m 격자 등 폴리곤 레이어를 z/x/y PNG 타일로 잘라서 제공
+# 브라우저는 현재 화면에 필요한 타일만 요청하므로 격자가 커져도 페이지 크기는 늘지 않음
+# 타일 미리 생성 (streamlit 폴더에서 실행): python -m utils.tile_server
+import io
+import os
+import re
+import hashlib
+import threading
+import numpy as np
+import shapely
+import streamlit as st
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from PIL import Image, ImageDraw
+from utils.data_loader import BUNDLE_DIR, load_geodata
+from utils.artifacts import artifact_version
+from utils.coverage import GRID_PATH, STATION_PATH, load_grid_coverage, coverage_color, COVERAGE_PARAMS
+
+TILE_SIZE = 256
+TILE_DIR = os.path.join(BUNDLE_DIR, 'tiles')
+TILE_ZOOMS = range(10, 16)
+TILE_SERVER_PORT = int(os.environ.get('TILE_SERVER_PORT', 8765))
+# 타일 서버가 받을 주소 (인증이 없으므로 기본값은 이 컴퓨터에서만 접근 가능한 127.0.0.1,
+# 프록시를 다른 컴퓨터에 두는 배포 환경에서만 TILE_SERVER_URL 과 함께 0.0.0.0 등으로 지정)
+TILE_SERVER_HOST = os.environ.get('TILE_SERVER_HOST', '127.0.0.1')
+# 브라우저에서 접근할 타일 서버 주소 (배포 환경에서는 프록시 주소로 지정)
+# 지정하지 않으면 브라우저가 이 컴퓨터에서 접속한 경우에만 localhost 주소를 쓰고, 아니면 타일 레이어를 쓰지 않음
+TILE_SERVER_URL = os.environ.get('TILE_SERVER_URL')
+LOCAL_HOSTS = ('localhost', '127.0.0.1', '[::1]')
+
+
+# 소방용수 수에 따른 격자 색상
+def water_color(amount):
+    if amount == 30:
+        return '#01579B'
+    elif amount == 20:
+        return '#0277BD'
+    elif amount == 10:
+        return '#0288D1'
+    elif amount in [8, 9]:
+        return '#039BE5'
+    elif amount in [6, 7]:
+        return '#03A9F4'
+    elif amount == 5:
+        return '#29B6F6'
+    elif amount == 4:
+        return '#4FC3F7'
+    elif amount == 3:
+        return '#81D4FA'
+    elif amount == 2:
+        return '#B3E5FC'
+    elif amount == 1:
+        return '#E1F5FE'
+    else:
+        return '#808080'
+
+
+# 레이어 정의: 원본 파일, 인코딩, 채우기 색상 함수, 채우기 투명도, 테두리 색상
+# (선택) load: 원본 대신 GeoDataFrame 을 만드는 함수, depends: 버전에 포함할 추가 원본 파일, params: 계산 기준값
+LAYERS = {
+    'fire_water': {
+        'source': GRID_PATH,
+        'encoding': 'euc-kr',
+        'fill': lambda gdf: gdf['소방용수_수'].map(water_color),
+        'fill_opacity': 0.7,
+        'outline': (0, 0, 0, 60),
+    },
+    'boundary': {
+        'source': "data/boundary/boundary.geojson",
+        'encoding': None,
+        'fill': None,
+        'fill_opacity': 0,
+        'outline': (28, 28, 28, 200),
+    },
+    'golden_time': {
+        'source': GRID_PATH,
+        'encoding': 'euc-kr',
+        'load': load_grid_coverage,
+        'depends': (STATION_PATH,),
+        'params': COVERAGE_PARAMS,
+        'fill': lambda gdf: gdf['골든타임_구분'].astype(str).map(coverage_color),
+        'fill_opacity': 0.6,
+        'outline': (0, 0, 0, 60),
+    },
+}
+
+
+def hex_to_rgba(color, opacity):
+    color = color.lstrip('#')
+    return tuple(int(color[i:i + 2], 16) for i in (0, 2, 4)) + (int(255 * opacity),)
+
+
+# 경위도 좌표를 줌 0 기준 웹 메르카토르 픽셀 좌표로 변환
+def to_world_pixels(coords):
+    lon, lat = coords[:, 0], np.radians(coords[:, 1])
+    x = (lon + 180) / 360 * TILE_SIZE
+    y = (1 - np.log(np.tan(lat) + 1 / np.cos(lat)) / np.pi) / 2 * TILE_SIZE
+    return np.column_stack([x, y])
+
+
+# 원본 파일 내용이 바뀌면 다른 폴더에 타일을 새로 만들도록 원본 파일 버전(utils.artifacts 의 공개 버전)으로 버전을 만듦
+# 추가 원본 파일(depends)이나 계산 기준값(params)이 있는 레이어는 그 값도 버전에 포함
+def layer_version(name):
+    config = LAYERS[name]
+    key = artifact_version(config['source'], *config.get('depends', ()))
+    if 'params' in config:
+        key = [key, config['params']]
+    return hashlib.sha1(repr(key).encode()).hexdigest()[:12]
+
+
+def tile_bounds(z, x, y):
+    scale = TILE_SIZE / 2 ** z
+    return x * scale, y * scale, (x + 1) * scale, (y + 1) * scale
+
+
+# 레이어 도형을 한 번만 픽셀 좌표로 투영하고 공간 인덱스와 색상을 미리 계산
+class TileLayerSource:
+    def __init__(self, name):
+        config = LAYERS[name]
+        if 'load' in config:
+            gdf = config['load']()
+        else:
+            gdf = load_geodata(config['source'], encoding=config['encoding'])
+        self.version = layer_version(name)
+        self.geometries = shapely.transform(gdf.geometry.values, to_world_pixels)
+        self.tree = shapely.STRtree(self.geometries)
+        if config['fill'] is None:
+            self.fills = [None] * len(gdf)
+        else:
+            self.fills = [hex_to_rgba(color, config['fill_opacity']) for color in config['fill'](gdf)]
+        self.outline = config['outline']
+        lon_min, lat_min, lon_max, lat_max = gdf.total_bounds
+        self.bounds = to_world_pixels(np.array([[lon_min, lat_max], [lon_max, lat_min]])).ravel()
+
+    def render(self, z, x, y):
+        min_x, min_y, max_x, max_y = tile_bounds(z, x, y)
+        hits = self.tree.query(shapely.box(min_x, min_y, max_x, max_y), predicate='intersects')
+        if len(hits) == 0:
+            return None
+
+        factor = 2 ** z
+        image = Image.new('RGBA', (TILE_SIZE, TILE_SIZE), (0, 0, 0, 0))
+        draw = ImageDraw.Draw(image)
+        # 줌이 낮을 때는 테두리를 그리지 않아 격자가 검게 뭉치지 않도록 함
+        outline = self.outline if z >= 13 or self.fills[0] is None else None
+        for idx in hits:
+            for polygon in shapely.get_parts(self.geometries[idx]):
+                rings = [polygon.exterior] + list(polygon.interiors)
+                for i, ring in enumerate(rings):
+                    pixels = np.asarray(ring.coords) * factor - (x * TILE_SIZE, y * TILE_SIZE)
+                    points = [tuple(p) for p in pixels]
+                    fill = self.fills[idx] if i == 0 else (0, 0, 0, 0)
+                    draw.polygon(points, fill=fill, outline=outline)
+
+        buffer = io.BytesIO()
+        image.save(buffer, format='PNG', optimize=True)
+        return buffer.getvalue()
+
+    def tile_range(self, z):
+        factor = 2 ** z / TILE_SIZE
+        min_x, min_y, max_x, max_y = (np.array(self.bounds) * factor).astype(int)
+        return range(min_x, max_x + 1), range(min_y, max_y + 1)
+
+
+_sources = {}
+_sources_lock = threading.Lock()
+
+
+# 원본 버전이 바뀌면 레이어를 다시 만듦 (이전 버전 타일 폴더는 그대로 남음)
+def get_source(name):
+    version = layer_version(name)
+    with _sources_lock:
+        if name not in _sources or _sources[name].version != version:
+            _sources[name] = TileLayerSource(name)
+        return _sources[name]
+
+
+def tile_path(name, version, z, x, y):
+    return os.path.join(TILE_DIR, name, version, str(z), str(x), f'{y}.png')
+
+
+# 제공하는 줌 레벨과 그 줌의 타일 번호 범위 (0 ~ 2^z - 1) 안의 요청인지
+def valid_tile(z, x, y):
+    return z in TILE_ZOOMS and 0 <= x < 2 ** z and 0 <= y < 2 ** z
+
+
+# 디스크에 잘라둔 타일이 있으면 그대로 사용하고, 없으면 렌더링 후 저장
+def get_tile(name, z, x, y):
+    source = get_source(name)
+    path = tile_path(name, source.version, z, x, y)
+    if os.path.exists(path):
+        with open(path, 'rb') as f:
+            return f.read()
+
+    tile = source.render(z, x, y)
+    if tile is not None:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f'{path}.{threading.get_ident()}.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(tile)
+        os.replace(tmp_path, path)
+    return tile
+
+
+class TileRequestHandler(BaseHTTPRequestHandler):
+    pattern = re.compile(r'^/tiles/(\w+)/(\d+)/(\d+)/(\d+)\.png$')
+
+    def do_GET(self):
+        match = self.pattern.match(self.path)
+        if match is None or match.group(1) not in LAYERS:
+            self.send_error(404)
+            return
+        name, z, x, y = match.group(1), *map(int, match.groups()[1:])
+        # 범위 밖 요청은 렌더링하거나 디스크에 저장하지 않음
+        if not valid_tile(z, x, y):
+            self.send_error(404)
+            return
+        tile = get_tile(name, z, x, y)
+        if tile is None:
+            self.send_response(204)
+            self.send_header('Access-Control-Allow-Origin', '*')
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header('Content-Type', 'image/png')
+        self.send_header('Content-Length', str(len(tile)))
+        self.send_header('Cache-Control', 'public, max-age=86400')
+        self.send_header('Access-Control-Allow-Origin', '*')
+        self.end_headers()
+        self.wfile.write(tile)
+
+    def log_message(self, format, *args):
+        pass
+
+
+# 프로세스당 한 번 타일 서버를 백그라운드 스레드로 실행 (포트를 사용할 수 없으면 False)
+@st.cache_resource
+def launch_tile_server(port=TILE_SERVER_PORT, host=TILE_SERVER_HOST):
+    try:
+        server = ThreadingHTTPServer((host, port), TileRequestHandler)
+    except OSError:
+        return False
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return True
+
+
+# 브라우저가 이 컴퓨터에서 앱에 접속했는지 (요청의 Host 헤더 기준, 알 수 없으면 False)
+def is_local_session():
+    try:
+        from streamlit.web.server.websocket_headers import _get_websocket_headers
+        headers = _get_websocket_headers() or {}
+    except Exception:
+        return False
+    return headers.get('Host', '').rsplit(':', 1)[0] in LOCAL_HOSTS
+
+
+# 타일 URL 템플릿, 브라우저가 타일 서버에 접근할 수 없으면 None
+# (TILE_SERVER_URL 이 없는 원격/HTTPS 배포, 포트 사용 불가) 호출하는 쪽에서 GeoJson 레이어로 대체
+def start_tile_server(port=TILE_SERVER_PORT):
+    if TILE_SERVER_URL is None and not is_local_session():
+        return None
+    if not launch_tile_server(port):
+        return None
+    base_url = TILE_SERVER_URL or f'http://localhost:{port}'
+    return base_url + '/tiles/{layer}/{z}/{x}/{y}.png'
+
+
+def build_tiles(names=tuple(LAYERS), zooms=TILE_ZOOMS):
+    for name in names:
+        source = get_source(name)
+        count = 0
+        for z in zooms:
+            xs, ys = source.tile_range(z)
+            for x in xs:
+                for y in ys:
+                    count += get_tile(name, z, x, y) is not None
+        print(f'{name}: {count} tiles (zoom {zooms[0]}-{zooms[-1]})')
+
+
+if __name__ == '__main__':
+    build_tiles()
@@ -0,0 +1,36 @@
+# -*- coding:utf-8 -*-
+# 화면 범위 기반 점 레이어: st_folium 이 돌려주는 지도 범위(bounds)로 공간 인덱스를 질의해서
+# 현재 화면 안의 점만 지도에 보냄 (점이 많으면 현재 줌의 클러스터로 대체)
+import numpy as np
+import shapely
+from utils.point_cluster import PointClusterIndex
+
+# 화면 안의 점이 이 개수보다 많으면 개별 점 대신 클러스터를 보냄
+MAX_VIEWPORT_POINTS = 500
+
+
+# st_folium 의 bounds 값을 (남, 서, 북, 동) 튜플로 변환
+def parse_bounds(bounds):
+    if not bounds or bounds.get('_southWest', {}).get('lat') is None:
+        return None
+    south_west, north_east = bounds['_southWest'], bounds['_northEast']
+    return south_west['lat'], south_west['lng'], north_east['lat'], north_east['lng']
+
+
+class ViewportIndex:
+    # clusters: gdf 와 같은 행 순서로 미리 만든 클러스터 인덱스 (없으면 gdf 로 새로 만듦)
+    def __init__(self, gdf, clusters=None):
+        self.gdf = gdf.reset_index(drop=True)
+        self.tree = shapely.STRtree(self.gdf.geometry.values)
+        self.clusters = clusters if clusters is not None else PointClusterIndex(self.gdf.geometry.y, self.gdf.geometry.x)
+        lon_min, lat_min, lon_max, lat_max = self.gdf.total_bounds
+        self.bounds = (lat_min, lon_min, lat_max, lon_max)
+        self.center = ((lat_min + lat_max) / 2, (lon_min + lon_max) / 2)
+
+    # 화면 범위 안의 점(GeoDataFrame) 또는 클러스터(DataFrame) 중 하나를 반환
+    def query(self, bounds, zoom, max_points=MAX_VIEWPORT_POINTS):
+        south, west, north, east = bounds
+        hits = self.tree.query(shapely.box(west, south, east, north))
+        if len(hits) <= max_points:
+            return self.gdf.iloc[np.sort(hits)], None
+        return None, self.clusters.get_clusters(bounds, zoom)
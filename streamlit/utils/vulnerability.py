@@ -0,0 +1,128 @@
+# -*- coding:utf-8 -*-
+# 자치구 주택화재 취약점수 계산: 지표별로 자치구 순위(1~25, 클수록 취약)를 매기고 가중치를 곱해 합산
+# 가중치가 바뀔 때마다 다시 계산하며 결과는 가중치 조합별로 캐시
+# 순위 안정성: 가중치를 무작위로 수만 번 뽑아 자치구별 순위 분포와 상위 5위 확률을 계산
+# 순위 안정성 계산 (streamlit 폴더에서 실행): python -m utils.vulnerability [표본 수] [프로세스 수]
+import os
+import sys
+import time
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from utils.data_loader import load_data
+from utils.artifacts import derived
+
+RANK_PATH = "data/total_rank.csv"
+
+# 지표별 순위 방향: True 면 값이 클수록, False 면 값이 작을수록 취약 (total_rank.csv 의 점수 컬럼에서 확인)
+INDICATORS = {
+    '비상소화장치 설치개수': False,
+    '서울시 주거 시설 중 주택 비율': True,
+    '인구밀도(명/km^2)': True,
+    '노후 주택 수': True,
+    '소방관 1명당 담당인구': True,
+    '화재발생건수': True,
+    '안전센터 1개소당 담당인구': True,
+    '출동소요시간': True,
+    '고령자 수': True,
+}
+DEFAULT_WEIGHTS = tuple((name, 1.0) for name in INDICATORS)
+
+# 순위 안정성 분석 표본 수와 한 번에 계산할 표본 수 (메모리: 묶음 크기 x 자치구 수)
+STABILITY_SAMPLES = 50000
+STABILITY_CHUNK = 10000
+TOP_N = 5
+
+
+# 자치구별 원본 지표 (점수/순위 컬럼은 사용하지 않음)
+@derived('vulnerability.indicators', deps=(RANK_PATH,))
+def load_indicators(file_path=RANK_PATH):
+    df = load_data(file_path, encoding='cp949')
+    return df[['자치구'] + list(INDICATORS)].reset_index(drop=True)
+
+
+# 모든 지표의 순위를 한 번에 계산 (값이 작을수록 취약한 지표는 부호를 바꿔서 같은 방향으로 맞춤)
+@derived('vulnerability.ranks', deps=('vulnerability.indicators',))
+def indicator_ranks(file_path=RANK_PATH):
+    indicators = load_indicators(file_path)
+    signs = np.array([1 if ascending else -1 for ascending in INDICATORS.values()])
+    values = indicators[list(INDICATORS)].to_numpy(dtype=float) * signs
+    ranks = pd.DataFrame(values, columns=[f'{name} 점수' for name in INDICATORS]).rank(method='min').astype(int)
+    return ranks
+
+
+# 가중치 조합((지표, 가중치) 튜플)으로 전체 점수와 순위를 계산, 가중치가 0인 지표는 제외
+# 반환 표는 total_rank.csv 와 같은 컬럼 구성 (자치구, 순위, 전체 점수, 지표별 점수, 원본 지표)
+@derived('vulnerability.ranking', deps=('vulnerability.indicators', 'vulnerability.ranks'))
+def compute_ranking(weights=DEFAULT_WEIGHTS, file_path=RANK_PATH):
+    weights = dict(weights)
+    indicators = load_indicators(file_path)
+    ranks = indicator_ranks(file_path)
+    w = np.array([weights.get(name, 0.0) for name in INDICATORS])
+
+    total = ranks.to_numpy() @ w
+    result = pd.concat([indicators[['자치구']], ranks, indicators[list(INDICATORS)]], axis=1)
+    result.insert(1, '전체 점수', np.round(total, 2))
+    result.insert(1, '순위', result['전체 점수'].rank(ascending=False, method='min').astype(int))
+    return result
+
+
+# 가중치 표본 묶음 하나의 순위 분포: 가중치는 평균이 1인 디리클레 분포에서 뽑고,
+# (표본 x 지표) @ (지표 x 자치구) 행렬곱 한 번으로 모든 표본의 점수를 계산
+# 반환값은 counts[자치구, 순위 - 1] = 해당 순위가 나온 횟수
+def _rank_counts(args):
+    ranks, size, seed = args
+    rng = np.random.default_rng(seed)
+    n_indicators, n_districts = ranks.shape
+    weights = rng.dirichlet(np.ones(n_indicators), size=size) * n_indicators
+
+    totals = weights @ ranks
+    order = np.argsort(-totals, axis=1, kind='stable')
+    sample_ranks = np.empty_like(order)
+    np.put_along_axis(sample_ranks, order, np.arange(n_districts), axis=1)
+
+    counts = np.zeros((n_districts, n_districts), dtype=np.int64)
+    np.add.at(counts, (np.tile(np.arange(n_districts), size), sample_ranks.ravel()), 1)
+    return counts
+
+
+# 선택한 지표들에 대한 순위 안정성
+# 기본은 현재 프로세스에서 계산 (대시보드 기본 표본 수는 수십 ms), workers 가 2 이상이면 표본 묶음을 여러 프로세스에 나누고
+# None 이면 CPU 코어 수만큼 사용 (명령행 실행용, Streamlit 서버 프로세스에서는 프로세스 풀을 띄우지 않음)
+@derived('vulnerability.stability', deps=('vulnerability.ranking',))
+def rank_stability(indicators=tuple(INDICATORS), n_samples=STABILITY_SAMPLES, seed=0, workers=1, file_path=RANK_PATH):
+    ranks = indicator_ranks(file_path)[[f'{name} 점수' for name in indicators]].to_numpy(dtype=float).T
+    sizes = [min(STABILITY_CHUNK, n_samples - start) for start in range(0, n_samples, STABILITY_CHUNK)]
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    jobs = [(ranks, size, child) for size, child in zip(sizes, seeds)]
+
+    workers = workers if workers is not None else os.cpu_count() or 1
+    if workers > 1 and len(jobs) > 1:
+        with ProcessPoolExecutor(max_workers=min(workers, len(jobs))) as pool:
+            counts = sum(pool.map(_rank_counts, jobs))
+    else:
+        counts = sum(map(_rank_counts, jobs))
+
+    positions = np.arange(1, counts.shape[1] + 1)
+    cumulative = counts.cumsum(axis=1) / n_samples
+    current = compute_ranking(tuple((name, 1.0) for name in indicators), file_path)
+    return pd.DataFrame({
+        '자치구': load_indicators(file_path)['자치구'],
+        '동일가중 순위': current['순위'],
+        '평균 순위': counts @ positions / n_samples,
+        '최고 순위': positions[(counts > 0).argmax(axis=1)],
+        '최저 순위': positions[counts.shape[1] - 1 - (counts[:, ::-1] > 0).argmax(axis=1)],
+        '순위 5%': positions[(cumulative >= 0.05).argmax(axis=1)],
+        '순위 95%': positions[(cumulative >= 0.95).argmax(axis=1)],
+        f'상위 {TOP_N}위 확률': counts[:, :TOP_N].sum(axis=1) / n_samples,
+    }).sort_values('평균 순위', ignore_index=True)
+
+
+if __name__ == '__main__':
+    n_samples = int(sys.argv[1]) if len(sys.argv) > 1 else STABILITY_SAMPLES
+    workers = int(sys.argv[2]) if len(sys.argv) > 2 else None
+    start = time.perf_counter()
+    stability = rank_stability(n_samples=n_samples, workers=workers)
+    elapsed = time.perf_counter() - start
+    print(stability.round(3).to_string(index=False))
+    print(f'{n_samples} weight samples in {elapsed:.2f} s')
@@ -4,39 +4,38 @@ import pandas as pd
 import plotly.graph_objects as go
 import plotly.express as px
 from plotly.subplots import make_subplots
-from utils.data_loader import load_data
+from utils.data_loader import load_trend_data, load_place_cube, place_options, place_total_key
 from utils.ui_helpers import setup_sidebar_links
+from utils.artifacts import pin_artifact_versions
 
 
 # 페이지 설정
 st.set_page_config(layout="wide", initial_sidebar_state="expanded", page_icon="🔥")
 
+# 이번 실행 동안 사용할 데이터 버전 고정 (원본이 바뀌면 백그라운드에서 다시 계산된 새 버전으로 다음 실행부터 전환)
+pin_artifact_versions()
+
 setup_sidebar_links()
 
 # 데이터 로드
-df = load_data("data/18_23_서울시_화재.csv")
-dong = load_data("data/동별_화재발생_장소_2021_2022.csv")
-
-seoul_total = dong.drop(['자치구', '동'], axis=1).sum().rename('서울시 전체')
-seoul_total['자치구'] = '서울시 전체'
-seoul_total['동'] = '전체'
-
-dong = pd.concat([dong, pd.DataFrame([seoul_total])], ignore_index=True)
-dong = dong.drop(columns=["Unnamed: 0"])
+trend = load_trend_data("data/18_23_서울시_화재.csv")
+# 자치구 x 동 x 장소 유형 집계 큐브 (자치구/서울시 합계 포함)와 선택지
+place_cube = load_place_cube("data/동별_화재발생_장소_2021_2022.csv")
+place_choices = place_options("data/동별_화재발생_장소_2021_2022.csv")
 
 # 시각화 함수 정의
-def visualize_trend_by_district_with_tabs(df):
-    columns = ['화재건수', '사망', '부상', '인명피해 계', '부동산피해(천원)', '동산피해(천원)', '재산피해(천원)', '재산피해/건당(천원)']
-    years = [f'{year}' for year in range(18, 24)]
+def visualize_trend_by_district_with_tabs(trend):
+    columns = trend['metric'].cat.categories.tolist()
+    period = f"({trend['연도'].min()}-{trend['연도'].max()})"
     selected_districts = []
 
     with st.container(border=True, height=650):
         option = st.radio("**화재 추세 분석**", ("서울시 전체", "각 구별로 비교하기"), horizontal=True)
 
         if option == "서울시 전체":
-            df = df[df['자치구'] == '서울시']
+            trend = trend.loc[['서울시']]
         else:
-            districts_options = df['자치구'].unique().tolist()
+            districts_options = trend.index.unique().tolist()
             if '서울시' in districts_options:
                 districts_options.remove('서울시')
             default_districts = [district for district in ['강북구', '송파구', '영등포구'] if district in districts_options]
@@ -44,22 +43,20 @@ def visualize_trend_by_district_with_tabs(df):
             if not selected_districts:
                 st.error('적어도 하나 이상의 자치구를 선택해야 합니다.', icon="🚨")
                 return
-            df = df[df['자치구'].isin(selected_districts)]
+            trend = trend.loc[selected_districts]
 
         if selected_districts or option == "서울시 전체":
-            tab1, tab2, tab3, tab4, tab5, tab6, tab7, tab8 = st.tabs(columns)
-            tabs = [tab1, tab2, tab3, tab4, tab5, tab6, tab7, tab8]
+            trend = trend.reset_index()
+            trend['자치구'] = trend['자치구'].cat.remove_unused_categories()
+            # 지표별 조각을 한 번에 나눠두고 각 탭은 해당 조각만 그림
+            slices = dict(tuple(trend.groupby('metric', observed=True)))
+            tabs = st.tabs(columns)
 
             for tab, column in zip(tabs, columns):
                 with tab:
-                    data_list = []
-                    for year in years:
-                        for index, row in df.iterrows():
-                            data_list.append({'자치구': row['자치구'], '연도': f'20{year}', column: row[f'{year}_{column}']})
-
-                    new_df = pd.DataFrame(data_list)
+                    new_df = slices[column].rename(columns={'value': column})
                     if option == "서울시 전체" and column == "화재건수":
-                        title = f'서울시 전체 {column} 추세 (2018-2023)'
+                        title = f'서울시 전체 {column} 추세 {period}'
                         fig = px.line(new_df, x='연도', y=column, color='자치구', title=title)
                         fig.update_layout(height=350)
                         col1, col2 = st.columns([4,5])
@@ -69,23 +66,21 @@ def visualize_trend_by_district_with_tabs(df):
                             st.markdown('**2024년 서울시 월별 화재건수 예측**')
                             st.image('data/사진/2024_서울시_월별화재건수_예측.png')
                     else:
-                        title = f'{("서울시 전체 " if option == "서울시 전체" else "")}{column} 추세 (2018-2023)'
+                        title = f'{("서울시 전체 " if option == "서울시 전체" else "")}{column} 추세 {period}'
                         fig = px.line(new_df, x='연도', y=column, color='자치구', title=title)
                         fig.update_layout(height=400)
                         st.plotly_chart(fig, use_container_width=True)
 
-def display_treemap(df):
+def display_treemap(cube, options):
     col1, col2 = st.columns(2)
     with col1:
-        selected_gu = st.selectbox('자치구 선택', options=df['자치구'].unique(), key='자치구_select')
-        df_filtered_by_gu = df[df['자치구'] == selected_gu]
+        selected_gu = st.selectbox('자치구 선택', options=list(options), key='자치구_select')
     with col2:
-        selected_dong = st.selectbox('동 선택', options=df_filtered_by_gu['동'].unique(), key='동_select_dong')
-        df_filtered_by_dong = df_filtered_by_gu[df_filtered_by_gu['동'] == selected_dong]
+        selected_dong = st.selectbox('동 선택', options=options[selected_gu], key='동_select_dong')
 
-    df_agg = df_filtered_by_dong.melt(id_vars=['자치구', '동'], value_vars=df.columns[3:], var_name='장소 유형', value_name='건수')
-    df_agg = df_agg.groupby(['자치구', '동', '장소 유형']).sum().reset_index()
-    df_agg = df_agg[df_agg['건수'] > 0]
+    counts = cube.loc[(selected_gu, selected_dong)]
+    counts = counts[counts > 0]
+    df_agg = pd.DataFrame({'자치구': selected_gu, '동': selected_dong, '장소 유형': counts.index, '건수': counts.values})
 
     colors = ['#F25E6B', '#F2C744', '#A1BF34', '#EEDFE2', '#FCE77C', '#E2D0F8', '#DCE2F0', '#F2EFBB', '#D5D971', '#6779A1', '#9B7776','#1BBFBF', '#D94B2B', '#D98F89', '#FFDEDC', '#ACC7B4']
 
@@ -93,15 +88,12 @@ def display_treemap(df):
     fig.update_layout(title='동별 화재 장소유형 트리맵', font=dict(family="Arial, sans-serif", size=14, color="black"))
     st.plotly_chart(fig, use_container_width=True)
 
-def visualize_facilities(df_selected):
-    fig = go.Figure()
+def visualize_facilities(counts):
     colors = ['#F25E6B', '#F2C744', '#A1BF34', '#EEDFE2', '#FCE77C', '#E2D0F8', '#DCE2F0', '#F2EFBB', '#D5D971', '#6779A1', '#9B7776','#1BBFBF', '#D94B2B', '#D98F89', '#FFDEDC', '#ACC7B4']
     facility_types = ['단독주택', '공동주택', '기타주택', '학교', '일반업무', '판매시설', '숙박시설', '종교시설', '의료시설', '공장 및 창고', '작업장', '위락오락시설', '음식점', '일상서비스시설', '기타']
     color_map = dict(zip(facility_types, colors))
 
-    for column in df_selected.columns[2:]:
-        total = df_selected[column].sum()
-        fig.add_trace(go.Bar(x=[column], y=[total], marker_color=color_map.get(column), showlegend=False))
+    fig = go.Figure(go.Bar(x=counts.index, y=counts.values, marker_color=[color_map.get(column) for column in counts.index], showlegend=False))
 
     fig.update_layout(title="시설 유형별 총계", xaxis_title="시설 유형", yaxis_title="총계")
     st.plotly_chart(fig, use_container_width=True)
@@ -126,17 +118,16 @@ def main():
         with st.container(height=130, border=True):
             st.metric(label="**재산 피해/건당 💰**", value='7,911 천원', delta='+ 4,321 천원', delta_color="inverse", help = '전년동기: 3,590 천원')
 
-    visualize_trend_by_district_with_tabs(df)
+    visualize_trend_by_district_with_tabs(trend)
 
     with st.container(border=True, height=700):
         st.markdown('<h4>화재 장소 유형 분석</h4>', unsafe_allow_html=True)
         tab1, tab2 = st.tabs(["트리맵으로 보기", "막대 그래프로 보기"])
         with tab1:
-            display_treemap(dong)
+            display_treemap(place_cube, place_choices)
         with tab2:
-            selected_gu = st.selectbox("자치구 선택", options=dong['자치구'].unique())
-            df_selected = dong[dong['자치구'] == selected_gu]
-            visualize_facilities(df_selected)
+            selected_gu = st.selectbox("자치구 선택", options=list(place_choices))
+            visualize_facilities(place_cube.loc[place_total_key(selected_gu)])
 
 if __name__ == "__main__":
     main()